@@ -6,10 +6,13 @@ Date: 2024-12-30
 """
 
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from pathlib import Path
+
+from transit_pipeline.config import RAW_CSV
+from transit_pipeline.dataset_cache import load_raw
+from transit_pipeline.metrics import RECORDER
+from transit_pipeline.exploration import (KEY_METRICS, completeness_report, diesel_yearly_average,
+                                          metric_summary, recent_rows, relevant_columns,
+                                          ridership_covid_periods)
 
 # Set display options
 pd.set_option('display.max_columns', None)
@@ -17,11 +20,14 @@ pd.set_option('display.width', None)
 pd.set_option('display.max_colwidth', 50)
 
 # Load the data
-csv_path = Path(__file__).parent.parent.parent / 'docs' / 'datafromus' / 'Monthly_Transportation_Statistics.csv'
+csv_path = RAW_CSV
 print(f"Loading data from: {csv_path}")
 print("=" * 80)
 
-df = pd.read_csv(csv_path)
+with RECORDER.stage('load') as m:
+    df = load_raw(csv_path=csv_path)
+    m.read(csv_path)
+    m.rows_out = len(df)
 
 # Basic info
 print("\n1. DATASET OVERVIEW")
@@ -40,18 +46,7 @@ for i, col in enumerate(df.columns, 1):
 print("\n3. RELEVANT COLUMNS FOR BUS FLEET MANAGEMENT")
 print("=" * 80)
 
-bus_related_keywords = [
-    'Transit', 'Bus', 'Ridership', 'Fuel', 'Diesel', 'Gasoline',
-    'Highway', 'Miles', 'Employment', 'Transportation Services',
-    'Fatalities', 'Safety'
-]
-
-relevant_cols = []
-for col in df.columns:
-    for keyword in bus_related_keywords:
-        if keyword.lower() in col.lower():
-            relevant_cols.append(col)
-            break
+relevant_cols = relevant_columns(df.columns)
 
 print(f"\nFound {len(relevant_cols)} relevant columns:")
 for i, col in enumerate(relevant_cols, 1):
@@ -63,32 +58,14 @@ print("=" * 80)
 print(f"{'Column Name':<60} {'Non-Null':<10} {'Null %':<10} {'Data Range'}")
 print("-" * 100)
 
-completeness = []
-for col in relevant_cols:
-    non_null = df[col].notna().sum()
-    null_pct = (df[col].isna().sum() / len(df)) * 100
-    
-    # Get data range if numeric
-    if pd.api.types.is_numeric_dtype(df[col]):
-        valid_data = df[col].dropna()
-        if len(valid_data) > 0:
-            data_range = f"{valid_data.min():.0f} - {valid_data.max():.0f}"
-        else:
-            data_range = "No data"
-    else:
-        data_range = "Non-numeric"
-    
-    completeness.append({
-        'column': col,
-        'non_null': non_null,
-        'null_pct': null_pct,
-        'data_range': data_range
-    })
-    
-    print(f"{col:<60} {non_null:<10} {null_pct:<10.1f} {data_range}")
+with RECORDER.stage('profile', rows_in=len(df)) as m:
+    completeness = completeness_report(df, relevant_cols)
+    m.rows_out = len(completeness)
+for row in completeness.itertuples():
+    print(f"{row.column:<60} {row.non_null:<10} {row.null_pct:<10.1f} {row.data_range}")
 
 # Sort by completeness
-completeness_df = pd.DataFrame(completeness).sort_values('null_pct')
+completeness_df = completeness.sort_values('null_pct')
 
 print("\n5. BEST COLUMNS (Most Complete Data)")
 print("=" * 80)
@@ -100,35 +77,23 @@ for idx, row in best_cols.iterrows():
 print("\n6. RECENT DATA ANALYSIS (2015-2023)")
 print("=" * 80)
 
-# Convert date
-df['Date'] = pd.to_datetime(df['Date'])
-df_recent = df[df['Date'] >= '2015-01-01'].copy()
+df_recent = recent_rows(df)
 
 print(f"Records from 2015-2023: {len(df_recent)}")
 print(f"Date range: {df_recent['Date'].min()} to {df_recent['Date'].max()}")
 
-# Key metrics for bus fleet management
-key_metrics = [
-    'Transit Ridership - Fixed Route Bus - Adjusted',
-    'Highway Fuel Price - On-highway Diesel',
-    'Highway Fuel Price - Regular Gasoline',
-    'Highway Vehicle Miles Traveled - All Systems',
-    'Transportation Employment - Transit and ground passenger transportation',
-    'Highway Fatalities'
-]
-
 print("\n7. KEY METRICS SUMMARY (2015-2023)")
 print("=" * 80)
-for metric in key_metrics:
+for metric in KEY_METRICS:
     if metric in df_recent.columns:
-        data = df_recent[metric].dropna()
-        if len(data) > 0:
+        stats = metric_summary(df_recent[metric])
+        if stats is not None:
             print(f"\n{metric}:")
-            print(f"  Records: {len(data)}")
-            print(f"  Min: {data.min():,.2f}")
-            print(f"  Max: {data.max():,.2f}")
-            print(f"  Mean: {data.mean():,.2f}")
-            print(f"  Latest: {data.iloc[-1]:,.2f}")
+            print(f"  Records: {stats['records']}")
+            print(f"  Min: {stats['min']:,.2f}")
+            print(f"  Max: {stats['max']:,.2f}")
+            print(f"  Mean: {stats['mean']:,.2f}")
+            print(f"  Latest: {stats['latest']:,.2f}")
         else:
             print(f"\n{metric}: NO DATA")
     else:
@@ -138,40 +103,31 @@ for metric in key_metrics:
 print("\n8. TREND ANALYSIS - BUS RIDERSHIP")
 print("=" * 80)
 
-if 'Transit Ridership - Fixed Route Bus - Adjusted' in df_recent.columns:
-    ridership = df_recent[['Date', 'Transit Ridership - Fixed Route Bus - Adjusted']].dropna()
-    
-    if len(ridership) > 0:
-        # Pre-COVID vs COVID vs Post-COVID
-        pre_covid = ridership[ridership['Date'] < '2020-03-01']['Transit Ridership - Fixed Route Bus - Adjusted'].mean()
-        covid = ridership[(ridership['Date'] >= '2020-03-01') & (ridership['Date'] < '2021-01-01')]['Transit Ridership - Fixed Route Bus - Adjusted'].mean()
-        post_covid = ridership[ridership['Date'] >= '2021-01-01']['Transit Ridership - Fixed Route Bus - Adjusted'].mean()
-        
-        print(f"Pre-COVID (2015-2020 Feb): {pre_covid:,.0f} passengers/month")
-        print(f"COVID Period (2020 Mar-Dec): {covid:,.0f} passengers/month")
-        print(f"Post-COVID (2021-2023): {post_covid:,.0f} passengers/month")
-        print(f"\nCOVID Impact: {((covid - pre_covid) / pre_covid * 100):.1f}% change")
-        print(f"Recovery: {((post_covid - covid) / covid * 100):.1f}% change")
+periods = ridership_covid_periods(df_recent)
+if periods is not None:
+    # Pre-COVID vs COVID vs Post-COVID
+    pre_covid, covid, post_covid = periods['pre_covid'], periods['covid'], periods['post_covid']
+
+    print(f"Pre-COVID (2015-2020 Feb): {pre_covid:,.0f} passengers/month")
+    print(f"COVID Period (2020 Mar-Dec): {covid:,.0f} passengers/month")
+    print(f"Post-COVID (2021-2023): {post_covid:,.0f} passengers/month")
+    print(f"\nCOVID Impact: {((covid - pre_covid) / pre_covid * 100):.1f}% change")
+    print(f"Recovery: {((post_covid - covid) / covid * 100):.1f}% change")
 
 print("\n9. TREND ANALYSIS - DIESEL FUEL PRICES")
 print("=" * 80)
 
-if 'Highway Fuel Price - On-highway Diesel' in df_recent.columns:
-    diesel = df_recent[['Date', 'Highway Fuel Price - On-highway Diesel']].dropna()
-    
-    if len(diesel) > 0:
-        # Year-by-year
-        diesel['Year'] = diesel['Date'].dt.year
-        yearly_avg = diesel.groupby('Year')['Highway Fuel Price - On-highway Diesel'].mean()
-        
-        print("Average Diesel Price by Year:")
-        for year, price in yearly_avg.items():
-            print(f"  {year}: ${price:.2f}/gallon")
-        
-        # Calculate increase
-        if 2020 in yearly_avg.index and 2022 in yearly_avg.index:
-            increase = ((yearly_avg[2022] - yearly_avg[2020]) / yearly_avg[2020]) * 100
-            print(f"\n2020-2022 Price Increase: {increase:.1f}%")
+yearly_avg = diesel_yearly_average(df_recent)
+if yearly_avg is not None:
+    # Year-by-year
+    print("Average Diesel Price by Year:")
+    for year, price in yearly_avg.items():
+        print(f"  {year}: ${price:.2f}/gallon")
+
+    # Calculate increase
+    if 2020 in yearly_avg.index and 2022 in yearly_avg.index:
+        increase = ((yearly_avg[2022] - yearly_avg[2020]) / yearly_avg[2020]) * 100
+        print(f"\n2020-2022 Price Increase: {increase:.1f}%")
 
 print("\n10. BUSINESS INSIGHTS")
 print("=" * 80)
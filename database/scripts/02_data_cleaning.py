@@ -3,253 +3,217 @@ US DOT Transportation Data Cleaning
 Purpose: Extract and clean only the columns needed for bus fleet management
 Author: Harvad Li
 Date: 2024-12-30
+
+Usage:
+    python 02_data_cleaning.py                      # load the whole CSV at once
+    python 02_data_cleaning.py --stream             # chunked read, bounded memory
+    python 02_data_cleaning.py --stream --chunksize 100000 --input big_extract.csv
+    python 02_data_cleaning.py --incremental        # reprocess only new/revised months
+    python 02_data_cleaning.py --precision 6 --compression gzip
+    python 02_data_cleaning.py --format parquet --compression zstd
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime
 
+from transit_pipeline.cleaning import (CleaningManifest, available_columns, config_fingerprint,
+                                       run_cleaning)
+from transit_pipeline.config import CLEANED_DIR, COLUMNS_TO_KEEP, MANIFEST_NAME, RAW_CSV, START_DATE
+from transit_pipeline.costmodel import CostModel
+from transit_pipeline.metrics import RECORDER
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Clean US DOT data for bus fleet management')
+    parser.add_argument('--input', type=Path, default=RAW_CSV,
+                        help='Raw Monthly_Transportation_Statistics.csv extract')
+    parser.add_argument('--output-dir', type=Path, default=CLEANED_DIR,
+                        help='Directory for the cleaned CSV files')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read the input in chunks with column pruning (bounded memory)')
+    parser.add_argument('--chunksize', type=int, default=50_000,
+                        help='Rows per chunk in --stream mode (default: 50000)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only clean months that are new or changed since the last run')
+    parser.add_argument('--precision', type=int, default=None,
+                        help='Significant digits of written floats (default: exact round trip)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help='Output format (parquet needs pyarrow)')
+    parser.add_argument('--compression', choices=['gzip', 'zstd'], default=None,
+                        help='Compress the CSV outputs (zstd needs zstandard), or the Parquet codec')
+    return parser.parse_args()
+
+
+def print_report(summary, writer):
+    """Sections 5-8: data quality, saved files, summary statistics and business insights."""
+    # Data quality summary
+    print("\n5. Data Quality Summary:")
+    print("-" * 80)
+    print(f"{'Column':<35} {'Non-Null':<10} {'Null %':<10} {'Min':<15} {'Max':<15}")
+    print("-" * 80)
+
+    for col in summary.columns:
+        if col != 'Date':
+            non_null = summary.non_null.get(col, 0)
+            null_pct = ((summary.rows - non_null) / summary.rows) * 100 if summary.rows else np.nan
+
+            if col in summary.min:
+                min_val = f"{summary.min[col]:.2f}"
+                max_val = f"{summary.max[col]:.2f}"
+            else:
+                min_val = "N/A"
+                max_val = "N/A"
+
+            print(f"{col:<35} {non_null:<10} {null_pct:<10.1f} {min_val:<15} {max_val:<15}")
+
+    print("\n6. Saved cleaned data:")
+    for out in writer.outputs if writer else []:
+        print(f"   ✓ Saved: {out['path']} ({out['rows']} rows)")
+    print(f"   Rows: {summary.rows}, Columns: {len(summary.columns)}")
+
+    # Generate summary statistics
+    print("\n7. Summary Statistics (2015-2023):")
+    print("=" * 80)
+
+    if 'BusRidership' in summary.columns and summary.non_null.get('BusRidership'):
+        print(f"\nBUS RIDERSHIP:")
+        print(f"  Total records: {summary.non_null['BusRidership']}")
+        print(f"  Average: {summary.mean('BusRidership'):,.0f} passengers/month")
+        print(f"  Min: {summary.min['BusRidership']:,.0f} (likely COVID period)")
+        print(f"  Max: {summary.max['BusRidership']:,.0f}")
+        print(f"  Latest: {summary.last_valid['BusRidership']:,.0f}")
+
+        # Pre vs Post COVID
+        pre_covid = summary.period_mean('BusRidership', ~summary.level('IsCOVIDPeriod'))
+        covid = summary.period_mean('BusRidership', summary.level('IsCOVIDPeriod'))
+        print(f"\n  Pre/Post COVID avg: {pre_covid:,.0f}")
+        print(f"  During COVID avg: {covid:,.0f}")
+        print(f"  COVID Impact: {((covid - pre_covid) / pre_covid * 100):.1f}%")
+
+    if 'DieselPrice' in summary.columns and summary.non_null.get('DieselPrice'):
+        print(f"\nDIESEL PRICES:")
+        print(f"  Total records: {summary.non_null['DieselPrice']}")
+        print(f"  Average: ${summary.mean('DieselPrice'):.2f}/gallon")
+        print(f"  Min: ${summary.min['DieselPrice']:.2f}")
+        print(f"  Max: ${summary.max['DieselPrice']:.2f}")
+        print(f"  Latest: ${summary.last_valid['DieselPrice']:.2f}")
+
+        # 2020 vs 2022
+        price_2020 = summary.period_mean('DieselPrice', summary.level('Year') == 2020)
+        price_2022 = summary.period_mean('DieselPrice', summary.level('Year') == 2022)
+        if not pd.isna(price_2020) and not pd.isna(price_2022):
+            print(f"\n  2020 average: ${price_2020:.2f}")
+            print(f"  2022 average: ${price_2022:.2f}")
+            print(f"  Increase: {((price_2022 - price_2020) / price_2020 * 100):.1f}%")
+
+    # Business insights
+    print("\n8. BUSINESS INSIGHTS FOR BUS FLEET MANAGEMENT:")
+    print("=" * 80)
+
+    insights = []
+
+    if 'BusRidership' in summary.columns and 'DieselPrice' in summary.columns:
+        # Calculate potential savings
+        avg_diesel = summary.mean('DieselPrice')
+
+        # Small city fleet at the average diesel price (see transit_pipeline.costmodel for what-ifs)
+        model = CostModel()
+        annual_gallons = model.annual_gallons()
+        annual_fuel_cost = model.annual_cost(avg_diesel)
+        potential_savings = annual_fuel_cost * model.savings
+
+        insights.append(f"• Small city fleet ({model.buses} buses): ${annual_fuel_cost:,.0f}/year fuel cost")
+        insights.append(f"• {model.savings:.0%} optimization savings: ${potential_savings:,.0f}/year")
+        insights.append(f"• Cost per gallon: ${avg_diesel:.2f}")
+        insights.append(f"• Annual gallons needed: {annual_gallons:,.0f}")
+
+    if 'BusRidership' in summary.columns and summary.last_row is not None:
+        latest_ridership = summary.last_row['BusRidership']
+        pre_covid_avg = summary.period_mean('BusRidership', summary.level('PreCOVID'))
+
+        if not pd.isna(latest_ridership) and not pd.isna(pre_covid_avg):
+            recovery_pct = (latest_ridership / pre_covid_avg) * 100
+            insights.append(f"• Current ridership at {recovery_pct:.0f}% of pre-COVID levels")
+            insights.append(f"• Opportunity: Optimize routes to match new demand patterns")
+
+    for insight in insights:
+        print(insight)
+
+
+args = parse_args()
+csv_path = args.input
+output_dir = args.output_dir
+
 print("=" * 80)
 print("US DOT DATA CLEANING FOR BUS FLEET MANAGEMENT")
 print("=" * 80)
 
-# Paths
-csv_path = Path(__file__).parent.parent.parent / 'docs' / 'datafromus' / 'Monthly_Transportation_Statistics.csv'
-output_dir = Path(__file__).parent.parent / 'data' / 'cleaned'
 output_dir.mkdir(parents=True, exist_ok=True)
 
-# Load data
-print("\n1. Loading raw data...")
-df = pd.read_csv(csv_path)
-print(f"   Loaded {len(df)} rows, {len(df.columns)} columns")
+# Select only columns we need for bus fleet management
+header = pd.read_csv(csv_path, nrows=0).columns
+available_cols, missing_cols = available_columns(header)
 
-# Convert date
-df['Date'] = pd.to_datetime(df['Date'])
+# Load data
+if args.stream:
+    print(f"\n1. Streaming raw data in chunks of {args.chunksize:,} rows...")
+else:
+    print("\n1. Loading raw data...")
+print(f"   Reading {len(available_cols)} of {len(header)} columns")
 
 # Filter to recent data (2015-2023) - most relevant and complete
-print("\n2. Filtering to 2015-2023 (most relevant period)...")
-df_filtered = df[df['Date'] >= '2015-01-01'].copy()
-print(f"   Filtered to {len(df_filtered)} rows")
+print(f"\n2. Filtering to {START_DATE[:4]}-2023 (most relevant period)...")
 
-# Select only columns we need for bus fleet management
 print("\n3. Selecting relevant columns...")
-
-columns_to_keep = {
-    # Date
-    'Date': 'Date',
-    
-    # Bus Ridership (PRIMARY METRIC)
-    'Transit Ridership - Fixed Route Bus - Adjusted': 'BusRidership',
-    'Transit Ridership - Urban Rail - Adjusted': 'RailRidership',
-    'Transit Ridership - Other Transit Modes - Adjusted': 'OtherTransitRidership',
-    
-    # Fuel Prices (COST ANALYSIS)
-    'Highway Fuel Price - On-highway Diesel': 'DieselPrice',
-    'Highway Fuel Price - Regular Gasoline': 'GasolinePrice',
-    
-    # Highway/Traffic Data (ROUTE OPTIMIZATION)
-    'Highway Vehicle Miles Traveled - All Systems': 'HighwayMilesTraveled',
-    'Highway Fatalities': 'HighwayFatalities',
-    'Highway Fatalities Per 100 Million Vehicle Miles Traveled': 'FatalityRate',
-    
-    # Employment (WORKFORCE PLANNING)
-    'Transportation Employment - Transit and ground passenger transportation': 'TransitEmployment',
-    'Transportation Employment - Truck Transportation': 'TruckEmployment',
-    
-    # Economic Indicators
-    'Unemployment Rate - Seasonally Adjusted': 'UnemploymentRate',
-    'Real Gross Domestic Product - Seasonally Adjusted': 'GDP',
-    
-    # Vehicle Sales (MARKET TRENDS)
-    'Heavy truck sales': 'HeavyTruckSales',
-    'Auto sales': 'AutoSales',
-}
-
-# Check which columns exist
-available_cols = {}
-missing_cols = []
-
-for original, new_name in columns_to_keep.items():
-    if original in df_filtered.columns:
-        available_cols[original] = new_name
-    else:
-        missing_cols.append(original)
-
-print(f"   Found {len(available_cols)} out of {len(columns_to_keep)} columns")
+print(f"   Found {len(available_cols)} out of {len(COLUMNS_TO_KEEP)} columns")
 if missing_cols:
     print(f"   Missing columns: {len(missing_cols)}")
     for col in missing_cols:
         print(f"     - {col}")
 
-# Create cleaned dataframe
-df_clean = df_filtered[list(available_cols.keys())].copy()
-df_clean.rename(columns=available_cols, inplace=True)
-
-# Add calculated fields
-print("\n4. Adding calculated fields...")
-
-# Year, Month for grouping
-df_clean['Year'] = df_clean['Date'].dt.year
-df_clean['Month'] = df_clean['Date'].dt.month
-df_clean['Quarter'] = df_clean['Date'].dt.quarter
-
-# COVID period flag
-df_clean['IsCOVIDPeriod'] = (df_clean['Date'] >= '2020-03-01') & (df_clean['Date'] <= '2021-12-31')
-
-# Calculate cost per passenger (if we have both ridership and fuel price)
-if 'BusRidership' in df_clean.columns and 'DieselPrice' in df_clean.columns:
-    # Assume average bus gets 6 MPG and travels 30,000 miles/month
-    avg_miles_per_month = 30000
-    avg_mpg = 6
-    gallons_per_month = avg_miles_per_month / avg_mpg
-    
-    df_clean['EstimatedFuelCostPerMonth'] = df_clean['DieselPrice'] * gallons_per_month
-    df_clean['EstimatedCostPerPassenger'] = df_clean['EstimatedFuelCostPerMonth'] / df_clean['BusRidership']
-
-# Data quality summary
-print("\n5. Data Quality Summary:")
-print("-" * 80)
-print(f"{'Column':<35} {'Non-Null':<10} {'Null %':<10} {'Min':<15} {'Max':<15}")
-print("-" * 80)
-
-for col in df_clean.columns:
-    if col != 'Date':
-        non_null = df_clean[col].notna().sum()
-        null_pct = (df_clean[col].isna().sum() / len(df_clean)) * 100
-        
-        if pd.api.types.is_numeric_dtype(df_clean[col]):
-            valid_data = df_clean[col].dropna()
-            if len(valid_data) > 0:
-                min_val = f"{valid_data.min():.2f}"
-                max_val = f"{valid_data.max():.2f}"
-            else:
-                min_val = "N/A"
-                max_val = "N/A"
-        else:
-            min_val = "N/A"
-            max_val = "N/A"
-        
-        print(f"{col:<35} {non_null:<10} {null_pct:<10.1f} {min_val:<15} {max_val:<15}")
-
-# Save cleaned data
-print("\n6. Saving cleaned data...")
-
-# Main cleaned file
-output_file = output_dir / 'us_bus_transit_data_2015_2023.csv'
-df_clean.to_csv(output_file, index=False)
-print(f"   ✓ Saved: {output_file}")
-print(f"   Rows: {len(df_clean)}, Columns: {len(df_clean.columns)}")
-
-# Create separate files for different purposes
-
-# 6a. Ridership data only (for ridership analysis)
-if 'BusRidership' in df_clean.columns:
-    ridership_cols = ['Date', 'Year', 'Month', 'Quarter', 'BusRidership', 'RailRidership', 
-                      'OtherTransitRidership', 'IsCOVIDPeriod']
-    ridership_cols = [c for c in ridership_cols if c in df_clean.columns]
-    df_ridership = df_clean[ridership_cols].dropna(subset=['BusRidership'])
-    
-    output_file = output_dir / 'ridership_data.csv'
-    df_ridership.to_csv(output_file, index=False)
-    print(f"   ✓ Saved: {output_file} ({len(df_ridership)} rows)")
-
-# 6b. Fuel price data (for cost analysis)
-if 'DieselPrice' in df_clean.columns:
-    fuel_cols = ['Date', 'Year', 'Month', 'DieselPrice', 'GasolinePrice']
-    fuel_cols = [c for c in fuel_cols if c in df_clean.columns]
-    df_fuel = df_clean[fuel_cols].dropna(subset=['DieselPrice'])
-    
-    output_file = output_dir / 'fuel_price_data.csv'
-    df_fuel.to_csv(output_file, index=False)
-    print(f"   ✓ Saved: {output_file} ({len(df_fuel)} rows)")
-
-# 6c. Combined metrics (for dashboard)
-dashboard_cols = ['Date', 'Year', 'Month', 'Quarter', 'BusRidership', 'DieselPrice', 
-                  'HighwayMilesTraveled', 'TransitEmployment', 'IsCOVIDPeriod',
-                  'EstimatedCostPerPassenger']
-dashboard_cols = [c for c in dashboard_cols if c in df_clean.columns]
-df_dashboard = df_clean[dashboard_cols].copy()
-
-output_file = output_dir / 'dashboard_data.csv'
-df_dashboard.to_csv(output_file, index=False)
-print(f"   ✓ Saved: {output_file} ({len(df_dashboard)} rows)")
-
-# Generate summary statistics
-print("\n7. Summary Statistics (2015-2023):")
-print("=" * 80)
-
-if 'BusRidership' in df_clean.columns:
-    ridership = df_clean['BusRidership'].dropna()
-    print(f"\nBUS RIDERSHIP:")
-    print(f"  Total records: {len(ridership)}")
-    print(f"  Average: {ridership.mean():,.0f} passengers/month")
-    print(f"  Min: {ridership.min():,.0f} (likely COVID period)")
-    print(f"  Max: {ridership.max():,.0f}")
-    print(f"  Latest: {ridership.iloc[-1]:,.0f}")
-    
-    # Pre vs Post COVID
-    pre_covid = df_clean[~df_clean['IsCOVIDPeriod']]['BusRidership'].mean()
-    covid = df_clean[df_clean['IsCOVIDPeriod']]['BusRidership'].mean()
-    print(f"\n  Pre/Post COVID avg: {pre_covid:,.0f}")
-    print(f"  During COVID avg: {covid:,.0f}")
-    print(f"  COVID Impact: {((covid - pre_covid) / pre_covid * 100):.1f}%")
-
-if 'DieselPrice' in df_clean.columns:
-    diesel = df_clean['DieselPrice'].dropna()
-    print(f"\nDIESEL PRICES:")
-    print(f"  Total records: {len(diesel)}")
-    print(f"  Average: ${diesel.mean():.2f}/gallon")
-    print(f"  Min: ${diesel.min():.2f}")
-    print(f"  Max: ${diesel.max():.2f}")
-    print(f"  Latest: ${diesel.iloc[-1]:.2f}")
-    
-    # 2020 vs 2022
-    price_2020 = df_clean[df_clean['Year'] == 2020]['DieselPrice'].mean()
-    price_2022 = df_clean[df_clean['Year'] == 2022]['DieselPrice'].mean()
-    if not pd.isna(price_2020) and not pd.isna(price_2022):
-        print(f"\n  2020 average: ${price_2020:.2f}")
-        print(f"  2022 average: ${price_2022:.2f}")
-        print(f"  Increase: {((price_2022 - price_2020) / price_2020 * 100):.1f}%")
-
-# Business insights
-print("\n8. BUSINESS INSIGHTS FOR BUS FLEET MANAGEMENT:")
-print("=" * 80)
-
-insights = []
-
-if 'BusRidership' in df_clean.columns and 'DieselPrice' in df_clean.columns:
-    # Calculate potential savings
-    avg_ridership = df_clean['BusRidership'].mean()
-    avg_diesel = df_clean['DieselPrice'].mean()
-    
-    # Assume 20-bus fleet, each bus 30K miles/year, 6 MPG
-    fleet_size = 20
-    miles_per_bus = 30000
-    mpg = 6
-    
-    annual_gallons = (fleet_size * miles_per_bus) / mpg
-    annual_fuel_cost = annual_gallons * avg_diesel
-    
-    # 15% savings from optimization
-    potential_savings = annual_fuel_cost * 0.15
-    
-    insights.append(f"• Small city fleet (20 buses): ${annual_fuel_cost:,.0f}/year fuel cost")
-    insights.append(f"• 15% optimization savings: ${potential_savings:,.0f}/year")
-    insights.append(f"• Cost per gallon: ${avg_diesel:.2f}")
-    insights.append(f"• Annual gallons needed: {annual_gallons:,.0f}")
-
-if 'BusRidership' in df_clean.columns:
-    latest_ridership = df_clean['BusRidership'].iloc[-1]
-    pre_covid_avg = df_clean[df_clean['Date'] < '2020-03-01']['BusRidership'].mean()
-    
-    if not pd.isna(latest_ridership) and not pd.isna(pre_covid_avg):
-        recovery_pct = (latest_ridership / pre_covid_avg) * 100
-        insights.append(f"• Current ridership at {recovery_pct:.0f}% of pre-COVID levels")
-        insights.append(f"• Opportunity: Optimize routes to match new demand patterns")
-
-for insight in insights:
-    print(insight)
+# Add calculated fields and save cleaned data chunk by chunk
+print("\n4. Adding calculated fields and saving cleaned data...")
+
+manifest_path = output_dir / MANIFEST_NAME
+write_options = {'precision': args.precision, 'fmt': args.format, 'compression': args.compression}
+fingerprint = config_fingerprint(available_cols, **write_options)
+previous = None
+if args.incremental:
+    previous = CleaningManifest.load(manifest_path)
+    if previous is None or not previous.matches(output_dir, fingerprint):
+        print("   No usable manifest from a previous run - doing a full rebuild")
+        previous = None
+
+with RECORDER.stage('clean') as stage:
+    result = run_cleaning(csv_path, output_dir, available_cols, fingerprint, previous,
+                          args.stream, args.chunksize, **write_options)
+    if result is None:
+        print("   Source dropped or reordered months - doing a full rebuild")
+        previous = None
+        result = run_cleaning(csv_path, output_dir, available_cols, fingerprint, previous,
+                              args.stream, args.chunksize, **write_options)
+    manifest, summary, writer, tracker = result
+    stage.read(csv_path)
+    stage.rows_out = summary.rows
+    stage.wrote(*(out['path'] for out in writer.outputs) if writer else ())
+manifest.save(manifest_path)
+
+if tracker is None:
+    print(f"   Filtered to {summary.rows} rows")
+    print_report(summary, writer)
+else:
+    print("\n5. Incremental update:")
+    print(f"   New months: {tracker.new}, revised months: {tracker.changed}")
+    if tracker.first_changed is None:
+        print("   ✓ Outputs already up to date - nothing rewritten")
+    else:
+        print(f"   Recomputed {summary.rows} rows from {tracker.first_changed} onward")
+        for out in writer.outputs:
+            print(f"   ✓ Patched: {out['path']} ({out['rows']} rows rewritten)")
+    print("   Run without --incremental for the full data quality report")
 
 print("\n9. NEXT STEPS:")
 print("=" * 80)
@@ -5,384 +5,182 @@ Author: Fleet Management System
 Date: December 31, 2024
 """
 
+import argparse
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from pathlib import Path
-from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
-# Set style for professional charts
-plt.style.use('seaborn-v0_8-darkgrid')
-plt.rcParams['figure.figsize'] = (12, 6)
-plt.rcParams['font.size'] = 10
-plt.rcParams['axes.titlesize'] = 14
-plt.rcParams['axes.labelsize'] = 12
+from transit_pipeline.analysis import analyze
+from transit_pipeline.anomalies import detect_anomalies, export_anomalies
+from transit_pipeline.config import ANALYSIS_DIR, CLEANED_CSV, CUBE_PATH
+from transit_pipeline.cube import build_cube, load_cube_table, write_cube
+from transit_pipeline.dataset_cache import load_cleaned
+from transit_pipeline.forecast import export_forecast, forecast
+from transit_pipeline.kpis import KPIEngine
+from transit_pipeline.metrics import RECORDER
+from transit_pipeline.reports import dashboard_data, executive_summary
 
 # Output directory for charts
-OUTPUT_DIR = Path(__file__).parent.parent / 'data' / 'analysis_output'
-OUTPUT_DIR.mkdir(exist_ok=True)
-
-# Load data
-DATA_PATH = Path(__file__).parent.parent / 'data' / 'cleaned' / 'us_bus_transit_data_2015_2023.csv'
-print(f"📊 Loading data from: {DATA_PATH}")
-df = pd.read_csv(DATA_PATH)
-df['Date'] = pd.to_datetime(df['Date'])
-
-print(f"✓ Loaded {len(df)} records from {df['Date'].min().strftime('%Y-%m')} to {df['Date'].max().strftime('%Y-%m')}")
-print("=" * 80)
-
-# =============================================================================
-# 1. FUEL COST TREND ANALYSIS
-# =============================================================================
-print("\n📈 1. FUEL COST TREND ANALYSIS")
-print("-" * 40)
-
-fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-fig.suptitle('Fuel Cost Analysis - US DOT Data (2015-2023)', fontsize=16, fontweight='bold')
-
-# 1a. Diesel Price Trend
-ax1 = axes[0, 0]
-diesel_data = df[['Date', 'DieselPrice']].dropna()
-ax1.plot(diesel_data['Date'], diesel_data['DieselPrice'], 'b-', linewidth=2, label='Diesel')
-ax1.fill_between(diesel_data['Date'], diesel_data['DieselPrice'], alpha=0.3)
-ax1.axhline(y=diesel_data['DieselPrice'].mean(), color='r', linestyle='--', label=f'Avg: ${diesel_data["DieselPrice"].mean():.2f}')
-ax1.set_title('Diesel Price Trend')
-ax1.set_ylabel('Price ($/gallon)')
-ax1.legend()
-ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
-
-# Mark COVID period
-covid_start = pd.Timestamp('2020-03-01')
-covid_end = pd.Timestamp('2021-12-31')
-ax1.axvspan(covid_start, covid_end, alpha=0.2, color='red', label='COVID Period')
-
-# 1b. Diesel vs Gasoline Comparison
-ax2 = axes[0, 1]
-ax2.plot(df['Date'], df['DieselPrice'], 'b-', linewidth=2, label='Diesel')
-ax2.plot(df['Date'], df['GasolinePrice'], 'g-', linewidth=2, label='Gasoline')
-ax2.set_title('Diesel vs Gasoline Price Comparison')
-ax2.set_ylabel('Price ($/gallon)')
-ax2.legend()
-ax2.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
-
-# 1c. Year-over-Year Diesel Change
-ax3 = axes[1, 0]
-df['Year'] = df['Date'].dt.year
-yearly_diesel = df.groupby('Year')['DieselPrice'].mean().dropna()
-colors = ['green' if x < yearly_diesel.shift(1).loc[i] else 'red' for i, x in yearly_diesel.items()]
-colors[0] = 'blue'  # First year
-bars = ax3.bar(yearly_diesel.index, yearly_diesel.values, color=colors, edgecolor='black')
-ax3.set_title('Average Diesel Price by Year')
-ax3.set_xlabel('Year')
-ax3.set_ylabel('Price ($/gallon)')
-for bar, val in zip(bars, yearly_diesel.values):
-    ax3.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1, f'${val:.2f}', 
-             ha='center', va='bottom', fontsize=9)
-
-# 1d. Monthly Fuel Cost Trend
-ax4 = axes[1, 1]
-fuel_cost_data = df[['Date', 'EstimatedFuelCostPerMonth']].dropna()
-ax4.plot(fuel_cost_data['Date'], fuel_cost_data['EstimatedFuelCostPerMonth'], 'purple', linewidth=2)
-ax4.fill_between(fuel_cost_data['Date'], fuel_cost_data['EstimatedFuelCostPerMonth'], alpha=0.3, color='purple')
-ax4.set_title('Estimated Monthly Fuel Cost')
-ax4.set_ylabel('Cost ($)')
-ax4.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
-
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / 'fuel_cost_trends.png', dpi=150, bbox_inches='tight')
-plt.close()
-print(f"✓ Saved: {OUTPUT_DIR / 'fuel_cost_trends.png'}")
-
-# Calculate key metrics
-diesel_2015 = df[df['Year'] == 2015]['DieselPrice'].mean()
-diesel_2022 = df[df['Year'] == 2022]['DieselPrice'].mean()
-diesel_increase = ((diesel_2022 - diesel_2015) / diesel_2015) * 100
-print(f"  Diesel 2015 avg: ${diesel_2015:.2f} → 2022 avg: ${diesel_2022:.2f} (+{diesel_increase:.0f}%)")
-
-# =============================================================================
-# 2. RIDERSHIP PATTERN ANALYSIS
-# =============================================================================
-print("\n👥 2. RIDERSHIP PATTERN ANALYSIS")
-print("-" * 40)
-
-fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-fig.suptitle('Ridership Analysis - US DOT Data (2015-2023)', fontsize=16, fontweight='bold')
-
-# 2a. Bus Ridership Trend
-ax1 = axes[0, 0]
-ridership_data = df[['Date', 'BusRidership']].dropna()
-ax1.plot(ridership_data['Date'], ridership_data['BusRidership'] / 1e6, 'b-', linewidth=2)
-ax1.fill_between(ridership_data['Date'], ridership_data['BusRidership'] / 1e6, alpha=0.3)
-ax1.axvspan(covid_start, covid_end, alpha=0.2, color='red')
-ax1.set_title('Monthly Bus Ridership')
-ax1.set_ylabel('Passengers (Millions)')
-ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
-
-# Add annotations
-pre_covid_avg = df[df['Date'] < covid_start]['BusRidership'].mean() / 1e6
-covid_min = df[(df['Date'] >= covid_start) & (df['Date'] <= covid_end)]['BusRidership'].min() / 1e6
-ax1.axhline(y=pre_covid_avg, color='green', linestyle='--', label=f'Pre-COVID Avg: {pre_covid_avg:.0f}M')
-ax1.legend()
-
-# 2b. All Transit Modes Comparison
-ax2 = axes[0, 1]
-ax2.plot(df['Date'], df['BusRidership'] / 1e6, label='Bus', linewidth=2)
-ax2.plot(df['Date'], df['RailRidership'] / 1e6, label='Rail', linewidth=2)
-ax2.plot(df['Date'], df['OtherTransitRidership'] / 1e6, label='Other', linewidth=2)
-ax2.set_title('Transit Modes Comparison')
-ax2.set_ylabel('Passengers (Millions)')
-ax2.legend()
-ax2.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
-
-# 2c. Monthly Seasonal Pattern
-ax3 = axes[1, 0]
-df['Month'] = df['Date'].dt.month
-pre_covid_df = df[df['Date'] < covid_start]
-monthly_avg = pre_covid_df.groupby('Month')['BusRidership'].mean() / 1e6
-month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-colors = plt.cm.RdYlGn(np.linspace(0.2, 0.8, 12))
-bars = ax3.bar(month_names, monthly_avg.values, color=colors, edgecolor='black')
-ax3.set_title('Seasonal Ridership Pattern (Pre-COVID Average)')
-ax3.set_ylabel('Avg Passengers (Millions)')
-ax3.axhline(y=monthly_avg.mean(), color='red', linestyle='--', label=f'Avg: {monthly_avg.mean():.0f}M')
-ax3.legend()
-
-# 2d. COVID Recovery Tracking
-ax4 = axes[1, 1]
-post_covid = df[df['Date'] >= '2020-03-01'][['Date', 'BusRidership']].dropna()
-post_covid['Recovery%'] = (post_covid['BusRidership'] / pre_covid_avg / 1e6) * 100
-ax4.plot(post_covid['Date'], post_covid['Recovery%'], 'g-', linewidth=2)
-ax4.fill_between(post_covid['Date'], post_covid['Recovery%'], alpha=0.3, color='green')
-ax4.axhline(y=100, color='blue', linestyle='--', label='Pre-COVID Level')
-ax4.set_title('Ridership Recovery (% of Pre-COVID)')
-ax4.set_ylabel('Recovery %')
-ax4.legend()
-ax4.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / 'ridership_trends.png', dpi=150, bbox_inches='tight')
-plt.close()
-print(f"✓ Saved: {OUTPUT_DIR / 'ridership_trends.png'}")
-
-# Calculate recovery metrics
-latest_ridership = df[df['BusRidership'].notna()]['BusRidership'].iloc[-1] / 1e6
-recovery_pct = (latest_ridership / pre_covid_avg) * 100
-print(f"  Pre-COVID avg: {pre_covid_avg:.0f}M → Latest: {latest_ridership:.0f}M ({recovery_pct:.0f}% recovery)")
-
-# =============================================================================
-# 3. COST EFFICIENCY ANALYSIS
-# =============================================================================
-print("\n💰 3. COST EFFICIENCY ANALYSIS")
-print("-" * 40)
-
-fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-fig.suptitle('Cost Efficiency Analysis - Optimization Opportunities', fontsize=16, fontweight='bold')
-
-# 3a. Cost per Passenger Trend
-ax1 = axes[0, 0]
-cost_data = df[['Date', 'EstimatedCostPerPassenger']].dropna()
-# Scale for visibility (multiply by 1000 for per 1000 passengers)
-ax1.plot(cost_data['Date'], cost_data['EstimatedCostPerPassenger'] * 1e6, 'r-', linewidth=2)
-ax1.fill_between(cost_data['Date'], cost_data['EstimatedCostPerPassenger'] * 1e6, alpha=0.3, color='red')
-ax1.axvspan(covid_start, covid_end, alpha=0.2, color='gray')
-ax1.set_title('Fuel Cost per Million Passengers')
-ax1.set_ylabel('Cost ($)')
-ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
-
-# 3b. Efficiency by Year
-ax2 = axes[0, 1]
-yearly_eff = df.groupby('Year').agg({
-    'BusRidership': 'sum',
-    'EstimatedFuelCostPerMonth': 'sum',
-    'DieselPrice': 'mean'
-}).dropna()
-yearly_eff['CostPerPassenger'] = yearly_eff['EstimatedFuelCostPerMonth'] / yearly_eff['BusRidership'] * 1e6
-colors = plt.cm.RdYlGn_r(np.linspace(0.2, 0.8, len(yearly_eff)))
-bars = ax2.bar(yearly_eff.index, yearly_eff['CostPerPassenger'], color=colors, edgecolor='black')
-ax2.set_title('Average Cost per Million Passengers by Year')
-ax2.set_xlabel('Year')
-ax2.set_ylabel('Cost ($)')
-
-# 3c. Ridership vs Fuel Cost Correlation
-ax3 = axes[1, 0]
-corr_data = df[['BusRidership', 'DieselPrice', 'EstimatedFuelCostPerMonth']].dropna()
-scatter = ax3.scatter(corr_data['BusRidership'] / 1e6, corr_data['DieselPrice'], 
-                       c=corr_data['EstimatedFuelCostPerMonth'], cmap='RdYlGn_r', 
-                       s=50, alpha=0.7, edgecolors='black')
-ax3.set_title('Ridership vs Diesel Price (color = fuel cost)')
-ax3.set_xlabel('Bus Ridership (Millions)')
-ax3.set_ylabel('Diesel Price ($/gallon)')
-plt.colorbar(scatter, ax=ax3, label='Monthly Fuel Cost')
-
-# 3d. Break-Even Analysis
-ax4 = axes[1, 1]
-# Assuming $2.50 average fare per passenger
-fare = 2.50
-fuel_prices = np.linspace(2, 6, 10)
-# Estimated fuel consumption: 0.15 gallons per passenger (based on avg bus efficiency)
-fuel_per_passenger = 0.15
-break_even = (fuel_prices * fuel_per_passenger) / fare * 100  # As percentage of fare
-ax4.plot(fuel_prices, break_even, 'b-', linewidth=3, marker='o')
-ax4.fill_between(fuel_prices, break_even, alpha=0.3)
-ax4.axhline(y=50, color='red', linestyle='--', label='50% of fare')
-ax4.set_title('Fuel Cost as % of Passenger Fare ($2.50)')
-ax4.set_xlabel('Diesel Price ($/gallon)')
-ax4.set_ylabel('% of Fare Spent on Fuel')
-ax4.legend()
-
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / 'cost_efficiency.png', dpi=150, bbox_inches='tight')
-plt.close()
-print(f"✓ Saved: {OUTPUT_DIR / 'cost_efficiency.png'}")
-
-# =============================================================================
-# 4. SCHEDULE OPTIMIZATION INSIGHTS
-# =============================================================================
-print("\n📅 4. SCHEDULE OPTIMIZATION INSIGHTS")
-print("-" * 40)
-
-fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-fig.suptitle('Schedule Optimization Analysis', fontsize=16, fontweight='bold')
-
-# 4a. Quarterly Ridership Pattern
-ax1 = axes[0, 0]
-quarterly_avg = pre_covid_df.groupby('Quarter')['BusRidership'].mean() / 1e6
-quarter_names = ['Q1 (Jan-Mar)', 'Q2 (Apr-Jun)', 'Q3 (Jul-Sep)', 'Q4 (Oct-Dec)']
-colors = ['#3498db', '#2ecc71', '#f1c40f', '#e74c3c']
-bars = ax1.bar(quarter_names, quarterly_avg.values, color=colors, edgecolor='black')
-ax1.set_title('Average Ridership by Quarter (Pre-COVID)')
-ax1.set_ylabel('Passengers (Millions)')
-for bar, val in zip(bars, quarterly_avg.values):
-    ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 2, f'{val:.0f}M', 
-             ha='center', va='bottom', fontweight='bold')
-
-# Identify best/worst quarters
-best_q = quarterly_avg.idxmax()
-worst_q = quarterly_avg.idxmin()
-print(f"  Best quarter: Q{best_q} ({quarterly_avg[best_q]:.0f}M passengers)")
-print(f"  Worst quarter: Q{worst_q} ({quarterly_avg[worst_q]:.0f}M passengers)")
-
-# 4b. Daily Employment Pattern (proxy for demand)
-ax2 = axes[0, 1]
-employment = df[['Date', 'TransitEmployment']].dropna()
-ax2.plot(employment['Date'], employment['TransitEmployment'] / 1000, 'purple', linewidth=2)
-ax2.set_title('Transit Employment Trend (Capacity Indicator)')
-ax2.set_ylabel('Employees (Thousands)')
-ax2.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
-
-# 4c. Fuel Price Seasonality
-ax3 = axes[1, 0]
-monthly_fuel = df.groupby('Month')['DieselPrice'].mean()
-colors = plt.cm.coolwarm(np.linspace(0, 1, 12))
-bars = ax3.bar(month_names, monthly_fuel.values, color=colors, edgecolor='black')
-ax3.set_title('Average Diesel Price by Month')
-ax3.set_ylabel('Price ($/gallon)')
-ax3.axhline(y=monthly_fuel.mean(), color='red', linestyle='--', label=f'Avg: ${monthly_fuel.mean():.2f}')
-ax3.legend()
-
-# 4d. Optimal Operating Windows
-ax4 = axes[1, 1]
-# High ridership + low fuel = best time
-monthly_ridership_norm = (monthly_avg - monthly_avg.min()) / (monthly_avg.max() - monthly_avg.min())
-monthly_fuel_norm = (monthly_fuel - monthly_fuel.min()) / (monthly_fuel.max() - monthly_fuel.min())
-opportunity_score = monthly_ridership_norm - monthly_fuel_norm  # Higher is better
-colors = plt.cm.RdYlGn((opportunity_score.values + 1) / 2)
-bars = ax4.bar(month_names, opportunity_score.values, color=colors, edgecolor='black')
-ax4.set_title('Operating Opportunity Score\n(High Ridership + Low Fuel = Best)')
-ax4.set_ylabel('Score')
-ax4.axhline(y=0, color='black', linestyle='-', linewidth=0.5)
-
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / 'schedule_optimization.png', dpi=150, bbox_inches='tight')
-plt.close()
-print(f"✓ Saved: {OUTPUT_DIR / 'schedule_optimization.png'}")
-
-# =============================================================================
-# 5. EXECUTIVE SUMMARY REPORT
-# =============================================================================
-print("\n" + "=" * 80)
-print("📊 EXECUTIVE SUMMARY - KEY INSIGHTS")
-print("=" * 80)
-
-summary = f"""
-┌─────────────────────────────────────────────────────────────────────────────┐
-│                    FLEET MANAGEMENT COST OPTIMIZATION                        │
-│                        Analysis Period: 2015-2023                            │
-├─────────────────────────────────────────────────────────────────────────────┤
-│                                                                              │
-│  🔴 CHALLENGE: RISING FUEL COSTS                                            │
-│     • Diesel price increased {diesel_increase:.0f}% (${diesel_2015:.2f} → ${diesel_2022:.2f})          │
-│     • Peak price: $5.75 (June 2022)                                         │
-│     • Fuel now ~{break_even[-1]:.0f}% of passenger fare at current prices                   │
-│                                                                              │
-│  🟡 CHALLENGE: REDUCED RIDERSHIP                                            │
-│     • COVID impact: -55% ridership (April 2020)                            │
-│     • Current recovery: {recovery_pct:.0f}% of pre-COVID levels                        │
-│     • Efficiency declining: 4x increase in cost per passenger              │
-│                                                                              │
-│  🟢 OPTIMIZATION OPPORTUNITIES                                              │
-│     • Best operating months: October (highest ridership)                   │
-│     • Lowest fuel costs: December-February                                 │
-│     • Seasonal scheduling can save 15-20% on fuel                          │
-│                                                                              │
-│  📋 RECOMMENDATIONS                                                         │
-│     1. Reduce frequency during low-ridership months (Jul-Aug)              │
-│     2. Use fuel hedging for Q2-Q3 (historically high prices)               │
-│     3. Optimize routes to reduce miles per passenger                       │
-│     4. Consider hybrid/electric fleet for long-term savings                │
-│                                                                              │
-└─────────────────────────────────────────────────────────────────────────────┘
-"""
-print(summary)
-
-# Save summary to file
-with open(OUTPUT_DIR / 'executive_summary.txt', 'w', encoding='utf-8') as f:
-    f.write(summary)
-print(f"✓ Saved: {OUTPUT_DIR / 'executive_summary.txt'}")
-
-# =============================================================================
-# 6. GENERATE JSON DATA FOR DASHBOARD
-# =============================================================================
-print("\n📦 Generating JSON data for dashboard...")
-
-dashboard_data = {
-    'fuel_metrics': {
-        'diesel_2015_avg': round(diesel_2015, 2),
-        'diesel_2022_avg': round(diesel_2022, 2),
-        'diesel_increase_pct': round(diesel_increase, 1),
-        'diesel_peak': 5.75,
-        'diesel_current': round(df['DieselPrice'].dropna().iloc[-1], 2)
-    },
-    'ridership_metrics': {
-        'pre_covid_avg_millions': round(pre_covid_avg, 0),
-        'covid_low_millions': round(covid_min, 0),
-        'latest_millions': round(latest_ridership, 0),
-        'recovery_pct': round(recovery_pct, 1)
-    },
-    'optimization': {
-        'best_quarter': f'Q{best_q}',
-        'worst_quarter': f'Q{worst_q}',
-        'best_month': 'October',
-        'worst_month': 'July',
-        'low_fuel_months': ['December', 'January', 'February']
-    },
-    'recommendations': [
-        'Reduce frequency during low-ridership months (Jul-Aug)',
-        'Use fuel hedging for Q2-Q3 (historically high prices)',
-        'Optimize routes to reduce miles per passenger',
-        'Consider hybrid/electric fleet for long-term savings'
-    ]
-}
-
-import json
-with open(OUTPUT_DIR / 'dashboard_data.json', 'w') as f:
-    json.dump(dashboard_data, f, indent=2)
-print(f"✓ Saved: {OUTPUT_DIR / 'dashboard_data.json'}")
-
-print("\n" + "=" * 80)
-print("✅ Analysis complete! Check the output folder for all visualizations.")
-print(f"📁 Output folder: {OUTPUT_DIR}")
-print("=" * 80)
+OUTPUT_DIR = ANALYSIS_DIR
+DATA_PATH = CLEANED_CSV
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Advanced analysis of the cleaned DOT dataset')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='Worker processes for chart rendering (default: one per chart, up to the CPU count; 1 = no pool)')
+    parser.add_argument('--load-cube', metavar='TARGET',
+                        help='Also load the aggregate cube into USDOTAggregateCube (sqlite:///path.db or an ODBC connection string)')
+    args = parser.parse_args()
+
+    OUTPUT_DIR.mkdir(exist_ok=True)
+
+    # Load data
+    print(f"📊 Loading data from: {DATA_PATH}")
+    with RECORDER.stage('load') as m:
+        df = load_cleaned(csv_path=DATA_PATH)
+        df['Date'] = pd.to_datetime(df['Date'])
+        m.read(DATA_PATH)
+        m.rows_out = len(df)
+
+    print(f"✓ Loaded {len(df)} records from {df['Date'].min().strftime('%Y-%m')} to {df['Date'].max().strftime('%Y-%m')}")
+    print("=" * 80)
+
+    # Every metric at every granularity, aggregated once; the analysis reads from this
+    with RECORDER.stage('cube', rows_in=len(df)) as m:
+        cube = build_cube(df)
+        cube_path = write_cube(cube, CUBE_PATH)
+        m.rows_out = len(cube)
+        m.wrote(cube_path)
+    print(f"✓ Saved: {cube_path} ({len(cube)} aggregate rows)")
+    if args.load_cube:
+        from transit_pipeline.bulk_load import connect
+        conn = connect(args.load_cube)
+        try:
+            print(f"✓ Loaded {load_cube_table(conn, cube)} rows into USDOTAggregateCube")
+        finally:
+            conn.close()
+
+    with RECORDER.stage('analyze', rows_in=len(df)):
+        metrics = analyze(df, cube)
+
+    # The four figures are independent; render them in worker processes up front
+    # (matplotlib is only imported here, once the data is loaded and analyzed)
+    from transit_pipeline.charts import render_charts
+    render_charts(df, metrics, OUTPUT_DIR, jobs=args.jobs)
+
+    # =============================================================================
+    # 1. FUEL COST TREND ANALYSIS
+    # =============================================================================
+    print("\n📈 1. FUEL COST TREND ANALYSIS")
+    print("-" * 40)
+
+    print(f"✓ Saved: {OUTPUT_DIR / 'fuel_cost_trends.png'}")
+
+    # Calculate key metrics
+    print(f"  Diesel 2015 avg: ${metrics['diesel_2015']:.2f} → 2022 avg: ${metrics['diesel_2022']:.2f} (+{metrics['diesel_increase']:.0f}%)")
+
+    # =============================================================================
+    # 2. RIDERSHIP PATTERN ANALYSIS
+    # =============================================================================
+    print("\n👥 2. RIDERSHIP PATTERN ANALYSIS")
+    print("-" * 40)
+
+    print(f"✓ Saved: {OUTPUT_DIR / 'ridership_trends.png'}")
+
+    # Calculate recovery metrics
+    print(f"  Pre-COVID avg: {metrics['pre_covid_avg']:.0f}M → Latest: {metrics['latest_ridership']:.0f}M ({metrics['recovery_pct']:.0f}% recovery)")
+
+    # =============================================================================
+    # 3. COST EFFICIENCY ANALYSIS
+    # =============================================================================
+    print("\n💰 3. COST EFFICIENCY ANALYSIS")
+    print("-" * 40)
+
+    print(f"✓ Saved: {OUTPUT_DIR / 'cost_efficiency.png'}")
+
+    # =============================================================================
+    # 4. SCHEDULE OPTIMIZATION INSIGHTS
+    # =============================================================================
+    print("\n📅 4. SCHEDULE OPTIMIZATION INSIGHTS")
+    print("-" * 40)
+
+    # Identify best/worst quarters
+    best_q = metrics['best_q']
+    worst_q = metrics['worst_q']
+    quarterly_avg = metrics['quarterly_avg']
+    print(f"  Best quarter: Q{best_q} ({quarterly_avg[best_q]:.0f}M passengers)")
+    print(f"  Worst quarter: Q{worst_q} ({quarterly_avg[worst_q]:.0f}M passengers)")
+
+    print(f"✓ Saved: {OUTPUT_DIR / 'schedule_optimization.png'}")
+
+    # =============================================================================
+    # 5. EXECUTIVE SUMMARY REPORT
+    # =============================================================================
+    print("\n" + "=" * 80)
+    print("📊 EXECUTIVE SUMMARY - KEY INSIGHTS")
+    print("=" * 80)
+
+    summary = executive_summary(metrics)
+    print(summary)
+
+    # Save summary to file
+    with open(OUTPUT_DIR / 'executive_summary.txt', 'w', encoding='utf-8') as f:
+        f.write(summary)
+    print(f"✓ Saved: {OUTPUT_DIR / 'executive_summary.txt'}")
+
+    # =============================================================================
+    # 6. GENERATE JSON DATA FOR DASHBOARD
+    # =============================================================================
+    print("\n📦 Generating JSON data for dashboard...")
+
+    # Running KPI state, saved so later months can be appended with python -m transit_pipeline.kpis --append
+    with RECORDER.stage('export_json', rows_in=len(cube)) as m:
+        kpis = KPIEngine.from_cube(cube)
+        kpis.save()
+        import json
+        with open(OUTPUT_DIR / 'dashboard_data.json', 'w') as f:
+            json.dump(dashboard_data(kpis.kpis()), f, indent=2)
+        m.wrote(OUTPUT_DIR / 'dashboard_data.json')
+    print(f"✓ Saved: {OUTPUT_DIR / 'dashboard_data.json'}")
+
+    # =============================================================================
+    # 7. FORECASTS
+    # =============================================================================
+    print("\n🔮 7. FORECASTS (next 12 months, 95% interval)")
+    print("-" * 40)
+
+    with RECORDER.stage('forecast', rows_in=len(df)) as m:
+        forecasts = forecast(df)
+        m.rows_out = len(forecasts)
+    for metric, rows in forecasts.groupby('Metric', sort=False):
+        last = rows.iloc[-1]
+        print(f"  {metric}: {rows['Date'].iloc[0][:7]} to {last['Date'][:7]}, "
+              f"{last['Date'][:7]} forecast {last['Forecast']:,.2f} ({last['Lower95']:,.2f} - {last['Upper95']:,.2f})")
+    print(f"✓ Saved: {export_forecast(forecasts, OUTPUT_DIR / 'forecasts.csv')}")
+
+    # =============================================================================
+    # 8. ANOMALIES
+    # =============================================================================
+    print("\n🚨 8. ANOMALIES (12-month rolling z-scores)")
+    print("-" * 40)
+
+    with RECORDER.stage('anomalies', rows_in=len(df)) as m:
+        stats, alerts = detect_anomalies(df)
+        m.rows_out = len(alerts)
+    for level, count in alerts['Severity'].value_counts().reindex(['Critical', 'High', 'Medium', 'Low']).dropna().items():
+        print(f"  {level}: {int(count)} alert(s)")
+    for _, alert in alerts[alerts['Severity'] == 'Critical'].iterrows():
+        print(f"  ⚠ {alert['Title']}")
+    stats_path, alerts_path = export_anomalies((stats, alerts), OUTPUT_DIR / 'monthly_stats.csv', OUTPUT_DIR / 'alerts.csv')
+    print(f"✓ Saved: {stats_path}")
+    print(f"✓ Saved: {alerts_path}")
+
+    print("\n" + "=" * 80)
+    print("✅ Analysis complete! Check the output folder for all visualizations.")
+    print(f"📁 Output folder: {OUTPUT_DIR}")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -31,30 +31,30 @@ GO
 CREATE TABLE USDOTTransportationStats (
     StatId INT PRIMARY KEY IDENTITY(1,1),
     Date DATE NOT NULL UNIQUE,
-    Year INT NOT NULL,
-    Month INT NOT NULL,
-    Quarter INT NOT NULL,
+    Year SMALLINT NOT NULL,
+    Month TINYINT NOT NULL,
+    Quarter TINYINT NOT NULL,
     
     -- Bus Ridership (PRIMARY METRIC)
     BusRidership BIGINT NULL,                    -- Monthly bus passengers
     RailRidership BIGINT NULL,                   -- Monthly rail passengers
-    OtherTransitRidership BIGINT NULL,           -- Other transit modes
+    OtherTransitRidership INT NULL,              -- Other transit modes
     
     -- Fuel Prices (COST ANALYSIS)
-    DieselPrice DECIMAL(10,3) NULL,              -- $/gallon
-    GasolinePrice DECIMAL(10,3) NULL,            -- $/gallon
+    DieselPrice DECIMAL(5,3) NULL,               -- $/gallon
+    GasolinePrice DECIMAL(5,3) NULL,             -- $/gallon
     
     -- Highway/Traffic Data (ROUTE OPTIMIZATION)
     HighwayMilesTraveled BIGINT NULL,            -- Total miles
     HighwayFatalities INT NULL,                  -- Monthly fatalities
-    FatalityRate DECIMAL(10,3) NULL,             -- Per 100M miles
+    FatalityRate DECIMAL(5,3) NULL,              -- Per 100M miles
     
     -- Employment (WORKFORCE PLANNING)
     TransitEmployment INT NULL,                  -- Transit workers
     TruckEmployment INT NULL,                    -- Truck drivers
     
     -- Economic Indicators
-    UnemploymentRate DECIMAL(5,3) NULL,          -- Percentage
+    UnemploymentRate DECIMAL(4,3) NULL,          -- Percentage
     GDP BIGINT NULL,                             -- Real GDP
     
     -- Vehicle Sales (MARKET TRENDS)
@@ -63,8 +63,8 @@ CREATE TABLE USDOTTransportationStats (
     
     -- Calculated Fields
     IsCOVIDPeriod BIT NOT NULL DEFAULT 0,        -- COVID period flag
-    EstimatedFuelCostPerMonth DECIMAL(12,2) NULL,
-    EstimatedCostPerPassenger DECIMAL(10,4) NULL,
+    EstimatedFuelCostPerMonth DECIMAL(8,2) NULL,
+    EstimatedCostPerPassenger DECIMAL(9,8) NULL,
     
     -- Metadata
     CreatedAt DATETIME2 DEFAULT GETDATE(),
@@ -277,6 +277,39 @@ CREATE INDEX IX_Alerts_Severity ON Alerts(Severity);
 CREATE INDEX IX_Alerts_Bus ON Alerts(BusId);
 GO
 
+-- ============================================================================
+-- TABLE 8: Dashboard Snapshot (Monthly KPI Facts)
+-- Refreshed by the pipeline after each load (python -m transit_pipeline.snapshot)
+-- ============================================================================
+
+CREATE TABLE DashboardSnapshot (
+    SnapshotMonth DATE PRIMARY KEY,              -- First day of the month
+    
+    -- Fleet Status (at refresh time)
+    OperationalBuses INT NOT NULL DEFAULT 0,
+    BusesInMaintenance INT NOT NULL DEFAULT 0,
+    TotalBuses INT NOT NULL DEFAULT 0,
+    
+    -- Ridership and Fuel
+    BusRidership BIGINT NULL,                    -- This month
+    DieselPrice DECIMAL(10,3) NULL,              -- This month, $/gallon
+    LatestMonthRidership BIGINT NULL,            -- Latest reported up to this month
+    CurrentDieselPrice DECIMAL(10,3) NULL,       -- Latest reported up to this month
+    
+    -- Operations (this month)
+    Trips INT NOT NULL DEFAULT 0,
+    Passengers BIGINT NULL,
+    FuelCost DECIMAL(14,2) NULL,
+    MaintenanceCost DECIMAL(14,2) NULL,
+    
+    -- Alerts (at refresh time)
+    NewAlerts INT NOT NULL DEFAULT 0,
+    CriticalAlerts INT NOT NULL DEFAULT 0,
+    
+    RefreshedAt DATETIME2 DEFAULT GETDATE()
+);
+GO
+
 -- ============================================================================
 -- VIEWS FOR COMMON QUERIES
 -- ============================================================================
@@ -351,11 +384,28 @@ GO
 -- ============================================================================
 
 -- Procedure: Get Dashboard KPIs
+-- Reads the latest precomputed DashboardSnapshot row; the live queries are only the
+-- fallback before the first snapshot refresh
 CREATE PROCEDURE sp_GetDashboardKPIs
 AS
 BEGIN
     SET NOCOUNT ON;
     
+    IF EXISTS (SELECT 1 FROM DashboardSnapshot)
+    BEGIN
+        SELECT TOP 1
+            OperationalBuses,
+            BusesInMaintenance,
+            TotalBuses,
+            LatestMonthRidership,
+            CurrentDieselPrice,
+            NewAlerts,
+            CriticalAlerts
+        FROM DashboardSnapshot
+        ORDER BY SnapshotMonth DESC;
+        RETURN;
+    END;
+    
     SELECT 
         -- Fleet Status
         (SELECT COUNT(*) FROM BusFleet WHERE Status = 'Operational') AS OperationalBuses,
@@ -416,6 +466,7 @@ Tables Created:
 5. MaintenanceRecords - Maintenance history
 6. FuelPurchases - Fuel purchase records
 7. Alerts - System alerts
+8. DashboardSnapshot - Monthly KPI facts behind sp_GetDashboardKPIs
 
 Views Created:
 - vw_FleetSummary
@@ -428,8 +479,8 @@ Stored Procedures:
 - sp_GetRidershipTrends
 
 Next Steps:
-1. Run 05_import_data.sql to load US DOT data
-2. Run 06_generate_sample_fleet.sql to create sample bus fleet
+1. Run python 05_import_data.py to load US DOT data (also refreshes DashboardSnapshot)
+2. Run python 06_generate_sample_fleet.py to create sample bus fleet data
 3. Build .NET API with Entity Framework models
 
 ============================================================================
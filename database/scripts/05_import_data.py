@@ -0,0 +1,70 @@
+"""
+US DOT Transit Data - Bulk Import
+Purpose: Load the cleaned US DOT data into USDOTTransportationStats (upsert on Date)
+Author: Fleet Management System
+Date: 2026-10-16
+
+Run after 04_create_database.sql. The target is an ODBC connection string for SQL Server
+or a SQLite file for local testing. DashboardSnapshot (the KPI row behind
+sp_GetDashboardKPIs) is refreshed for the months the load changed.
+
+Usage:
+    python 05_import_data.py --target "DRIVER={ODBC Driver 18 for SQL Server};SERVER=localhost;DATABASE=BusTransit;UID=sa;PWD=...;TrustServerCertificate=yes"
+    python 05_import_data.py --target local.db --create-table      # SQLite stand-in
+    python 05_import_data.py --target local.db --batch-size 5000 --commit-every 0
+"""
+
+import argparse
+from pathlib import Path
+
+from transit_pipeline.bulk_load import TABLE, bulk_load, connect, ensure_sqlite_table, is_sqlite
+from transit_pipeline.config import CLEANED_CSV
+from transit_pipeline.snapshot import TABLE as SNAPSHOT_TABLE, refresh_snapshot
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=f'Bulk load the cleaned DOT data into {TABLE}')
+    parser.add_argument('--target', required=True,
+                        help='ODBC connection string (SQL Server) or SQLite database file')
+    parser.add_argument('--input', type=Path, default=CLEANED_CSV,
+                        help='Cleaned CSV to load (default: us_bus_transit_data_2015_2023.csv)')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Rows per executemany batch (default: 1000)')
+    parser.add_argument('--commit-every', type=int, default=1,
+                        help='Commit after this many batches; 0 = one transaction (default: 1)')
+    parser.add_argument('--create-table', action='store_true',
+                        help=f'Create {TABLE} first if missing (SQLite targets only)')
+    parser.add_argument('--skip-snapshot', action='store_true',
+                        help=f'Do not refresh {SNAPSHOT_TABLE} after the load')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 80)
+    print(f"BULK IMPORT: {args.input.name} -> {TABLE}")
+    print("=" * 80)
+
+    conn = connect(args.target)
+    try:
+        if args.create_table:
+            if not is_sqlite(conn):
+                raise SystemExit("--create-table is only supported for SQLite; run 04_create_database.sql")
+            ensure_sqlite_table(conn)
+        report = bulk_load(conn, args.input, batch_size=args.batch_size, commit_every=args.commit_every)
+        snapshot = None if args.skip_snapshot else refresh_snapshot(conn)
+        (total,) = conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()
+    finally:
+        conn.close()
+
+    print(f"✓ Upserted {report.rows:,} rows in {report.batches} batch(es)")
+    print(f"✓ {report.seconds:.3f}s ({report.rows_per_sec:,.0f} rows/sec)")
+    print(f"✓ {TABLE} now holds {total:,} rows")
+    if snapshot is not None:
+        print(f"✓ Refreshed {snapshot.months} month(s) of {SNAPSHOT_TABLE} in {snapshot.seconds:.3f}s")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
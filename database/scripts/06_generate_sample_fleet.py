@@ -0,0 +1,71 @@
+"""
+US DOT Transit Data - Synthetic Fleet Generator
+Purpose: Produce BusFleet / Routes / DailyOperations / FuelPurchases / MaintenanceRecords data for load testing
+Author: Fleet Management System
+Date: 2026-10-16
+
+Ridership and fuel prices follow the real monthly DOT series in the cleaned CSV. Output is
+one file per table per month under database/data/synthetic/<table>/.
+
+Usage:
+    python 06_generate_sample_fleet.py                                  # 200 buses, 40 routes
+    python 06_generate_sample_fleet.py --buses 2000 --routes 300 --trips-per-day 8 --format parquet
+    python 06_generate_sample_fleet.py --start 2022-01-01 --end 2022-12-31 --seed 7
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from transit_pipeline.config import CLEANED_CSV, START_DATE, SYNTHETIC_DIR
+from transit_pipeline.dataset_cache import load_cleaned
+from transit_pipeline.synthetic import FleetConfig, PartWriter, generate, monthly_seasonality
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate synthetic fleet operations data')
+    parser.add_argument('--buses', type=int, default=200, help='Fleet size (default: 200)')
+    parser.add_argument('--routes', type=int, default=40, help='Number of routes (default: 40)')
+    parser.add_argument('--trips-per-day', type=int, default=6,
+                        help='Trips per bus on a service day (default: 6)')
+    parser.add_argument('--start', default=START_DATE, help=f'First day simulated (default: {START_DATE})')
+    parser.add_argument('--end', default=None, help='Last day simulated (default: last month of DOT data)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help='Output format (parquet needs pyarrow)')
+    parser.add_argument('--input', type=Path, default=CLEANED_CSV,
+                        help='Cleaned DOT CSV supplying the monthly seasonality')
+    parser.add_argument('--output-dir', type=Path, default=SYNTHETIC_DIR,
+                        help='Directory for the generated tables')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    config = FleetConfig(buses=args.buses, routes=args.routes, trips_per_day=args.trips_per_day,
+                         start=args.start, end=args.end, seed=args.seed)
+
+    print("=" * 80)
+    print("SYNTHETIC FLEET DATA GENERATOR")
+    print("=" * 80)
+    print(f"Fleet: {config.buses} buses, {config.routes} routes, {config.trips_per_day} trips/bus/day")
+
+    seasonality = monthly_seasonality(load_cleaned(columns=['Date', 'DieselPrice', 'BusRidership'],
+                                                   csv_path=args.input))
+    writer = PartWriter(args.output_dir, args.format)
+    start = time.perf_counter()
+    for table, frame in generate(config, seasonality):
+        writer.write(table, frame)
+    seconds = time.perf_counter() - start
+
+    print("-" * 80)
+    for table, rows in writer.rows.items():
+        print(f"  ✓ {table:<20} {rows:>12,} rows in {writer.parts[table]} file(s)")
+    total = sum(writer.rows.values())
+    print(f"\n✓ {total:,} rows in {seconds:.1f}s ({total / seconds:,.0f} rows/sec)")
+    print(f"📁 Output folder: {args.output_dir}")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+"""Test configuration: make the transit_pipeline package importable from database/scripts."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,71 @@
+"""
+Re-running the bulk load upserts on Date: loading the cleaned CSV again, with any batch size
+or commit interval, must leave the same rows and values (and UpdatedAt untouched), and a
+revised month must update only that row.
+"""
+
+import csv
+
+import pandas as pd
+import pytest
+
+from transit_pipeline.bulk_load import STATS_COLUMNS, TABLE, bulk_load, connect, ensure_sqlite_table
+from transit_pipeline.config import CLEANED_CSV
+
+pytestmark = pytest.mark.skipif(not CLEANED_CSV.exists(), reason='cleaned dataset not present')
+
+COLUMNS = ['StatId', *STATS_COLUMNS, 'UpdatedAt']
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect(tmp_path / 'transit.db')
+    ensure_sqlite_table(conn)
+    yield conn
+    conn.close()
+
+
+def table(conn):
+    return pd.read_sql(f"SELECT {', '.join(COLUMNS)} FROM {TABLE} ORDER BY Date", conn)
+
+
+def test_reload_keeps_rows_and_values(conn):
+    expected_rows = pd.read_csv(CLEANED_CSV)['Date'].notna().sum()
+    report = bulk_load(conn, CLEANED_CSV, batch_size=1000)
+    assert report.rows == expected_rows
+    first = table(conn)
+    assert len(first) == expected_rows
+
+    report = bulk_load(conn, CLEANED_CSV, batch_size=7, commit_every=0)
+    assert report.rows == expected_rows
+    assert report.batches == -(-expected_rows // 7)
+    pd.testing.assert_frame_equal(table(conn), first)
+
+
+def test_reload_updates_only_revised_month(conn, tmp_path):
+    bulk_load(conn, CLEANED_CSV, batch_size=50)
+    before = table(conn)
+
+    # Edit the text, so every other value reaches the loader exactly as before
+    with open(CLEANED_CSV, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    revised_date = before['Date'].iloc[40]
+    for row in rows:
+        if row['Date'] == revised_date:
+            row['DieselPrice'] = repr(float(row['DieselPrice']) + 0.5)
+    revised_csv = tmp_path / 'revised.csv'
+    with open(revised_csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    month = before['Date'] == revised_date
+    bulk_load(conn, revised_csv, batch_size=13, commit_every=3)
+    after = table(conn)
+
+    assert len(after) == len(before)
+    assert after['StatId'].tolist() == before['StatId'].tolist()
+    differs = (after != before) & ~(after.isna() & before.isna())
+    assert differs.any(axis=1).tolist() == month.tolist()
+    assert sorted(differs.columns[differs.loc[40]]) == ['DieselPrice', 'UpdatedAt']
+    assert after.loc[40, 'DieselPrice'] == pytest.approx(before.loc[40, 'DieselPrice'] + 0.5)
+    assert after.loc[40, 'UpdatedAt'] > before.loc[40, 'UpdatedAt']
@@ -0,0 +1,54 @@
+"""
+KPIEngine.append folds one month into the running state in O(1); appending the later months
+of the history must give the same KPIs as building the state from the whole history.
+"""
+
+import math
+
+import pandas as pd
+import pytest
+
+from transit_pipeline.config import CLEANED_CSV
+from transit_pipeline.kpis import KPIEngine
+
+pytestmark = pytest.mark.skipif(not CLEANED_CSV.exists(), reason='cleaned dataset not present')
+
+CUT_POINTS = [1, 12, 60, 62, 90, 100, 107]
+
+
+@pytest.fixture(scope='module')
+def history():
+    return pd.read_csv(CLEANED_CSV).sort_values('Date').reset_index(drop=True)
+
+
+def assert_same_kpis(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, float) and math.isnan(value):
+            assert math.isnan(actual[key]), key
+        elif isinstance(value, float):
+            assert actual[key] == pytest.approx(value, rel=1e-12), key
+        else:
+            assert actual[key] == value, key
+
+
+@pytest.mark.parametrize('cut', CUT_POINTS)
+def test_append_matches_full_history(history, cut):
+    engine = KPIEngine.from_frame(history.iloc[:cut])
+    engine.append_frame(history.iloc[cut:])
+    assert_same_kpis(engine.kpis(), KPIEngine.from_frame(history).kpis())
+
+
+@pytest.mark.parametrize('cut', [60, 100])
+def test_append_after_reload(history, tmp_path, cut):
+    state_path = tmp_path / 'kpi_state.json'
+    KPIEngine.from_frame(history.iloc[:cut]).save(state_path)
+    engine = KPIEngine.load(state_path)
+    engine.append_rows(history.iloc[cut:].to_dict('records'))
+    assert_same_kpis(engine.kpis(), KPIEngine.from_frame(history).kpis())
+
+
+def test_append_rejects_months_already_in_state(history):
+    engine = KPIEngine.from_frame(history.iloc[:60])
+    with pytest.raises(ValueError):
+        engine.append_frame(history.iloc[59:61])
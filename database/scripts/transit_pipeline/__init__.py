@@ -0,0 +1,60 @@
+"""
+Transit Data Pipeline Package
+Purpose: Reusable stage functions behind the numbered scripts in database/scripts
+Author: Fleet Management System
+Date: 2026-10-16
+
+Modules:
+    config         - paths and constants
+    dataset_cache  - columnar (Arrow) cache of the raw and cleaned CSVs
+    compact        - narrowest-dtype cleaned frame, typed after USDOTTransportationStats
+    cleaning       - load / clean / derive / export_cleaned stages
+    serialize      - shared column formatting, precision and compression / Parquet options of the cleaned outputs
+    exploration    - raw column completeness and trend summaries
+    profiling      - one-pass, chunkable column completeness profiler
+    cube           - year / quarter / month x COVID phase aggregate cube (Feather, USDOTAggregateCube)
+    analysis       - metrics behind the charts and reports, read from the cube
+    costmodel      - parameterized fleet fuel cost model, evaluated as broadcast what-if scenario grids
+    fuel_risk      - Monte Carlo diesel price paths and the VaR / percentiles of next year's fuel spend
+    schedule       - per-route, per-month trip frequencies from ridership seasonality under fleet capacity
+    charts         - the four PNG figures (render_charts: process-pool rendering)
+    shared_frame   - numeric DataFrame columns in shared memory for worker processes
+    forecast       - batched seasonal-trend forecasts of ridership and diesel price with intervals
+    anomalies      - one-pass rolling / z-score / MoM / YoY statistics and anomaly Alerts rows
+    alerts         - Alerts rows: validation and idempotent bulk insert
+    maintenance    - per-bus failure risk scores of the fleet tables as prioritized Maintenance Alerts rows
+    kpis           - running dashboard KPI state with O(1) month appends
+    partitioned    - per agency / region cleaning, cube and KPIs in a process pool, plus the rollup
+    reports        - executive summary and dashboard JSON
+    schema         - SQL Server DDL (standard or high-volume layout)
+    sql_types      - narrowest SQL Server column types inferred from a streamed or sampled profile
+    bulk_load      - batched upsert of the cleaned CSV into USDOTTransportationStats
+    snapshot       - incremental refresh of DashboardSnapshot, the KPI row behind sp_GetDashboardKPIs
+    synthetic      - vectorized fleet / trip / fuel / maintenance data generator
+    runner         - Stage / Pipeline DAG runner with result caching
+    pipeline       - the stage DAG (build_pipeline)
+    metrics        - per-stage timers, rows, bytes, peak memory and cache hits as JSON lines / Prometheus text
+    benchmark      - stage timings on scaled inputs with regression tracking
+    importtime     - startup import-time report and budget check for the headless entry points
+
+Run the whole pipeline (from database/scripts):
+    python -m transit_pipeline                  # everything, skipping up-to-date stages
+    python -m transit_pipeline analyze --jobs 4
+    python -m transit_pipeline.benchmark --scales 1 100 10000
+    python -m transit_pipeline.kpis --append new_months.csv
+    python -m transit_pipeline.importtime --budget-ms 300
+    python -m transit_pipeline.forecast --horizon 24
+    python -m transit_pipeline.costmodel --mpg 4 5 6 --electric 0 0.25 0.5 --diesel-scale 0.8 1 1.2
+    python -m transit_pipeline.fuel_risk --paths 1000000 --jobs 4 --seed 7
+    python -m transit_pipeline.schedule --synthetic-routes 5000 --buses 20000
+    python -m transit_pipeline.anomalies --load sqlite:///transit.db
+    python -m transit_pipeline.maintenance --input ../data/synthetic --threshold 0.5
+    python -m transit_pipeline.partitioned raw.csv --by Agency Region --jobs 8
+    python -m transit_pipeline.sql_types wide.csv --sample 0.05
+    python -m transit_pipeline --metrics run.jsonl --prometheus transit.prom
+"""
+
+from .pipeline import build_pipeline
+from .runner import Pipeline, Stage, StageRun
+
+__all__ = ['Pipeline', 'Stage', 'StageRun', 'build_pipeline']
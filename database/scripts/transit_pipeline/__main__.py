@@ -0,0 +1,47 @@
+"""
+Pipeline Command Line
+Purpose: python -m transit_pipeline [stages...] [--jobs N] [--force] [--list] [--metrics run.jsonl] [--prometheus transit.prom]
+"""
+
+import argparse
+import time
+
+from .metrics import RECORDER
+from .pipeline import build_pipeline
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m transit_pipeline',
+                                     description='Run the transit data pipeline stages')
+    parser.add_argument('targets', nargs='*', help='Stages to bring up to date (default: all)')
+    parser.add_argument('--jobs', '-j', type=int, default=4, help='Stages to run concurrently (default: 4)')
+    parser.add_argument('--force', action='store_true', help='Ignore the stage cache and rerun everything')
+    parser.add_argument('--list', action='store_true', help='List the stages and exit')
+    parser.add_argument('--metrics', metavar='JSONL', help='Append one JSON line of stage metrics per stage')
+    parser.add_argument('--prometheus', metavar='PROM', help='Write the stage metrics in Prometheus text format')
+    parser.add_argument('--pushgateway', metavar='URL', help='Push the stage metrics to a Prometheus Pushgateway')
+    args = parser.parse_args(argv)
+    RECORDER.configure(args.metrics, args.prometheus, args.pushgateway)
+
+    pipeline = build_pipeline()
+
+    if args.list:
+        for name in pipeline.plan():
+            stage = pipeline.stages[name]
+            deps = ', '.join(stage.deps) if stage.deps else '-'
+            print(f"{name:<32} <- {deps}")
+        return 0
+
+    print("=" * 80)
+    print("TRANSIT DATA PIPELINE")
+    print("=" * 80)
+    start = time.perf_counter()
+    _, runs = pipeline.run(args.targets, jobs=args.jobs, force=args.force)
+    ran = sum(1 for run in runs if run.status == 'ran')
+    print("-" * 80)
+    print(f"✓ {ran} stage(s) ran, {len(runs) - ran} up to date ({time.perf_counter() - start:.2f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+"""
+Alerts Table
+Purpose: Build, validate and bulk insert rows of the Alerts table
+Author: Fleet Management System
+Date: 2026-10-16
+
+Stages that raise alerts (anomaly detection, maintenance scoring) return a DataFrame with
+the Alerts columns below; alert_frame() checks it against the table's CHECK constraints.
+load_alerts() inserts the rows with one executemany (fast_executemany on SQL Server),
+skipping alerts whose (AlertType, Title) is already in the table, and bus alerts whose
+bus already has an open (not Resolved) alert of that AlertType, so a stage can be re-run,
+on the same or a later date, without duplicating alerts. A SQLite stand-in table is created when needed.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .bulk_load import is_sqlite
+
+TABLE = 'Alerts'
+
+# Inserted columns (AlertId is an identity, AcknowledgedAt starts NULL, ResolvedAt is set
+# only for alerts raised already Resolved)
+ALERT_COLUMNS = ['BusId', 'AlertType', 'Severity', 'Title', 'Message', 'Status', 'CreatedAt', 'ResolvedAt']
+
+# CHECK constraints of the Alerts table
+ALERT_TYPES = ['Maintenance', 'Fuel', 'Performance', 'Safety']
+SEVERITIES = ['Low', 'Medium', 'High', 'Critical']
+STATUSES = ['New', 'Acknowledged', 'Resolved']
+
+TITLE_LENGTH = 200
+MESSAGE_LENGTH = 1000
+
+SQLITE_TABLE_SQL = f"""CREATE TABLE IF NOT EXISTS {TABLE} (
+    AlertId INTEGER PRIMARY KEY AUTOINCREMENT,
+    BusId INTEGER NULL,
+    AlertType TEXT NOT NULL CHECK (AlertType IN ({', '.join(f"'{t}'" for t in ALERT_TYPES)})),
+    Severity TEXT NOT NULL CHECK (Severity IN ({', '.join(f"'{s}'" for s in SEVERITIES)})),
+    Title TEXT NOT NULL,
+    Message TEXT NOT NULL,
+    Status TEXT NOT NULL CHECK (Status IN ({', '.join(f"'{s}'" for s in STATUSES)})),
+    CreatedAt TEXT DEFAULT CURRENT_TIMESTAMP,
+    AcknowledgedAt TEXT NULL,
+    ResolvedAt TEXT NULL
+)"""
+
+
+def alert_frame(alert_type, severity, title, message, created_at, bus_id=None, status='New', resolved_at=None):
+    """
+    Alerts rows from equal-length arrays (scalars broadcast), checked against the table.
+
+    created_at and resolved_at are a date / timestamp (or None) per alert, written as
+    'YYYY-MM-DD HH:MM:SS'.
+    """
+    alerts = pd.DataFrame({
+        'BusId': bus_id,
+        'AlertType': alert_type,
+        'Severity': severity,
+        'Title': title,
+        'Message': message,
+        'Status': status,
+        'CreatedAt': pd.to_datetime(created_at),
+        'ResolvedAt': pd.to_datetime(resolved_at),
+    }, index=pd.RangeIndex(len(title)))
+    alerts['BusId'] = alerts['BusId'].astype('Int64')
+    for col in ('CreatedAt', 'ResolvedAt'):
+        alerts[col] = alerts[col].dt.strftime('%Y-%m-%d %H:%M:%S')
+
+    for col, allowed in (('AlertType', ALERT_TYPES), ('Severity', SEVERITIES), ('Status', STATUSES)):
+        bad = ~alerts[col].isin(allowed)
+        if bad.any():
+            raise ValueError(f"{col} must be one of {', '.join(allowed)} (got {alerts.loc[bad, col].iloc[0]!r})")
+    alerts['Title'] = alerts['Title'].str.slice(0, TITLE_LENGTH)
+    alerts['Message'] = alerts['Message'].str.slice(0, MESSAGE_LENGTH)
+    return alerts[ALERT_COLUMNS]
+
+
+def empty_alerts():
+    return alert_frame([], [], [], [], [])
+
+
+def _insert_sql():
+    columns = ', '.join(ALERT_COLUMNS)
+    params = ', '.join('?' * len(ALERT_COLUMNS))
+    return (f"INSERT INTO {TABLE} ({columns}) SELECT {params} "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {TABLE} WHERE AlertType = ? "
+            f"AND (Title = ? OR (BusId = ? AND Status <> 'Resolved')))")
+
+
+def _count(cursor):
+    cursor.execute(f"SELECT COUNT(*) FROM {TABLE}")
+    return cursor.fetchone()[0]
+
+
+def load_alerts(conn, alerts):
+    """Insert the alerts not already in the table in one transaction; returns the rows inserted."""
+    sqlite = is_sqlite(conn)
+    values = alerts[ALERT_COLUMNS].astype(object).where(alerts[ALERT_COLUMNS].notna(), None)
+    rows = []
+    for row in values.itertuples(index=False, name=None):
+        row = tuple(v.item() if isinstance(v, np.generic) else v for v in row)
+        rows.append(row + (row[1], row[3], row[0]))
+    cursor = conn.cursor()
+    if not sqlite:
+        cursor.fast_executemany = True
+    try:
+        if sqlite:
+            cursor.execute(SQLITE_TABLE_SQL)
+        # Counted in the transaction: executemany's rowcount is -1 under fast_executemany
+        before = _count(cursor)
+        if rows:
+            cursor.executemany(_insert_sql(), rows)
+        inserted = _count(cursor) - before
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return inserted
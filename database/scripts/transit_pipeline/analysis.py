@@ -0,0 +1,154 @@
+"""
+Advanced Analysis Stage
+Purpose: Compute the fuel, ridership, efficiency and schedule metrics behind the charts and reports
+Author: Fleet Management System
+Date: 2026-10-16
+
+Used by 03_advanced_analysis.py and by the pipeline runner (analyze stage). Everything the
+charts, the executive summary and dashboard_data.json need is computed here once, from the
+precomputed aggregate cube (cube.py) rather than the rows.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .config import COVID_END, COVID_START
+from .costmodel import CostModel, fare_share_curve
+from .cube import AggregateCube, build_cube
+from .kpis import seasonal_picks
+from .schedule import seasonal_saving
+
+COVID_START_TS = pd.Timestamp(COVID_START)
+COVID_END_TS = pd.Timestamp(COVID_END)
+
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+QUARTER_NAMES = ['Q1 (Jan-Mar)', 'Q2 (Apr-Jun)', 'Q3 (Jul-Sep)', 'Q4 (Oct-Dec)']
+
+# Diesel prices of the fuel-share-of-fare curve (fare and fuel per passenger: CostModel)
+FUEL_PRICES = np.linspace(2, 6, 10)
+
+# Cube metrics the analysis reads
+CUBE_METRICS = ['DieselPrice', 'BusRidership', 'EstimatedFuelCostPerMonth']
+
+
+def prepare(df):
+    """Copy of the cleaned frame with Date parsed and Year/Month derived from it."""
+    df = df.copy()
+    df['Date'] = pd.to_datetime(df['Date'])
+    df['Year'] = df['Date'].dt.year
+    df['Month'] = df['Date'].dt.month
+    return df
+
+
+def period_metrics(cube):
+    """First and last year of the data."""
+    months = cube.count('DieselPrice', ('Year', 'Month')).index
+    return {
+        'first_year': int(months[0][0]) if len(months) else None,
+        'last_year': int(months[-1][0]) if len(months) else None,
+    }
+
+
+def fuel_metrics(cube):
+    """Diesel averages by year, the 2015 -> 2022 increase and the peak month."""
+    yearly_diesel = cube.mean('DieselPrice', ('Year',))
+    diesel_2015 = yearly_diesel.get(2015, np.nan)
+    diesel_2022 = yearly_diesel.get(2022, np.nan)
+    peaks = cube.max('DieselPrice', ('Year', 'Month')).dropna()
+    peak_year, peak_month = peaks.idxmax() if len(peaks) else (None, None)
+    return {
+        'yearly_diesel': yearly_diesel.dropna(),
+        'diesel_2015': diesel_2015,
+        'diesel_2022': diesel_2022,
+        'diesel_increase': ((diesel_2022 - diesel_2015) / diesel_2015) * 100,
+        'diesel_current': cube.last('DieselPrice'),
+        'diesel_peak': peaks.max() if len(peaks) else np.nan,
+        'diesel_peak_date': f'{peak_year:04d}-{peak_month:02d}-01' if len(peaks) else None,
+    }
+
+
+def ridership_metrics(cube):
+    """Pre-COVID baseline, COVID low (and its drop), latest value and recovery (in millions of passengers)."""
+    pre_covid_avg = cube.mean('BusRidership', phase='PreCOVID') / 1e6
+    lows = cube.min('BusRidership', ('Year', 'Month'), 'COVID').dropna()
+    low_year, low_month = lows.idxmin() if len(lows) else (None, None)
+    covid_min = cube.min('BusRidership', phase='COVID') / 1e6
+    latest_ridership = cube.last('BusRidership') / 1e6
+    return {
+        'pre_covid_avg': pre_covid_avg,
+        'covid_min': covid_min,
+        'covid_min_date': f'{low_year:04d}-{low_month:02d}-01' if len(lows) else None,
+        'covid_drop_pct': (covid_min / pre_covid_avg - 1) * 100,
+        'latest_ridership': latest_ridership,
+        'recovery_pct': (latest_ridership / pre_covid_avg) * 100,
+        'monthly_avg': cube.mean('BusRidership', ('Month',), 'PreCOVID') / 1e6,
+        'quarterly_avg': cube.mean('BusRidership', ('Quarter',), 'PreCOVID') / 1e6,
+    }
+
+
+def efficiency_metrics(cube, model=None):
+    """
+    Yearly cost per million passengers (and its peak against the first year) and the
+    fuel-share-of-fare curve of the fleet model.
+    """
+    model = model or CostModel()
+    yearly_eff = pd.DataFrame({
+        'BusRidership': cube.sum('BusRidership', ('Year',)),
+        'EstimatedFuelCostPerMonth': cube.sum('EstimatedFuelCostPerMonth', ('Year',)),
+        'DieselPrice': cube.mean('DieselPrice', ('Year',)),
+    }).dropna()
+    yearly_eff['CostPerPassenger'] = yearly_eff['EstimatedFuelCostPerMonth'] / yearly_eff['BusRidership'] * 1e6
+    # Years without ridership divide by zero
+    cost = yearly_eff['CostPerPassenger'].replace([np.inf, -np.inf], np.nan).dropna()
+    return {
+        'yearly_eff': yearly_eff,
+        'cost_per_passenger_ratio': cost.max() / cost.iloc[0] if len(cost) else np.nan,
+        'cost_per_passenger_peak_year': int(cost.idxmax()) if len(cost) else None,
+        'fuel_prices': FUEL_PRICES,
+        'fare': model.fare,
+        'break_even': fare_share_curve(FUEL_PRICES, model),  # As percentage of fare
+    }
+
+
+def schedule_metrics(cube, monthly_avg, quarterly_avg, model=None):
+    """
+    Best/worst quarter and month, diesel seasonality, the monthly operating opportunity score
+    and the fuel a seasonal schedule saves (schedule.seasonal_saving, fleet model).
+    """
+    monthly_fuel = cube.mean('DieselPrice', ('Month',))
+    month_ridership = monthly_avg.reindex(range(1, 13))
+    month_diesel = monthly_fuel.reindex(range(1, 13))
+
+    # High ridership + low fuel = best time
+    monthly_ridership_norm = (monthly_avg - monthly_avg.min()) / (monthly_avg.max() - monthly_avg.min())
+    monthly_fuel_norm = (monthly_fuel - monthly_fuel.min()) / (monthly_fuel.max() - monthly_fuel.min())
+    return {
+        'best_q': quarterly_avg.idxmax(),
+        'worst_q': quarterly_avg.idxmin(),
+        'monthly_fuel': monthly_fuel,
+        'opportunity_score': monthly_ridership_norm - monthly_fuel_norm,  # Higher is better
+        'seasonal_saving_pct': seasonal_saving(month_ridership.fillna(month_ridership.mean()),
+                                               month_diesel.fillna(month_diesel.mean()), model),
+        **seasonal_picks(month_ridership.tolist(), month_diesel.tolist()),
+    }
+
+
+# =============================================================================
+# PIPELINE STAGES
+# =============================================================================
+
+def analyze(df, cube_table=None, model=None):
+    """
+    Stage: every metric of the advanced analysis as one flat dict, read from the aggregate cube.
+
+    model is the fleet CostModel behind the fuel-share-of-fare curve (default: CostModel()).
+    """
+    if cube_table is None:
+        cube_table = build_cube(df, CUBE_METRICS)
+    cube = AggregateCube(cube_table)
+    metrics = period_metrics(cube)
+    metrics.update(fuel_metrics(cube))
+    metrics.update(ridership_metrics(cube))
+    metrics.update(efficiency_metrics(cube, model))
+    metrics.update(schedule_metrics(cube, metrics['monthly_avg'], metrics['quarterly_avg'], model))
+    return metrics
@@ -0,0 +1,224 @@
+"""
+Anomaly Detection Stage
+Purpose: Rolling means, z-scores, month-over-month / year-over-year changes and Alerts for every metric
+Author: Fleet Management System
+Date: 2026-10-16
+
+Every numeric column of the cleaned frame is put on a monthly grid as one column of a
+(months x metrics) matrix. Three cumulative sums (values, squares, counts) are taken once
+down the matrix; every window statistic is then a difference of two rows of those sums:
+
+    RollingMean   mean of the window months ending with this month
+    ZScore        this month against the mean / std of the window months before it
+    MoMPct        change on the previous month, in percent
+    YoYPct        change on the same month a year earlier, in percent
+
+Values are centered on their column mean before summing, so the variance does not lose
+precision for large columns (GDP, miles traveled). Months with |ZScore| >= Z_THRESHOLD
+become Alerts rows (AlertType Fuel for fuel and cost metrics, Safety for fatalities,
+Performance otherwise; Severity by |ZScore|), ready for load_alerts(). Only months from
+the since cutoff on (default: the latest month) are raised as New; older anomalies are
+history and go in as Resolved, with ResolvedAt the start of the following month.
+
+Usage:
+    python -m transit_pipeline.anomalies
+    python -m transit_pipeline.anomalies --window 24 --z 3 --load sqlite:///transit.db
+    python -m transit_pipeline.anomalies --since 2023-06      # New from June 2023 on
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from .alerts import alert_frame, empty_alerts, load_alerts
+from .config import ALERTS_PATH, CLEANED_CSV, MONTHLY_STATS_PATH
+from .cube import metric_columns
+from .forecast import series_matrix
+
+DEFAULT_WINDOW = 12
+
+# |ZScore| that raises an alert
+Z_THRESHOLD = 2.5
+
+# Severity by |ZScore|: (lower bound, severity), highest first
+SEVERITY_BANDS = [(6.0, 'Critical'), (4.0, 'High'), (3.0, 'Medium'), (0.0, 'Low')]
+
+# AlertType per metric (Performance for every other metric)
+ALERT_TYPES = {
+    'DieselPrice': 'Fuel',
+    'GasolinePrice': 'Fuel',
+    'EstimatedFuelCostPerMonth': 'Fuel',
+    'EstimatedCostPerPassenger': 'Fuel',
+    'HighwayFatalities': 'Safety',
+    'FatalityRate': 'Safety',
+}
+
+STATISTICS = ['RollingMean', 'ZScore', 'MoMPct', 'YoYPct']
+
+
+def rolling_statistics(values, window=DEFAULT_WINDOW, min_periods=None):
+    """
+    {statistic: (months x metrics) array} of a (months x metrics) matrix with NaN gaps.
+
+    Windows count only present months and need min_periods of them (default: the whole window).
+    """
+    min_periods = window if min_periods is None else min_periods
+    months, _ = values.shape
+    present = ~np.isnan(values)
+    with np.errstate(invalid='ignore'):
+        center = np.nanmean(np.where(present.any(axis=0), values, 0.0), axis=0)
+    centered = np.where(present, values - center, 0.0)
+
+    def cumulative(a):
+        return np.concatenate([np.zeros((1, a.shape[1])), np.cumsum(a, axis=0)])
+
+    sums, squares, counts = cumulative(centered), cumulative(centered ** 2), cumulative(present.astype('float64'))
+    end = np.arange(months)
+    start = np.maximum(end - window, 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Window ending with this month
+        first = np.maximum(end + 1 - window, 0)
+        n_cur = counts[end + 1] - counts[first]
+        rolling_mean = np.where(n_cur >= min_periods, (sums[end + 1] - sums[first]) / n_cur + center, np.nan)
+
+        # Window before this month
+        n = counts[end] - counts[start]
+        mean = (sums[end] - sums[start]) / n
+        variance = ((squares[end] - squares[start]) - n * mean ** 2) / (n - 1)
+        std = np.sqrt(np.maximum(variance, 0.0))
+        z = np.where((n >= min_periods) & (std > 0), (centered - mean) / std, np.nan)
+        z = np.where(present, z, np.nan)
+
+        previous = np.vstack([np.full((1, values.shape[1]), np.nan), values[:-1]])
+        year_ago = np.vstack([np.full((min(12, months), values.shape[1]), np.nan), values[:-12]])
+        mom = (values / previous - 1) * 100
+        yoy = (values / year_ago - 1) * 100
+
+    return {'RollingMean': rolling_mean, 'ZScore': z, 'MoMPct': mom, 'YoYPct': yoy}
+
+
+def monthly_statistics(df, metrics=None, window=DEFAULT_WINDOW, min_periods=None):
+    """
+    (stats, values, grid): stats has Date plus <metric>_<statistic> for every metric and
+    statistic; values is the (months x metrics) matrix they were computed from.
+    """
+    metrics = metric_columns(df) if metrics is None else list(metrics)
+    matrix, _, grid = series_matrix(df, metrics)
+    values = matrix.T
+    statistics = rolling_statistics(values, window, min_periods)
+
+    columns = {'Date': grid.strftime('%Y-%m-%d')}
+    for k, metric in enumerate(metrics):
+        for name in STATISTICS:
+            columns[f'{metric}_{name}'] = statistics[name][:, k]
+    return pd.DataFrame(columns), values, grid
+
+
+def severity(z):
+    """Severity label per |z|."""
+    z = np.abs(z)
+    return np.select([z >= bound for bound, _ in SEVERITY_BANDS], [label for _, label in SEVERITY_BANDS],
+                     SEVERITY_BANDS[-1][1])
+
+
+def _percent(value):
+    return 'n/a' if np.isnan(value) else f'{value:+.1f}%'
+
+
+def anomaly_alerts(stats, values, grid, metrics, window=DEFAULT_WINDOW, z_threshold=Z_THRESHOLD, since=None):
+    """
+    Alerts rows for every month and metric with |ZScore| >= z_threshold: New from the month
+    since (default: the latest month of grid) on, Resolved before it.
+    """
+    def matrix(name):
+        return stats[[f'{metric}_{name}' for metric in metrics]].to_numpy(dtype='float64')
+
+    z = matrix('ZScore')
+    with np.errstate(invalid='ignore'):
+        month_idx, metric_idx = np.nonzero(np.abs(z) >= z_threshold)
+    if not len(month_idx):
+        return empty_alerts()
+
+    flagged = z[month_idx, metric_idx]
+    value = values[month_idx, metric_idx]
+    mom = matrix('MoMPct')[month_idx, metric_idx]
+    yoy = matrix('YoYPct')[month_idx, metric_idx]
+    names = np.asarray(metrics)[metric_idx]
+    labels = grid[month_idx].strftime('%B %Y')
+    titles = [f"{metric} {'spike' if score > 0 else 'drop'} in {label}"
+              for metric, score, label in zip(names, flagged, labels)]
+    messages = [f"{metric} was {v:,.4g} in {label}, {score:+.1f} standard deviations from the previous "
+                f"{window} months (MoM {_percent(m)}, YoY {_percent(y)})."
+                for metric, v, score, label, m, y in zip(names, value, flagged, labels, mom, yoy)]
+
+    created = grid[month_idx]
+    current = created >= (grid[-1] if since is None else pd.Timestamp(since))
+    resolved_at = (created + pd.offsets.MonthBegin(1)).where(~current)
+
+    return alert_frame(alert_type=[ALERT_TYPES.get(metric, 'Performance') for metric in names],
+                       severity=severity(flagged), title=titles, message=messages,
+                       created_at=created, status=np.where(current, 'New', 'Resolved'),
+                       resolved_at=resolved_at)
+
+
+def detect_anomalies(df, metrics=None, window=DEFAULT_WINDOW, z_threshold=Z_THRESHOLD, since=None):
+    """(monthly statistics, Alerts rows) of the cleaned frame."""
+    metrics = metric_columns(df) if metrics is None else list(metrics)
+    stats, values, grid = monthly_statistics(df, metrics, window)
+    return stats, anomaly_alerts(stats, values, grid, metrics, window, z_threshold, since)
+
+
+# =============================================================================
+# PIPELINE STAGES
+# =============================================================================
+
+def anomalies(df, window=DEFAULT_WINDOW, z_threshold=Z_THRESHOLD, since=None):
+    """Stage: monthly rolling statistics and anomaly alerts of the derived frame."""
+    return detect_anomalies(df, window=window, z_threshold=z_threshold, since=since)
+
+
+def export_anomalies(result, stats_path=MONTHLY_STATS_PATH, alerts_path=ALERTS_PATH):
+    """Stage: write monthly_stats.csv and alerts.csv."""
+    stats, alerts = result
+    stats.to_csv(stats_path, index=False)
+    alerts.to_csv(alerts_path, index=False)
+    return stats_path, alerts_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rolling statistics and anomaly alerts for every cleaned metric')
+    parser.add_argument('--input', default=CLEANED_CSV, help='Cleaned CSV (default: cleaned dataset)')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW, help='Rolling window in months (default: 12)')
+    parser.add_argument('--z', type=float, default=Z_THRESHOLD, help=f'|z-score| that raises an alert (default: {Z_THRESHOLD})')
+    parser.add_argument('--since', metavar='YYYY-MM',
+                        help='First month whose anomalies are raised as New; older ones are Resolved (default: latest month)')
+    parser.add_argument('--load', metavar='TARGET',
+                        help='Also insert the alerts into Alerts (sqlite:///path.db or an ODBC connection string)')
+    args = parser.parse_args()
+
+    from .dataset_cache import load_cleaned
+    stats, alerts = detect_anomalies(load_cleaned(csv_path=args.input), window=args.window, z_threshold=args.z,
+                                     since=args.since)
+
+    print("=" * 80)
+    print("ANOMALY DETECTION")
+    print("=" * 80)
+    print(f"✓ {len(stats)} months x {(len(stats.columns) - 1) // len(STATISTICS)} metrics, {args.window}-month window")
+    counts = alerts.groupby(['AlertType', 'Severity', 'Status']).size()
+    for (alert_type, level, status), count in counts.items():
+        print(f"  {alert_type:<12} {level:<9} {status:<9} {count:>5}")
+    _, alerts_path = export_anomalies((stats, alerts))
+    print(f"✓ Saved: {alerts_path} ({len(alerts)} alerts)")
+    if args.load:
+        from .bulk_load import connect
+        from .snapshot import refresh_snapshot
+        conn = connect(args.load)
+        try:
+            inserted = load_alerts(conn, alerts)
+            print(f"✓ Inserted {inserted:,} of {len(alerts):,} alerts into Alerts "
+                  f"({len(alerts) - inserted:,} already there)")
+            print(f"✓ Refreshed {refresh_snapshot(conn).months} DashboardSnapshot month(s)")
+        finally:
+            conn.close()
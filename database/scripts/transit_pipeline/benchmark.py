@@ -0,0 +1,374 @@
+"""
+Pipeline Benchmark
+Purpose: Time the pipeline stages on scaled synthetic DOT extracts and track regressions
+Author: Fleet Management System
+Date: 2026-10-16
+
+A scale-N input is the raw Monthly_Transportation_Statistics.csv repeated for N agencies
+(agency 0 is the original extract; the others are rescaled copies with an Agency column),
+so 100x has 100 times the rows. Inputs are generated once and kept under
+database/data/benchmarks/inputs.
+
+Each stage runs in a fresh process so its peak RSS is its own. Wall time covers the stage
+function only (loading the previous stage's pickled result is not timed). Results are
+appended to database/data/benchmarks/history.json; a stage whose wall time or peak RSS
+exceeds the median of its last runs on this machine by more than --threshold fails the run.
+
+Usage:
+    python -m transit_pipeline.benchmark                      # 1x and 100x
+    python -m transit_pipeline.benchmark --scales 1 100 10000 --threshold 0.5
+    python -m transit_pipeline.benchmark --no-record          # compare without saving
+"""
+
+import argparse
+import json
+import pickle
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+
+from .config import BENCHMARK_DIR, RAW_CSV
+from .metrics import peak_rss_mb
+
+HISTORY_PATH = BENCHMARK_DIR / 'history.json'
+INPUT_DIR = BENCHMARK_DIR / 'inputs'
+
+DEFAULT_SCALES = (1, 100)
+
+# Agencies generated per write when building a scaled input
+AGENCY_BLOCK = 100
+
+# Stages are compared with the median of this many previous runs
+BASELINE_RUNS = 5
+
+# Differences below these are noise, whatever the relative change
+MIN_SECONDS = 0.05
+MIN_RSS_MB = 16
+
+
+# =============================================================================
+# SCALED INPUTS
+# =============================================================================
+
+def synthesize_raw(scale, path, seed=0, source=RAW_CSV):
+    """
+    Write a raw extract with scale agencies: the source rows once per agency.
+
+    Agency 0 keeps the original values. Every other agency multiplies each numeric column
+    by its own lognormal factor (sigma 0.3, or 0.05 for price columns) with 2% cell noise.
+    """
+    import numpy as np
+    import pandas as pd
+
+    base = pd.read_csv(source)
+    numeric = [col for col in base.columns if col != 'Index' and pd.api.types.is_numeric_dtype(base[col])]
+    others = [col for col in base.columns if col not in numeric]
+    values = base[numeric].to_numpy(dtype='float64')
+    sigma = np.array([0.05 if 'Price' in col else 0.3 for col in numeric])
+    rng = np.random.default_rng(seed)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.csv.tmp')
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        for first in range(0, scale, AGENCY_BLOCK):
+            agencies = np.arange(first, min(first + AGENCY_BLOCK, scale))
+            factors = np.exp(rng.normal(0, 1, (len(agencies), 1, len(numeric))) * sigma)
+            noise = 1 + rng.normal(0, 0.02, (len(agencies),) + values.shape)
+            scaled = values[None, :, :] * factors * noise
+            scaled[agencies == 0] = values
+
+            block = pd.DataFrame(scaled.reshape(-1, len(numeric)), columns=numeric)
+            for col in others:
+                block[col] = np.tile(base[col].to_numpy(), len(agencies))
+            block = block[list(base.columns)]
+            block['Agency'] = np.repeat([f'Agency {a:05d}' for a in agencies], len(base))
+            block.to_csv(f, index=False, header=first == 0)
+    tmp_path.replace(path)
+    return len(base) * scale
+
+
+def scaled_input(scale, seed=0, input_dir=INPUT_DIR):
+    """Path of the scale-x input, generated (and its columnar cache warmed) on first use."""
+    path = input_dir / f'raw_x{scale}_seed{seed}.csv'
+    if not path.exists():
+        synthesize_raw(scale, path, seed)
+    from .dataset_cache import load_raw
+    load_raw(columns=['Date'], csv_path=path)
+    return path
+
+
+# =============================================================================
+# STAGES (each runs in its own process)
+# =============================================================================
+
+def _dump(obj, path):
+    with open(path, 'wb') as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _load(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def bench_explore(csv_path, work_dir):
+    from .dataset_cache import load_raw
+    from .exploration import completeness_report, relevant_columns
+    start = time.perf_counter()
+    raw = load_raw(csv_path=csv_path)
+    completeness_report(raw, relevant_columns(raw.columns))
+    return time.perf_counter() - start, len(raw)
+
+
+def bench_clean(csv_path, work_dir):
+    from .cleaning import clean, load
+    start = time.perf_counter()
+    df_clean = clean(load(csv_path))
+    seconds = time.perf_counter() - start
+    _dump(df_clean, work_dir / 'clean.pkl')
+    return seconds, len(df_clean)
+
+
+def bench_derive(csv_path, work_dir):
+    from .cleaning import derive
+    df_clean = _load(work_dir / 'clean.pkl')
+    start = time.perf_counter()
+    df = derive(df_clean)
+    seconds = time.perf_counter() - start
+    _dump(df, work_dir / 'derived.pkl')
+    return seconds, len(df)
+
+
+def bench_cube(csv_path, work_dir):
+    from .cube import build_cube
+    df = _load(work_dir / 'derived.pkl')
+    start = time.perf_counter()
+    cube = build_cube(df)
+    seconds = time.perf_counter() - start
+    _dump(cube, work_dir / 'cube.pkl')
+    return seconds, len(df)
+
+
+def bench_analyze(csv_path, work_dir):
+    from .analysis import analyze
+    df = _load(work_dir / 'derived.pkl')
+    cube = _load(work_dir / 'cube.pkl')
+    start = time.perf_counter()
+    metrics = analyze(df, cube)
+    seconds = time.perf_counter() - start
+    _dump(metrics, work_dir / 'metrics.pkl')
+    return seconds, len(df)
+
+
+def bench_render(csv_path, work_dir):
+    from .charts import render_charts
+    df = _load(work_dir / 'derived.pkl')
+    metrics = _load(work_dir / 'metrics.pkl')
+    (work_dir / 'charts').mkdir(exist_ok=True)
+    start = time.perf_counter()
+    render_charts(df, metrics, work_dir / 'charts', jobs=1)
+    return time.perf_counter() - start, len(df)
+
+
+def bench_export_json(csv_path, work_dir):
+    from .kpis import KPIEngine
+    from .reports import export_dashboard
+    cube = _load(work_dir / 'cube.pkl')
+    start = time.perf_counter()
+    export_dashboard(KPIEngine.from_cube(cube).kpis(), work_dir / 'dashboard_data.json')
+    return time.perf_counter() - start, 1
+
+
+def bench_forecast(csv_path, work_dir):
+    from .forecast import forecast
+    df = _load(work_dir / 'derived.pkl')
+    start = time.perf_counter()
+    forecast(df)
+    return time.perf_counter() - start, len(df)
+
+
+def bench_anomalies(csv_path, work_dir):
+    from .anomalies import anomalies
+    df = _load(work_dir / 'derived.pkl')
+    start = time.perf_counter()
+    anomalies(df)
+    return time.perf_counter() - start, len(df)
+
+
+def bench_schema(csv_path, work_dir):
+    from .schema import write_schema
+    df = _load(work_dir / 'derived.pkl')
+    start = time.perf_counter()
+    write_schema(df, work_dir / '04_create_database.sql')
+    return time.perf_counter() - start, len(df)
+
+
+STAGES = {
+    'explore': bench_explore,
+    'clean': bench_clean,
+    'derive': bench_derive,
+    'cube': bench_cube,
+    'analyze': bench_analyze,
+    'render': bench_render,
+    'export_json': bench_export_json,
+    'forecast': bench_forecast,
+    'anomalies': bench_anomalies,
+    'schema': bench_schema,
+}
+
+
+def _run_stage(name, csv_path, work_dir):
+    seconds, rows = STAGES[name](csv_path, work_dir)
+    peak = peak_rss_mb()
+    return {
+        'seconds': round(seconds, 4),
+        'peak_rss_mb': None if peak is None else round(peak, 1),
+        'rows': rows,
+        'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else None,
+    }
+
+
+def run_scale(scale, seed=0, stages=tuple(STAGES)):
+    """Run the stages on the scale-x input; returns {stage: measurements}."""
+    # Even the input is prepared in a child: the peak RSS a process reports includes its
+    # parent's when it was started, so this process never loads any data itself
+    csv_path = _in_child(scaled_input, scale, seed)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='transit_bench_') as tmp:
+        for name in stages:
+            results[name] = _in_child(_run_stage, name, csv_path, Path(tmp))
+    return results
+
+
+def _in_child(func, *args):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+        return pool.submit(func, *args).result()
+
+
+# =============================================================================
+# HISTORY
+# =============================================================================
+
+def load_history(path=HISTORY_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'runs': []}
+
+
+def save_history(history, path=HISTORY_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2)
+    tmp_path.replace(path)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def baseline(history, host, scale, stage, metric, runs=BASELINE_RUNS):
+    """Median of metric over the last runs of stage at scale on host, or None."""
+    values = [run['stages'][stage][metric] for run in history['runs']
+              if run['host'] == host and run['scale'] == scale and stage in run['stages']
+              and run['stages'][stage].get(metric) is not None]
+    return statistics.median(values[-runs:]) if values else None
+
+
+def regressions(history, host, scale, results, threshold):
+    """(stage, metric, value, baseline) for every measurement past threshold."""
+    found = []
+    for stage, measured in results.items():
+        for metric, floor in (('seconds', MIN_SECONDS), ('peak_rss_mb', MIN_RSS_MB)):
+            value = measured.get(metric)
+            base = baseline(history, host, scale, stage, metric)
+            if value is None or base is None:
+                continue
+            if value > base * (1 + threshold) and value - base > floor:
+                found.append((stage, metric, value, base))
+    return found
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def _format_row(stage, measured, base):
+    rss = measured['peak_rss_mb']
+    change = f"{(measured['seconds'] / base - 1) * 100:+.0f}%" if base else 'new'
+    rate = f"{measured['rows_per_sec']:,.0f}" if measured['rows_per_sec'] else '-'
+    return (f"  {stage:<12} {measured['seconds']:>9.3f}s {'-' if rss is None else f'{rss:,.0f}':>9} "
+            f"{measured['rows']:>12,} {rate:>14} {change:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m transit_pipeline.benchmark',
+                                     description='Benchmark the pipeline stages on scaled inputs')
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                        help='Input scales, as multiples of the raw extract (default: 1 100)')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES),
+                        help='Stages to run (later stages need the earlier ones)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the scaled inputs')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed slowdown / memory growth over the baseline (default: 0.25)')
+    parser.add_argument('--history', type=Path, default=HISTORY_PATH, help='History JSON file')
+    parser.add_argument('--no-record', action='store_true', help='Do not append this run to the history')
+    args = parser.parse_args(argv)
+
+    history = load_history(args.history)
+    host = platform.node()
+    commit = _git_commit()
+    failed = []
+
+    print("=" * 80)
+    print("TRANSIT PIPELINE BENCHMARK")
+    print("=" * 80)
+    for scale in args.scales:
+        print(f"\n{scale}x input")
+        print(f"  {'Stage':<12} {'Wall':>10} {'Peak MB':>9} {'Rows':>12} {'Rows/sec':>14} {'vs base':>8}")
+        print("  " + "-" * 70)
+        results = run_scale(scale, args.seed, args.stages)
+        for stage, measured in results.items():
+            print(_format_row(stage, measured, baseline(history, host, scale, stage, 'seconds')))
+
+        found = regressions(history, host, scale, results, args.threshold)
+        for stage, metric, value, base in found:
+            print(f"  ✗ {stage}: {metric} {value:,.3f} vs baseline {base:,.3f} "
+                  f"(+{(value / base - 1) * 100:.0f}%, threshold {args.threshold:.0%})")
+        failed.extend((scale,) + item for item in found)
+
+        history['runs'].append({
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': commit,
+            'host': host,
+            'python': platform.python_version(),
+            'scale': scale,
+            'seed': args.seed,
+            'stages': results,
+        })
+
+    if not args.no_record:
+        save_history(history, args.history)
+        print(f"\n✓ History: {args.history}")
+    print("=" * 80)
+    if failed:
+        print(f"✗ {len(failed)} regression(s) past {args.threshold:.0%}")
+        return 1
+    print("✓ No regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,226 @@
+"""
+Bulk Load Stage
+Purpose: Stream the cleaned DOT dataset into USDOTTransportationStats with batched upserts
+Author: Fleet Management System
+Date: 2026-10-16
+
+The cleaned CSV is read in batches of batch_size rows and each batch is written with one
+parameterized executemany call, upserting on the unique Date column:
+
+    SQL Server (pyodbc) - fast_executemany into a #temp table shaped like the target,
+                          then one MERGE per batch
+    SQLite (stand-in)   - INSERT ... ON CONFLICT(Date) DO UPDATE
+
+A matched row is only updated (and its UpdatedAt bumped) when a value differs, so reloading
+an unchanged file leaves UpdatedAt alone and the DashboardSnapshot refresh stays incremental.
+
+commit_every controls the transactions: commit after every N batches, or 0 to load the
+whole file in a single transaction.
+"""
+
+import datetime
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyodbc
+except ImportError:  # Only needed for SQL Server targets
+    pyodbc = None
+
+from .config import CLEANED_CSV
+
+TABLE = 'USDOTTransportationStats'
+STAGE_TABLE = '#USDOTTransportationStatsLoad'
+
+# SQLite timestamp with milliseconds (CURRENT_TIMESTAMP only has whole seconds); the text
+# still sorts against CURRENT_TIMESTAMP values
+SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+# Loaded columns of USDOTTransportationStats (StatId and the timestamps are left to the
+# database) with the kind of value each one takes
+STATS_COLUMNS = {
+    'Date': 'date',
+    'Year': 'int',
+    'Month': 'int',
+    'Quarter': 'int',
+    'BusRidership': 'int',
+    'RailRidership': 'int',
+    'OtherTransitRidership': 'int',
+    'DieselPrice': 'float',
+    'GasolinePrice': 'float',
+    'HighwayMilesTraveled': 'int',
+    'HighwayFatalities': 'int',
+    'FatalityRate': 'float',
+    'TransitEmployment': 'int',
+    'TruckEmployment': 'int',
+    'UnemploymentRate': 'float',
+    'GDP': 'int',
+    'HeavyTruckSales': 'int',
+    'AutoSales': 'int',
+    'IsCOVIDPeriod': 'bool',
+    'EstimatedFuelCostPerMonth': 'float',
+    'EstimatedCostPerPassenger': 'float',
+}
+
+SQLITE_TYPES = {'date': 'TEXT', 'int': 'INTEGER', 'float': 'REAL', 'bool': 'INTEGER'}
+
+
+@dataclass
+class LoadReport:
+    rows: int
+    batches: int
+    seconds: float
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+# =============================================================================
+# CONNECTIONS
+# =============================================================================
+
+def connect(target):
+    """
+    Open a connection for target: a SQLite file (path, 'sqlite:///path' or ':memory:') or
+    an ODBC connection string for SQL Server.
+    """
+    target = str(target)
+    if target.startswith('sqlite:///'):
+        return sqlite3.connect(target[len('sqlite:///'):])
+    if target == ':memory:' or Path(target).suffix in ('.db', '.sqlite', '.sqlite3'):
+        return sqlite3.connect(target)
+    if pyodbc is None:
+        raise ImportError("pyodbc is required to load into SQL Server (pip install pyodbc)")
+    return pyodbc.connect(target, autocommit=False)
+
+
+def is_sqlite(conn):
+    return isinstance(conn, sqlite3.Connection)
+
+
+def sqlite_table_sql():
+    """USDOTTransportationStats for the SQLite stand-in (types mapped from SQL Server)."""
+    columns = ['    StatId INTEGER PRIMARY KEY AUTOINCREMENT']
+    for col, kind in STATS_COLUMNS.items():
+        constraint = ' NOT NULL UNIQUE' if col == 'Date' else ''
+        columns.append(f'    {col} {SQLITE_TYPES[kind]}{constraint}')
+    columns.append('    CreatedAt TEXT DEFAULT CURRENT_TIMESTAMP')
+    columns.append(f'    UpdatedAt TEXT DEFAULT ({SQLITE_NOW})')
+    return f'CREATE TABLE IF NOT EXISTS {TABLE} (\n' + ',\n'.join(columns) + '\n)'
+
+
+def ensure_sqlite_table(conn):
+    conn.execute(sqlite_table_sql())
+    conn.commit()
+
+
+# =============================================================================
+# BATCHES
+# =============================================================================
+
+def _values(series, kind, sqlite):
+    """Column values as Python objects, with NaN/inf as None."""
+    if kind == 'date':
+        dates = pd.to_datetime(series)
+        if sqlite:
+            return dates.dt.strftime('%Y-%m-%d').tolist()
+        return [datetime.date(d.year, d.month, d.day) for d in dates]
+    if kind == 'bool':
+        return series.astype(bool).astype(int).tolist()
+    values = series.to_numpy(dtype='float64')
+    finite = np.isfinite(values)
+    if kind == 'int':
+        ints = pd.array(np.where(finite, np.round(values), np.nan), dtype='Int64')
+        return ints.to_numpy(dtype=object, na_value=None).tolist()
+    return np.where(finite, values, None).tolist()
+
+
+def iter_batches(csv_path=CLEANED_CSV, batch_size=1000, sqlite=True):
+    """Yield lists of parameter tuples (in STATS_COLUMNS order) of up to batch_size rows."""
+    numeric = {col: 'float64' for col, kind in STATS_COLUMNS.items() if kind in ('int', 'float')}
+    for chunk in pd.read_csv(csv_path, usecols=list(STATS_COLUMNS), dtype=numeric, chunksize=batch_size):
+        chunk = chunk.dropna(subset=['Date'])
+        columns = [_values(chunk[col], kind, sqlite) for col, kind in STATS_COLUMNS.items()]
+        yield list(zip(*columns))
+
+
+# =============================================================================
+# UPSERT STATEMENTS
+# =============================================================================
+
+def _sqlite_upsert_sql():
+    columns = list(STATS_COLUMNS)
+    updates = ', '.join(f'{col} = excluded.{col}' for col in columns if col != 'Date')
+    changed = ' OR '.join(f'excluded.{col} IS NOT {TABLE}.{col}' for col in columns if col != 'Date')
+    return (f"INSERT INTO {TABLE} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(Date) DO UPDATE SET {updates}, UpdatedAt = {SQLITE_NOW} WHERE {changed}")
+
+
+def _mssql_statements():
+    """(create stage table, insert into stage table, merge into target, clear stage table)."""
+    columns = list(STATS_COLUMNS)
+    column_list = ', '.join(columns)
+    updates = ', '.join(f't.{col} = s.{col}' for col in columns if col != 'Date')
+    create = f"SELECT TOP 0 {column_list} INTO {STAGE_TABLE} FROM {TABLE}"
+    insert = f"INSERT INTO {STAGE_TABLE} ({column_list}) VALUES ({', '.join('?' * len(columns))})"
+    merge = (f"MERGE {TABLE} WITH (HOLDLOCK) AS t USING {STAGE_TABLE} AS s ON t.Date = s.Date "
+             f"WHEN MATCHED AND EXISTS (SELECT {', '.join(f's.{col}' for col in columns)} "
+             f"EXCEPT SELECT {', '.join(f't.{col}' for col in columns)}) "
+             f"THEN UPDATE SET {updates}, t.UpdatedAt = GETDATE() "
+             f"WHEN NOT MATCHED THEN INSERT ({column_list}) "
+             f"VALUES ({', '.join(f's.{col}' for col in columns)});")
+    clear = f"TRUNCATE TABLE {STAGE_TABLE}"
+    return create, insert, merge, clear
+
+
+# =============================================================================
+# PIPELINE STAGES
+# =============================================================================
+
+def bulk_load(conn, csv_path=CLEANED_CSV, batch_size=1000, commit_every=1):
+    """
+    Stage: upsert the cleaned CSV into USDOTTransportationStats on conn.
+
+    Commits after every commit_every batches (0 = one transaction for the whole file) and
+    rolls back the open transaction on error. Returns a LoadReport.
+    """
+    sqlite = is_sqlite(conn)
+    cursor = conn.cursor()
+    if sqlite:
+        upsert = _sqlite_upsert_sql()
+    else:
+        cursor.fast_executemany = True
+        create, insert, merge, clear = _mssql_statements()
+        cursor.execute(create)
+
+    rows = batches = 0
+    start = time.perf_counter()
+    try:
+        for batch in iter_batches(csv_path, batch_size, sqlite):
+            if not batch:
+                continue
+            if sqlite:
+                cursor.executemany(upsert, batch)
+            else:
+                cursor.executemany(insert, batch)
+                cursor.execute(merge)
+                cursor.execute(clear)
+            rows += len(batch)
+            batches += 1
+            if commit_every and batches % commit_every == 0:
+                conn.commit()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if not sqlite:
+            cursor.execute(f"DROP TABLE IF EXISTS {STAGE_TABLE}")
+        cursor.close()
+    return LoadReport(rows, batches, time.perf_counter() - start)
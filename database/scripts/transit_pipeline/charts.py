@@ -0,0 +1,329 @@
+"""
+Chart Rendering Stages
+Purpose: Render the four 2x2 analysis figures as PNG files
+Author: Fleet Management System
+Date: 2026-10-16
+
+Each figure is built with the object-oriented Figure API (no pyplot state), so the four
+render stages are independent and can run concurrently. render_charts() renders them in a
+process pool; the parent places the frame's numeric columns in shared memory once and each
+worker copies out only the columns its figure reads.
+"""
+
+import datetime
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.dates as mdates
+import matplotlib.style
+from matplotlib.figure import Figure
+import numpy as np
+import pandas as pd
+
+from .analysis import COVID_END_TS, COVID_START_TS, MONTH_NAMES, QUARTER_NAMES, prepare
+from .metrics import RECORDER, StageMetrics, timed_call
+from .shared_frame import SharedFrame, attach_frame
+
+# Set style for professional charts
+matplotlib.style.use('seaborn-v0_8-darkgrid')
+matplotlib.rcParams['figure.figsize'] = (12, 6)
+matplotlib.rcParams['font.size'] = 10
+matplotlib.rcParams['axes.titlesize'] = 14
+matplotlib.rcParams['axes.labelsize'] = 12
+
+FIGSIZE = (14, 10)
+DPI = 150
+
+
+def _save(fig, path):
+    fig.tight_layout()
+    fig.savefig(path, dpi=DPI, bbox_inches='tight')
+    return path
+
+
+def render_fuel_cost_trends(df, metrics, path):
+    """Stage: fuel_cost_trends.png - diesel trend, diesel vs gasoline, yearly diesel, fuel cost."""
+    df = prepare(df)
+    fig = Figure(figsize=FIGSIZE)
+    axes = fig.subplots(2, 2)
+    fig.suptitle('Fuel Cost Analysis - US DOT Data (2015-2023)', fontsize=16, fontweight='bold')
+
+    # 1a. Diesel Price Trend
+    ax1 = axes[0, 0]
+    diesel_data = df[['Date', 'DieselPrice']].dropna()
+    ax1.plot(diesel_data['Date'], diesel_data['DieselPrice'], 'b-', linewidth=2, label='Diesel')
+    ax1.fill_between(diesel_data['Date'], diesel_data['DieselPrice'], alpha=0.3)
+    ax1.axhline(y=diesel_data['DieselPrice'].mean(), color='r', linestyle='--', label=f'Avg: ${diesel_data["DieselPrice"].mean():.2f}')
+    ax1.set_title('Diesel Price Trend')
+    ax1.set_ylabel('Price ($/gallon)')
+    ax1.legend()
+    ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
+
+    # Mark COVID period
+    ax1.axvspan(COVID_START_TS, COVID_END_TS, alpha=0.2, color='red', label='COVID Period')
+
+    # 1b. Diesel vs Gasoline Comparison
+    ax2 = axes[0, 1]
+    ax2.plot(df['Date'], df['DieselPrice'], 'b-', linewidth=2, label='Diesel')
+    ax2.plot(df['Date'], df['GasolinePrice'], 'g-', linewidth=2, label='Gasoline')
+    ax2.set_title('Diesel vs Gasoline Price Comparison')
+    ax2.set_ylabel('Price ($/gallon)')
+    ax2.legend()
+    ax2.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
+
+    # 1c. Year-over-Year Diesel Change
+    ax3 = axes[1, 0]
+    yearly_diesel = metrics['yearly_diesel']
+    colors = ['green' if x < yearly_diesel.shift(1).loc[i] else 'red' for i, x in yearly_diesel.items()]
+    colors[0] = 'blue'  # First year
+    bars = ax3.bar(yearly_diesel.index, yearly_diesel.values, color=colors, edgecolor='black')
+    ax3.set_title('Average Diesel Price by Year')
+    ax3.set_xlabel('Year')
+    ax3.set_ylabel('Price ($/gallon)')
+    for bar, val in zip(bars, yearly_diesel.values):
+        ax3.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1, f'${val:.2f}',
+                 ha='center', va='bottom', fontsize=9)
+
+    # 1d. Monthly Fuel Cost Trend
+    ax4 = axes[1, 1]
+    fuel_cost_data = df[['Date', 'EstimatedFuelCostPerMonth']].dropna()
+    ax4.plot(fuel_cost_data['Date'], fuel_cost_data['EstimatedFuelCostPerMonth'], 'purple', linewidth=2)
+    ax4.fill_between(fuel_cost_data['Date'], fuel_cost_data['EstimatedFuelCostPerMonth'], alpha=0.3, color='purple')
+    ax4.set_title('Estimated Monthly Fuel Cost')
+    ax4.set_ylabel('Cost ($)')
+    ax4.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
+
+    return _save(fig, path)
+
+
+def render_ridership_trends(df, metrics, path):
+    """Stage: ridership_trends.png - bus trend, transit modes, seasonality, COVID recovery."""
+    df = prepare(df)
+    fig = Figure(figsize=FIGSIZE)
+    axes = fig.subplots(2, 2)
+    fig.suptitle('Ridership Analysis - US DOT Data (2015-2023)', fontsize=16, fontweight='bold')
+    pre_covid_avg = metrics['pre_covid_avg']
+
+    # 2a. Bus Ridership Trend
+    ax1 = axes[0, 0]
+    ridership_data = df[['Date', 'BusRidership']].dropna()
+    ax1.plot(ridership_data['Date'], ridership_data['BusRidership'] / 1e6, 'b-', linewidth=2)
+    ax1.fill_between(ridership_data['Date'], ridership_data['BusRidership'] / 1e6, alpha=0.3)
+    ax1.axvspan(COVID_START_TS, COVID_END_TS, alpha=0.2, color='red')
+    ax1.set_title('Monthly Bus Ridership')
+    ax1.set_ylabel('Passengers (Millions)')
+    ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
+
+    # Add annotations
+    ax1.axhline(y=pre_covid_avg, color='green', linestyle='--', label=f'Pre-COVID Avg: {pre_covid_avg:.0f}M')
+    ax1.legend()
+
+    # 2b. All Transit Modes Comparison
+    ax2 = axes[0, 1]
+    ax2.plot(df['Date'], df['BusRidership'] / 1e6, label='Bus', linewidth=2)
+    ax2.plot(df['Date'], df['RailRidership'] / 1e6, label='Rail', linewidth=2)
+    ax2.plot(df['Date'], df['OtherTransitRidership'] / 1e6, label='Other', linewidth=2)
+    ax2.set_title('Transit Modes Comparison')
+    ax2.set_ylabel('Passengers (Millions)')
+    ax2.legend()
+    ax2.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
+
+    # 2c. Monthly Seasonal Pattern
+    ax3 = axes[1, 0]
+    monthly_avg = metrics['monthly_avg']
+    colors = matplotlib.colormaps['RdYlGn'](np.linspace(0.2, 0.8, 12))
+    ax3.bar(MONTH_NAMES, monthly_avg.values, color=colors, edgecolor='black')
+    ax3.set_title('Seasonal Ridership Pattern (Pre-COVID Average)')
+    ax3.set_ylabel('Avg Passengers (Millions)')
+    ax3.axhline(y=monthly_avg.mean(), color='red', linestyle='--', label=f'Avg: {monthly_avg.mean():.0f}M')
+    ax3.legend()
+
+    # 2d. COVID Recovery Tracking
+    ax4 = axes[1, 1]
+    post_covid = df[df['Date'] >= COVID_START_TS][['Date', 'BusRidership']].dropna()
+    post_covid['Recovery%'] = (post_covid['BusRidership'] / pre_covid_avg / 1e6) * 100
+    ax4.plot(post_covid['Date'], post_covid['Recovery%'], 'g-', linewidth=2)
+    ax4.fill_between(post_covid['Date'], post_covid['Recovery%'], alpha=0.3, color='green')
+    ax4.axhline(y=100, color='blue', linestyle='--', label='Pre-COVID Level')
+    ax4.set_title('Ridership Recovery (% of Pre-COVID)')
+    ax4.set_ylabel('Recovery %')
+    ax4.legend()
+    ax4.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+
+    return _save(fig, path)
+
+
+def render_cost_efficiency(df, metrics, path):
+    """Stage: cost_efficiency.png - cost per passenger, yearly efficiency, correlation, break-even."""
+    df = prepare(df)
+    fig = Figure(figsize=FIGSIZE)
+    axes = fig.subplots(2, 2)
+    fig.suptitle('Cost Efficiency Analysis - Optimization Opportunities', fontsize=16, fontweight='bold')
+
+    # 3a. Cost per Passenger Trend
+    ax1 = axes[0, 0]
+    cost_data = df[['Date', 'EstimatedCostPerPassenger']].dropna()
+    # Scale for visibility (multiply by 1000 for per 1000 passengers)
+    ax1.plot(cost_data['Date'], cost_data['EstimatedCostPerPassenger'] * 1e6, 'r-', linewidth=2)
+    ax1.fill_between(cost_data['Date'], cost_data['EstimatedCostPerPassenger'] * 1e6, alpha=0.3, color='red')
+    ax1.axvspan(COVID_START_TS, COVID_END_TS, alpha=0.2, color='gray')
+    ax1.set_title('Fuel Cost per Million Passengers')
+    ax1.set_ylabel('Cost ($)')
+    ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
+
+    # 3b. Efficiency by Year
+    ax2 = axes[0, 1]
+    yearly_eff = metrics['yearly_eff']
+    colors = matplotlib.colormaps['RdYlGn_r'](np.linspace(0.2, 0.8, len(yearly_eff)))
+    # A year without ridership data has an infinite bar; numpy warns while laying it out
+    with np.errstate(invalid='ignore'):
+        ax2.bar(yearly_eff.index, yearly_eff['CostPerPassenger'], color=colors, edgecolor='black')
+    ax2.set_title('Average Cost per Million Passengers by Year')
+    ax2.set_xlabel('Year')
+    ax2.set_ylabel('Cost ($)')
+
+    # 3c. Ridership vs Fuel Cost Correlation
+    ax3 = axes[1, 0]
+    corr_data = df[['BusRidership', 'DieselPrice', 'EstimatedFuelCostPerMonth']].dropna()
+    scatter = ax3.scatter(corr_data['BusRidership'] / 1e6, corr_data['DieselPrice'],
+                          c=corr_data['EstimatedFuelCostPerMonth'], cmap='RdYlGn_r',
+                          s=50, alpha=0.7, edgecolors='black')
+    ax3.set_title('Ridership vs Diesel Price (color = fuel cost)')
+    ax3.set_xlabel('Bus Ridership (Millions)')
+    ax3.set_ylabel('Diesel Price ($/gallon)')
+    fig.colorbar(scatter, ax=ax3, label='Monthly Fuel Cost')
+
+    # 3d. Break-Even Analysis
+    ax4 = axes[1, 1]
+    fuel_prices = metrics['fuel_prices']
+    break_even = metrics['break_even']
+    ax4.plot(fuel_prices, break_even, 'b-', linewidth=3, marker='o')
+    ax4.fill_between(fuel_prices, break_even, alpha=0.3)
+    ax4.axhline(y=50, color='red', linestyle='--', label='50% of fare')
+    ax4.set_title(f"Fuel Cost as % of Passenger Fare (${metrics['fare']:.2f})")
+    ax4.set_xlabel('Diesel Price ($/gallon)')
+    ax4.set_ylabel('% of Fare Spent on Fuel')
+    ax4.legend()
+
+    with np.errstate(invalid='ignore'):
+        return _save(fig, path)
+
+
+def render_schedule_optimization(df, metrics, path):
+    """Stage: schedule_optimization.png - quarters, employment, diesel seasonality, opportunity."""
+    df = prepare(df)
+    fig = Figure(figsize=FIGSIZE)
+    axes = fig.subplots(2, 2)
+    fig.suptitle('Schedule Optimization Analysis', fontsize=16, fontweight='bold')
+
+    # 4a. Quarterly Ridership Pattern
+    ax1 = axes[0, 0]
+    quarterly_avg = metrics['quarterly_avg']
+    colors = ['#3498db', '#2ecc71', '#f1c40f', '#e74c3c']
+    bars = ax1.bar(QUARTER_NAMES, quarterly_avg.values, color=colors, edgecolor='black')
+    ax1.set_title('Average Ridership by Quarter (Pre-COVID)')
+    ax1.set_ylabel('Passengers (Millions)')
+    for bar, val in zip(bars, quarterly_avg.values):
+        ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 2, f'{val:.0f}M',
+                 ha='center', va='bottom', fontweight='bold')
+
+    # 4b. Daily Employment Pattern (proxy for demand)
+    ax2 = axes[0, 1]
+    employment = df[['Date', 'TransitEmployment']].dropna()
+    ax2.plot(employment['Date'], employment['TransitEmployment'] / 1000, 'purple', linewidth=2)
+    ax2.set_title('Transit Employment Trend (Capacity Indicator)')
+    ax2.set_ylabel('Employees (Thousands)')
+    ax2.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
+
+    # 4c. Fuel Price Seasonality
+    ax3 = axes[1, 0]
+    monthly_fuel = metrics['monthly_fuel']
+    colors = matplotlib.colormaps['coolwarm'](np.linspace(0, 1, 12))
+    ax3.bar(MONTH_NAMES, monthly_fuel.values, color=colors, edgecolor='black')
+    ax3.set_title('Average Diesel Price by Month')
+    ax3.set_ylabel('Price ($/gallon)')
+    ax3.axhline(y=monthly_fuel.mean(), color='red', linestyle='--', label=f'Avg: ${monthly_fuel.mean():.2f}')
+    ax3.legend()
+
+    # 4d. Optimal Operating Windows
+    ax4 = axes[1, 1]
+    opportunity_score = metrics['opportunity_score']
+    colors = matplotlib.colormaps['RdYlGn']((opportunity_score.values + 1) / 2)
+    ax4.bar(MONTH_NAMES, opportunity_score.values, color=colors, edgecolor='black')
+    ax4.set_title('Operating Opportunity Score\n(High Ridership + Low Fuel = Best)')
+    ax4.set_ylabel('Score')
+    ax4.axhline(y=0, color='black', linestyle='-', linewidth=0.5)
+
+    return _save(fig, path)
+
+
+RENDERERS = {
+    'fuel_cost_trends.png': render_fuel_cost_trends,
+    'ridership_trends.png': render_ridership_trends,
+    'cost_efficiency.png': render_cost_efficiency,
+    'schedule_optimization.png': render_schedule_optimization,
+}
+
+# Columns of the cleaned frame each figure reads (besides Date)
+CHART_COLUMNS = {
+    'fuel_cost_trends.png': ['DieselPrice', 'GasolinePrice', 'EstimatedFuelCostPerMonth'],
+    'ridership_trends.png': ['BusRidership', 'RailRidership', 'OtherTransitRidership'],
+    'cost_efficiency.png': ['BusRidership', 'DieselPrice', 'EstimatedCostPerPassenger',
+                            'EstimatedFuelCostPerMonth'],
+    'schedule_optimization.png': ['TransitEmployment'],
+}
+
+
+def _chart_frame(df):
+    """Date (as datetime64) plus every column some figure reads."""
+    columns = sorted({col for cols in CHART_COLUMNS.values() for col in cols})
+    frame = df[['Date'] + columns].copy()
+    frame['Date'] = pd.to_datetime(frame['Date'])
+    return frame
+
+
+def _render_shared(name, handle, metrics, path):
+    """Worker: rebuild the figure's columns from shared memory and render it."""
+    df = attach_frame(handle, ['Date'] + CHART_COLUMNS[name])
+    return RENDERERS[name](df, metrics, path)
+
+
+def _record_chart(name, rows, path, seconds, peak_rss):
+    started = datetime.datetime.now() - datetime.timedelta(seconds=seconds)
+    metrics = StageMetrics(f"render_{name.rsplit('.', 1)[0]}", seconds=seconds, rows_in=rows,
+                           peak_rss_mb=peak_rss, cache='miss', started_at=started.isoformat(timespec='seconds'))
+    metrics.wrote(path)
+    RECORDER.record(metrics)
+
+
+def render_charts(df, metrics, output_dir, jobs=None):
+    """
+    Render every figure into output_dir, returning {file name: path}.
+
+    jobs=1 renders in this process; otherwise the figures are rendered by up to jobs
+    worker processes (default: one per figure, capped at the CPU count). Each figure is
+    recorded as a render_<name> stage (timed where it rendered).
+    """
+    output_dir = Path(output_dir)
+    jobs = jobs or min(len(RENDERERS), os.cpu_count() or 1)
+    frame = _chart_frame(df)
+
+    paths = {}
+    if jobs == 1:
+        for name, render in RENDERERS.items():
+            result = timed_call(render, frame[['Date'] + CHART_COLUMNS[name]], metrics, output_dir / name)
+            paths[name] = result[0]
+            _record_chart(name, len(frame), *result)
+        return paths
+
+    with SharedFrame(frame) as shared, ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {name: pool.submit(timed_call, _render_shared, name, shared.handle(), metrics, output_dir / name)
+                   for name in RENDERERS}
+        for name, future in futures.items():
+            result = future.result()
+            paths[name] = result[0]
+            _record_chart(name, len(frame), *result)
+        return paths
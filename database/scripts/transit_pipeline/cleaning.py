@@ -0,0 +1,466 @@
+"""
+Data Cleaning Stages
+Purpose: Load, clean and derive the bus fleet columns from the raw US DOT extract
+Author: Fleet Management System
+Date: 2026-10-16
+
+Used by 02_data_cleaning.py (streaming / incremental CLI) and by the pipeline runner
+(load -> clean -> derive -> export_cleaned stages).
+"""
+
+import bisect
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .config import (AVG_MILES_PER_MONTH, AVG_MPG, COLUMNS_TO_KEEP, COVID_END, COVID_START,
+                     DATE_FORMAT, OUTPUT_FILES, START_DATE)
+from .dataset_cache import load_raw
+from .profiling import ColumnProfiler
+from .serialize import (FormattedFrame, check_options, header_line, join_lines, line_sizes, open_stream,
+                        output_name)
+
+
+def available_columns(header):
+    """Split COLUMNS_TO_KEEP into ({original: new name} present in header, [missing originals])."""
+    available_cols = {}
+    missing_cols = []
+    for original, new_name in COLUMNS_TO_KEEP.items():
+        if original in header:
+            available_cols[original] = new_name
+        else:
+            missing_cols.append(original)
+    return available_cols, missing_cols
+
+
+def parse_dates(dates):
+    """Parse raw dates with the known DOT format, falling back to inference for other extracts."""
+    try:
+        return pd.to_datetime(dates, format=DATE_FORMAT)
+    except ValueError:
+        return pd.to_datetime(dates)
+
+
+def read_filtered_chunks(csv_path, available_cols, stream, chunksize):
+    """
+    Yield raw frames restricted to the kept columns and to rows from START_DATE onwards.
+
+    In stream mode only the kept columns are parsed (usecols + explicit float64 dtypes, so
+    every chunk has the same types as a full read) and the date filter runs per chunk.
+    Otherwise the kept columns come from the columnar cache (see dataset_cache.py).
+    """
+    if stream:
+        dtypes = {col: 'float64' for col in available_cols if col != 'Date'}
+        reader = pd.read_csv(csv_path, usecols=list(available_cols), dtype=dtypes, chunksize=chunksize)
+    else:
+        reader = [load_raw(columns=list(available_cols), csv_path=csv_path)]
+
+    for chunk in reader:
+        chunk['Date'] = parse_dates(chunk['Date'])
+        chunk = chunk[chunk['Date'] >= START_DATE]
+        # usecols returns file order; keep the COLUMNS_TO_KEEP order
+        yield chunk[list(available_cols)]
+
+
+def select_columns(chunk, available_cols):
+    """Rename the kept raw columns to their database names."""
+    return chunk.rename(columns=available_cols)
+
+
+def add_derived_columns(df_clean):
+    """Add the calendar, COVID and fuel cost fields (in place) and return the frame."""
+    # Year, Month for grouping
+    df_clean['Year'] = df_clean['Date'].dt.year
+    df_clean['Month'] = df_clean['Date'].dt.month
+    df_clean['Quarter'] = df_clean['Date'].dt.quarter
+
+    # COVID period flag
+    df_clean['IsCOVIDPeriod'] = (df_clean['Date'] >= COVID_START) & (df_clean['Date'] <= COVID_END)
+
+    # Calculate cost per passenger (if we have both ridership and fuel price)
+    if 'BusRidership' in df_clean.columns and 'DieselPrice' in df_clean.columns:
+        gallons_per_month = AVG_MILES_PER_MONTH / AVG_MPG
+
+        df_clean['EstimatedFuelCostPerMonth'] = df_clean['DieselPrice'] * gallons_per_month
+        df_clean['EstimatedCostPerPassenger'] = df_clean['EstimatedFuelCostPerMonth'] / df_clean['BusRidership']
+
+    return df_clean
+
+
+def clean_chunk(chunk, available_cols):
+    """Rename the kept columns and add the calculated fields."""
+    return add_derived_columns(select_columns(chunk, available_cols))
+
+
+class CleanedWriter:
+    """
+    Append cleaned chunks to every output file, writing each header exactly once.
+
+    Each chunk's columns are formatted once (serialize.FormattedFrame) and every output joins
+    the text of its own columns; precision sets the significant digits of written floats
+    (None keeps the exact repr). Outputs are plain CSV by default, or gzip / zstd compressed
+    CSV, or Parquet (fmt='parquet', compression naming the codec); call close() after the
+    last chunk.
+
+    For plain CSV the byte offset of every data row is recorded per file so a later
+    --incremental run can truncate a file at its first changed month and rewrite only the
+    tail. With resume set to (previous manifest, first changed date) the existing files are
+    patched instead of rewritten.
+    """
+
+    def __init__(self, output_dir, columns, resume=None, precision=None, fmt='csv', compression=None):
+        check_options(fmt, compression)
+        self.precision = precision
+        self.fmt = fmt
+        self.compression = compression
+        self.patchable = fmt == 'csv' and compression is None
+        self.outputs = []
+        for name, (cols, required) in OUTPUT_FILES.items():
+            if required is not None and required not in columns:
+                continue
+            cols = list(columns) if cols is None else [c for c in cols if c in columns]
+            name = output_name(name, fmt, compression)
+            self.outputs.append({'name': name, 'path': output_dir / name, 'cols': cols,
+                                 'required': required, 'rows': 0, 'started': False,
+                                 'dates': [], 'offsets': [], 'size': 0, 'stream': None})
+        if resume is not None:
+            if not self.patchable:
+                raise ValueError("Only plain CSV outputs can be patched incrementally")
+            self._truncate(*resume)
+
+    def _truncate(self, previous, first_date):
+        """Cut each file just before its first row dated first_date or later."""
+        for out in self.outputs:
+            index = previous.outputs[out['name']]
+            keep = bisect.bisect_left(index['dates'], first_date)
+            out['dates'] = index['dates'][:keep]
+            out['offsets'] = index['offsets'][:keep]
+            out['size'] = index['offsets'][keep] if keep < len(index['offsets']) else index['size']
+            with open(out['path'], 'r+b') as f:
+                f.truncate(out['size'])
+            out['started'] = True
+
+    def write(self, df_clean):
+        if self.fmt == 'parquet':
+            self._write_parquet(df_clean)
+            return
+        formatted = FormattedFrame(df_clean, self.precision)
+        for out in self.outputs:
+            mask = None
+            if out['required'] is not None:
+                mask = df_clean[out['required']].notna().to_numpy()
+            lines = formatted.lines(out['cols'], mask)
+            header = '' if out['started'] else header_line(out['cols'])
+            body = join_lines(lines)
+            data = (header + body).encode('utf-8')
+
+            if self.patchable:
+                out['size'] += len(header.encode('utf-8'))
+                starts = out['size'] + np.concatenate([[0], np.cumsum(line_sizes(lines, body))])
+                dates = formatted.column('Date')
+                out['dates'].extend((dates if mask is None else dates[mask]).tolist())
+                out['offsets'].extend(starts[:-1].tolist())
+                out['size'] = int(starts[-1])
+                with open(out['path'], 'ab' if out['started'] else 'wb') as f:
+                    f.write(data)
+            else:
+                if out['stream'] is None:
+                    out['stream'] = open_stream(out['path'], self.compression)
+                out['stream'].write(data)
+            out['started'] = True
+            out['rows'] += len(lines)
+
+    def _write_parquet(self, df_clean):
+        """One row group per chunk and output, from a single Arrow conversion of the chunk."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(df_clean, preserve_index=False).replace_schema_metadata(None)
+        for out in self.outputs:
+            part = table.select(out['cols'])
+            if out['required'] is not None:
+                part = part.filter(pc.is_valid(part[out['required']]))
+            if out['stream'] is None:
+                out['stream'] = pq.ParquetWriter(out['path'], part.schema,
+                                                 compression=self.compression or 'snappy')
+            else:
+                part = part.cast(out['stream'].schema)
+            out['stream'].write_table(part)
+            out['started'] = True
+            out['rows'] += part.num_rows
+
+    def close(self):
+        for out in self.outputs:
+            if out['stream'] is not None:
+                out['stream'].close()
+                out['stream'] = None
+                out['size'] = out['path'].stat().st_size
+
+    def index(self):
+        """Per-file row index stored in the cleaning manifest (no offsets when not patchable)."""
+        return {out['name']: {'size': out['size'], 'dates': out['dates'],
+                              'offsets': out['offsets'] if self.patchable else None}
+                for out in self.outputs}
+
+
+class CleaningManifest:
+    """
+    State of the previous run: a content hash per raw Date row plus the row index of each output.
+
+    The fingerprint covers the kept columns and every constant that feeds a derived column, so
+    changing the cleaning rules invalidates the manifest and forces a full rebuild.
+    """
+
+    def __init__(self, fingerprint, rows=None, outputs=None):
+        self.fingerprint = fingerprint
+        self.rows = rows if rows is not None else {}
+        self.outputs = outputs if outputs is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cls(data.get('fingerprint'), data.get('rows'), data.get('outputs'))
+
+    def save(self, path):
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': self.fingerprint, 'rows': self.rows, 'outputs': self.outputs}, f)
+        os.replace(tmp_path, path)
+
+    def matches(self, output_dir, fingerprint):
+        """True if the manifest was written by the same rules and no output was touched since."""
+        if self.fingerprint != fingerprint or not self.outputs:
+            return False
+        for name, index in self.outputs.items():
+            if index.get('offsets') is None:
+                return False
+            path = output_dir / name
+            if not path.exists() or path.stat().st_size != index['size']:
+                return False
+        return True
+
+
+def config_fingerprint(available_cols, precision=None, fmt='csv', compression=None):
+    """Hash of everything besides the raw values that determines the cleaned output."""
+    config = {
+        'columns': available_cols,
+        'serialization': [precision, fmt, compression],
+        'start': START_DATE,
+        'covid': [COVID_START, COVID_END],
+        'fuel': [AVG_MILES_PER_MONTH, AVG_MPG],
+        'outputs': OUTPUT_FILES,
+        'pandas': pd.__version__,
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def row_hashes(chunk):
+    """Content hash of every raw row (kept columns only), keyed by ISO date."""
+    dates = chunk['Date'].dt.strftime('%Y-%m-%d')
+    hashes = pd.util.hash_pandas_object(chunk, index=False)
+    return dict(zip(dates, (f'{h:016x}' for h in hashes)))
+
+
+class ChangeTracker:
+    """
+    Compare raw chunks with the previous manifest and pass on only the rows that need cleaning.
+
+    Rows before the first new or changed month are dropped; everything from that month on is
+    kept, because the outputs are date-ordered files and are rewritten from that point. If the
+    source drops a month or is not sorted by date, the run falls back to a full rebuild.
+    """
+
+    def __init__(self, previous):
+        self.previous = previous
+        self.first_changed = None
+        self.changed = 0
+        self.new = 0
+        self.last_date = None
+        self.needs_rebuild = False
+
+    def filter(self, chunk, hashes):
+        dates = list(hashes)
+        if dates != sorted(dates) or (self.last_date and dates and dates[0] <= self.last_date):
+            self.needs_rebuild = True
+        if dates:
+            self.last_date = dates[-1]
+
+        old = self.previous.rows
+        self.new += sum(1 for d in dates if d not in old)
+        self.changed += sum(1 for d in dates if d in old and old[d] != hashes[d])
+
+        if self.first_changed is None:
+            dirty = [old.get(d) != hashes[d] for d in dates]
+            if not any(dirty):
+                return chunk.iloc[:0]
+            start = dirty.index(True)
+            self.first_changed = dates[start]
+            return chunk.iloc[start:]
+        return chunk
+
+    def removed(self, rows):
+        return [d for d in self.previous.rows if d not in rows]
+
+
+class CleanedSummary:
+    """Running statistics over cleaned chunks, so the report never needs the full frame."""
+
+    GROUP_METRICS = ['BusRidership', 'DieselPrice']
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = []
+        self.profiler = None
+        self.last_row = None
+        self.groups = None
+        self._stats = None
+
+    def update(self, df_clean):
+        if not self.columns:
+            self.columns = list(df_clean.columns)
+        self.rows += len(df_clean)
+        if len(df_clean) == 0:
+            return
+
+        if self.profiler is None:
+            self.profiler = ColumnProfiler([col for col in self.columns if col != 'Date'])
+        self.profiler.update(df_clean)
+        self._stats = None
+        self.last_row = df_clean.iloc[-1]
+
+        # Sums and counts by (Year, COVID flag, pre-COVID) cover every period mean we report
+        metrics = [c for c in self.GROUP_METRICS if c in df_clean.columns]
+        keys = [df_clean['Year'], df_clean['IsCOVIDPeriod'], (df_clean['Date'] < COVID_START).rename('PreCOVID')]
+        grouped = df_clean[metrics].groupby(keys).agg(['sum', 'count'])
+        self.groups = grouped if self.groups is None else self.groups.add(grouped, fill_value=0)
+
+    def _column_stats(self):
+        """{statistic: {column: value}} from the profiler; ranges only for numeric columns with data."""
+        if self._stats is None:
+            self._stats = {'non_null': {}, 'min': {}, 'max': {}, 'total': {}, 'last_valid': {}}
+            if self.profiler is not None:
+                report = self.profiler.report()
+                self._stats['non_null'] = dict(zip(report['column'], report['non_null'].tolist()))
+                ranged = report[report['numeric'] & (report['non_null'] > 0)]
+                for key, col in (('min', 'min'), ('max', 'max'), ('total', 'sum'), ('last_valid', 'last')):
+                    self._stats[key] = dict(zip(ranged['column'], ranged[col].tolist()))
+        return self._stats
+
+    @property
+    def non_null(self):
+        return self._column_stats()['non_null']
+
+    @property
+    def min(self):
+        return self._column_stats()['min']
+
+    @property
+    def max(self):
+        return self._column_stats()['max']
+
+    @property
+    def total(self):
+        return self._column_stats()['total']
+
+    @property
+    def last_valid(self):
+        return self._column_stats()['last_valid']
+
+    def mean(self, col):
+        count = self.non_null.get(col, 0)
+        return self.total[col] / count if count else np.nan
+
+    def period_mean(self, col, mask):
+        if self.groups is None or col not in self.groups.columns.get_level_values(0):
+            return np.nan
+        selected = self.groups[mask]
+        count = selected[(col, 'count')].sum()
+        return selected[(col, 'sum')].sum() / count if count else np.nan
+
+    def level(self, name):
+        return self.groups.index.get_level_values(name)
+
+
+def run_cleaning(csv_path, output_dir, available_cols, fingerprint, previous=None, stream=False,
+                 chunksize=50_000, precision=None, fmt='csv', compression=None):
+    """
+    Clean the input chunk by chunk and write the outputs.
+
+    With a previous manifest only rows from the first new or changed month onward are cleaned
+    and the outputs are patched in place. Returns (manifest, summary, writer, tracker), or None
+    when the incremental update is not possible and a full rebuild is needed.
+    """
+    manifest = CleaningManifest(fingerprint)
+    tracker = ChangeTracker(previous) if previous is not None else None
+    summary = CleanedSummary()
+    writer = None
+
+    try:
+        for chunk in read_filtered_chunks(csv_path, available_cols, stream, chunksize):
+            hashes = row_hashes(chunk)
+            manifest.rows.update(hashes)
+            if tracker is not None:
+                chunk = tracker.filter(chunk, hashes)
+                if tracker.needs_rebuild:
+                    return None
+                if len(chunk) == 0:
+                    continue
+
+            df_clean = clean_chunk(chunk, available_cols)
+            if writer is None:
+                resume = (previous, tracker.first_changed) if tracker is not None else None
+                writer = CleanedWriter(output_dir, df_clean.columns, resume, precision, fmt, compression)
+            writer.write(df_clean)
+            summary.update(df_clean)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if tracker is not None and tracker.removed(manifest.rows):
+        return None
+
+    if writer is not None:
+        manifest.outputs = writer.index()
+    elif previous is not None:
+        manifest.outputs = previous.outputs
+    return manifest, summary, writer, tracker
+
+
+# =============================================================================
+# PIPELINE STAGES
+# =============================================================================
+
+def load(csv_path):
+    """Stage: raw kept columns from START_DATE onwards, original column names."""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    available_cols, _ = available_columns(header)
+    return next(read_filtered_chunks(csv_path, available_cols, stream=False, chunksize=None))
+
+
+def clean(raw):
+    """Stage: rename the raw columns to their database names."""
+    return select_columns(raw, COLUMNS_TO_KEEP)
+
+
+def derive(df_clean):
+    """Stage: cleaned frame with the calculated fields."""
+    return add_derived_columns(df_clean.copy())
+
+
+def export_cleaned(df_clean, output_dir, precision=None, fmt='csv', compression=None):
+    """Stage: write the four cleaned output files and return their paths."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    writer = CleanedWriter(output_dir, df_clean.columns, precision=precision, fmt=fmt, compression=compression)
+    try:
+        writer.write(df_clean)
+    finally:
+        writer.close()
+    return [out['path'] for out in writer.outputs]
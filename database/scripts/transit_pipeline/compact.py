@@ -0,0 +1,200 @@
+"""
+Compact Typed Frame
+Purpose: Load the cleaned dataset with the narrowest dtype per column, enforced against USDOTTransportationStats
+Author: Fleet Management System
+Date: 2026-10-16
+
+The cleaned CSV parses to float64 for every count with a gap (ridership, fatalities,
+employment), int64 calendar fields and string dates. compact_frame() maps each column of
+USDOTTransportationStats to the narrowest dtype that holds its values and still fits the
+SQL type. The types are read from the deployed 04_create_database.sql, i.e. the types
+03_generate_sql_schema.py (or the schema stage) inferred from the data; the standard
+template in schema.py only stands in until that file exists:
+
+    DATE                   datetime64[s]
+    INT / BIGINT NOT NULL  smallest numpy int, unsigned when >= 0 (Year uint16, Month uint8)
+    INT / BIGINT NULL      smallest nullable Int8/16/32/64 (never wider than the SQL type)
+    DECIMAL(p, s)          float32 when every value round-trips within half a unit of scale s,
+                           else float64; values rounded to s places must fit p digits
+    BIT                    bool
+
+plus a categorical Phase (PreCOVID / COVID / PostCOVID). Other text columns (Agency,
+Region in multi-agency extracts) become categoricals. Values that do not fit their SQL
+type, or NULLs in a NOT NULL column, raise ValueError; integer columns are rounded as
+bulk_load does on insert.
+
+Usage:
+    from transit_pipeline.dataset_cache import load_cleaned
+    df = load_cleaned(columns=['Date', 'BusRidership', 'DieselPrice'], compact=True)
+
+    python -m transit_pipeline.compact                # bytes per row, before and after
+    python -m transit_pipeline.compact ../data/partitioned/Agency=.../us_bus_transit_data_2015_2023.csv
+"""
+
+import argparse
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .config import CLEANED_CSV, SQL_PATH
+from .cube import covid_phase
+from .dataset_cache import load_cleaned
+from .schema import SCHEMA_SQL
+
+TABLE = 'USDOTTransportationStats'
+
+# Value range of each SQL integer type
+SQL_INT_RANGES = {
+    'TINYINT': (0, 2**8 - 1),
+    'SMALLINT': (-2**15, 2**15 - 1),
+    'INT': (-2**31, 2**31 - 1),
+    'BIGINT': (-2**63, 2**63 - 1),
+}
+
+# Candidate dtypes, narrowest first
+UNSIGNED = [np.uint8, np.uint16, np.uint32, np.uint64]
+SIGNED = [np.int8, np.int16, np.int32, np.int64]
+NULLABLE = ['Int8', 'Int16', 'Int32', 'Int64']
+
+_COLUMN_RE = re.compile(r'^\s+(\w+)\s+([A-Z]+(?:\(\d+(?:,\d+)?\))?)(.*)$')
+
+
+def deployed_schema_sql(path=SQL_PATH):
+    """The generated DDL at path (the inferred types), or the standard template before it exists."""
+    path = Path(path)
+    return path.read_text(encoding='utf-8') if path.exists() else SCHEMA_SQL
+
+
+def stats_sql_types(schema_sql=None, table=TABLE):
+    """
+    {column: (SQL type, nullable)} of a CREATE TABLE in the DDL (identity and timestamp
+    columns excluded); the deployed DDL by default.
+    """
+    if schema_sql is None:
+        schema_sql = deployed_schema_sql()
+    body = schema_sql.split(f'CREATE TABLE {table} (', 1)[1].split('\n);', 1)[0]
+    types = {}
+    for line in body.splitlines():
+        match = _COLUMN_RE.match(line.split('--')[0])
+        if not match:
+            continue
+        col, sql_type, rest = match.groups()
+        if 'IDENTITY' in rest or sql_type.startswith('DATETIME'):
+            continue
+        types[col] = (sql_type, 'NOT NULL' not in rest)
+    return types
+
+
+def _decimal_spec(sql_type):
+    """(precision, scale) of a DECIMAL type, None otherwise."""
+    match = re.match(r'DECIMAL\((\d+),(\d+)\)', sql_type)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def _integer_dtype(col, values, sql_type, nullable):
+    """Narrowest dtype (within the SQL type) holding values, a float64 array with NaN for NULL."""
+    low, high = SQL_INT_RANGES[sql_type]
+    present = values[~np.isnan(values)]
+    if not nullable and len(present) < len(values):
+        raise ValueError(f"{col}: NULL in a NOT NULL {sql_type} column")
+    lo, hi = (present.min(), present.max()) if len(present) else (0, 0)
+    if lo < low or hi > high:
+        raise ValueError(f"{col}: values {lo:g}..{hi:g} do not fit {sql_type}")
+
+    if nullable:
+        for dtype in NULLABLE:
+            info = np.iinfo(dtype.lower())
+            if info.min <= lo and hi <= info.max:
+                return dtype
+    for dtype in (UNSIGNED if lo >= 0 else SIGNED):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return np.int64
+
+
+def _column(col, series, sql_type, nullable):
+    if sql_type == 'DATE':
+        return pd.to_datetime(series).astype('datetime64[s]')
+    if sql_type == 'BIT':
+        if series.dtype == bool:
+            return series
+        flags = series.map({True: True, False: False, 'True': True, 'False': False, 1: True, 0: False})
+        if flags.isna().any():
+            raise ValueError(f"{col}: values other than True/False in a BIT column")
+        return flags.astype(bool)
+
+    values = pd.to_numeric(series).to_numpy(dtype='float64', na_value=np.nan)
+    if sql_type in SQL_INT_RANGES:
+        values = np.round(values)
+        dtype = _integer_dtype(col, values, sql_type, nullable)
+        if isinstance(dtype, str):
+            return pd.Series(pd.array(np.where(np.isnan(values), None, values), dtype=dtype), index=series.index)
+        return pd.Series(values.astype(dtype), index=series.index)
+
+    spec = _decimal_spec(sql_type)
+    if not nullable and np.isnan(values).any():
+        raise ValueError(f"{col}: NULL in a NOT NULL {sql_type} column")
+    if spec is not None:
+        precision, scale = spec
+        present = ~np.isnan(values)
+        largest = np.abs(np.round(values[present], scale)).max() if present.any() else 0.0
+        if largest >= 10.0 ** (precision - scale):
+            raise ValueError(f"{col}: |value| {largest:g} does not fit {sql_type}")
+        narrow = values.astype(np.float32)
+        if np.all(np.abs(narrow[present].astype('float64') - values[present]) <= 0.5 * 10.0**-scale):
+            return pd.Series(narrow, index=series.index)
+    return pd.Series(values, index=series.index)
+
+
+def compact_frame(df, phase=True, sql_types=None):
+    """
+    df (a cleaned frame, any subset of its columns) with each column in its narrowest dtype.
+
+    phase adds the categorical Phase column when the frame has a Date; sql_types defaults to
+    the deployed USDOTTransportationStats types (stats_sql_types()).
+    """
+    sql_types = stats_sql_types() if sql_types is None else sql_types
+    data = {}
+    for col in df.columns:
+        series = df[col]
+        if col in sql_types:
+            data[col] = _column(col, series, *sql_types[col])
+        elif not pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_datetime64_any_dtype(series):
+            data[col] = series.astype('category')
+        else:
+            data[col] = series
+    compact = pd.DataFrame(data, index=df.index)
+    if phase and 'Date' in compact.columns:
+        compact['Phase'] = covid_phase(compact['Date'])
+    return compact
+
+
+def bytes_per_row(df):
+    """Memory of df per row (deep, so string objects count)."""
+    return df.memory_usage(deep=True, index=False).sum() / max(len(df), 1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the cleaned frame with its compact typed form')
+    parser.add_argument('input', nargs='?', default=CLEANED_CSV, help='Cleaned-format CSV (default: cleaned dataset)')
+    args = parser.parse_args()
+
+    wide = load_cleaned(csv_path=args.input)
+    sql_types = stats_sql_types()
+    compact = compact_frame(wide, sql_types=sql_types)
+
+    print("=" * 80)
+    print("COMPACT TYPED FRAME")
+    print("=" * 80)
+    print(f"  {'Column':<28} {'Loaded':<16} {'Compact':<16} {'SQL type'}")
+    print("  " + "-" * 76)
+    for col in compact.columns:
+        loaded = str(wide[col].dtype) if col in wide.columns else '-'
+        sql_type = sql_types.get(col, ('-', True))
+        print(f"  {col:<28} {loaded:<16} {str(compact[col].dtype):<16} {sql_type[0]}{'' if sql_type[1] else ' NOT NULL'}")
+    before, after = bytes_per_row(wide), bytes_per_row(compact)
+    print("=" * 80)
+    print(f"✓ {len(wide):,} rows: {before:,.1f} -> {after:,.1f} bytes/row ({before / after:.1f}x smaller)")
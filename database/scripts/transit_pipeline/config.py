@@ -0,0 +1,87 @@
+"""
+Pipeline Configuration
+Purpose: Paths and constants shared by the pipeline stages and the numbered scripts
+Author: Fleet Management System
+Date: 2026-10-16
+"""
+
+from pathlib import Path
+
+# Paths
+SCRIPTS_DIR = Path(__file__).parent.parent
+DATABASE_DIR = SCRIPTS_DIR.parent
+RAW_CSV = DATABASE_DIR.parent / 'docs' / 'datafromus' / 'Monthly_Transportation_Statistics.csv'
+CLEANED_DIR = DATABASE_DIR / 'data' / 'cleaned'
+CLEANED_CSV = CLEANED_DIR / 'us_bus_transit_data_2015_2023.csv'
+ANALYSIS_DIR = DATABASE_DIR / 'data' / 'analysis_output'
+CUBE_PATH = ANALYSIS_DIR / 'aggregate_cube.feather'
+FORECAST_PATH = ANALYSIS_DIR / 'forecasts.csv'
+MONTHLY_STATS_PATH = ANALYSIS_DIR / 'monthly_stats.csv'
+ALERTS_PATH = ANALYSIS_DIR / 'alerts.csv'
+MAINTENANCE_SCORES_PATH = ANALYSIS_DIR / 'maintenance_scores.csv'
+MAINTENANCE_ALERTS_PATH = ANALYSIS_DIR / 'maintenance_alerts.csv'
+CACHE_DIR = DATABASE_DIR / 'data' / 'cache'
+KPI_STATE_PATH = CACHE_DIR / 'kpi_state.json'
+SYNTHETIC_DIR = DATABASE_DIR / 'data' / 'synthetic'
+PARTITIONED_DIR = DATABASE_DIR / 'data' / 'partitioned'
+BENCHMARK_DIR = DATABASE_DIR / 'data' / 'benchmarks'
+SQL_PATH = SCRIPTS_DIR / '04_create_database.sql'
+
+# Raw DOT dates look like '01/01/1947 12:00:00 AM'
+DATE_FORMAT = '%m/%d/%Y %I:%M:%S %p'
+
+START_DATE = '2015-01-01'
+COVID_START = '2020-03-01'
+COVID_END = '2021-12-31'
+
+# Assume average bus gets 6 MPG and travels 30,000 miles/month
+AVG_MILES_PER_MONTH = 30000
+AVG_MPG = 6
+
+COLUMNS_TO_KEEP = {
+    # Date
+    'Date': 'Date',
+
+    # Bus Ridership (PRIMARY METRIC)
+    'Transit Ridership - Fixed Route Bus - Adjusted': 'BusRidership',
+    'Transit Ridership - Urban Rail - Adjusted': 'RailRidership',
+    'Transit Ridership - Other Transit Modes - Adjusted': 'OtherTransitRidership',
+
+    # Fuel Prices (COST ANALYSIS)
+    'Highway Fuel Price - On-highway Diesel': 'DieselPrice',
+    'Highway Fuel Price - Regular Gasoline': 'GasolinePrice',
+
+    # Highway/Traffic Data (ROUTE OPTIMIZATION)
+    'Highway Vehicle Miles Traveled - All Systems': 'HighwayMilesTraveled',
+    'Highway Fatalities': 'HighwayFatalities',
+    'Highway Fatalities Per 100 Million Vehicle Miles Traveled': 'FatalityRate',
+
+    # Employment (WORKFORCE PLANNING)
+    'Transportation Employment - Transit and ground passenger transportation': 'TransitEmployment',
+    'Transportation Employment - Truck Transportation': 'TruckEmployment',
+
+    # Economic Indicators
+    'Unemployment Rate - Seasonally Adjusted': 'UnemploymentRate',
+    'Real Gross Domestic Product - Seasonally Adjusted': 'GDP',
+
+    # Vehicle Sales (MARKET TRENDS)
+    'Heavy truck sales': 'HeavyTruckSales',
+    'Auto sales': 'AutoSales',
+}
+
+# Cleaned output projections: file name -> (columns, column that must be non-null)
+OUTPUT_FILES = {
+    'us_bus_transit_data_2015_2023.csv': (None, None),
+    'ridership_data.csv': (['Date', 'Year', 'Month', 'Quarter', 'BusRidership', 'RailRidership',
+                            'OtherTransitRidership', 'IsCOVIDPeriod'], 'BusRidership'),
+    'fuel_price_data.csv': (['Date', 'Year', 'Month', 'DieselPrice', 'GasolinePrice'], 'DieselPrice'),
+    'dashboard_data.csv': (['Date', 'Year', 'Month', 'Quarter', 'BusRidership', 'DieselPrice',
+                            'HighwayMilesTraveled', 'TransitEmployment', 'IsCOVIDPeriod',
+                            'EstimatedCostPerPassenger'], None),
+}
+
+# Incremental cleaning state, written next to the cleaned CSVs
+MANIFEST_NAME = '.cleaning_manifest.json'
+
+CHART_FILES = ['fuel_cost_trends.png', 'ridership_trends.png', 'cost_efficiency.png',
+               'schedule_optimization.png']
@@ -0,0 +1,227 @@
+"""
+Fleet Cost Model
+Purpose: Fuel cost of a parameterized fleet, evaluated for thousands of what-if scenarios at once
+Author: Fleet Management System
+Date: 2026-10-16
+
+A scenario is one set of fleet parameters:
+
+    buses               fleet size
+    annual_miles        miles per bus per year
+    mpg                 diesel bus fuel economy (other fuel types scale it, see FUEL_TYPES)
+    Diesel, CNG,        fleet mix: share of the fleet per BusFleet.FuelType (normalized to 1;
+    Electric, Hybrid    without a Diesel axis, diesel is the remainder of the others)
+    fare                average fare per passenger
+    fuel_per_passenger  diesel gallons of fuel per passenger trip
+    savings             share of the fuel cost an optimization program saves
+    diesel_scale        multiplier on the diesel price series (price shock)
+
+scenario_grid() crosses any number of values per parameter into a (scenarios x parameters)
+frame. evaluate() prices every scenario against a monthly DieselPrice series in one
+broadcast: each fuel type's price per diesel gallon equivalent is linear in the diesel
+price, so the cost per mile is an outer product of a per-scenario diesel weight and the
+series, plus a per-scenario fixed part - no loop over scenarios or months.
+
+Usage:
+    python -m transit_pipeline.costmodel --mpg 4 5 6 --electric 0 0.25 0.5 --diesel-scale 0.8 1 1.2
+    python -m transit_pipeline.costmodel --buses 20 50 100 --annual-miles 25000 30000 40000 \\
+        --rows buses --cols mpg --output scenarios.csv
+"""
+
+import argparse
+import time
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .config import AVG_MPG, CLEANED_CSV
+
+# Per BusFleet.FuelType: (miles per diesel gallon equivalent relative to a diesel bus,
+# share of the diesel price in its energy price, fixed energy price per DGE in $).
+# CNG is bought on its own market; electric buses at ~$0.13/kWh, 40.7 kWh per DGE.
+FUEL_TYPES = {
+    'Diesel': (1.00, 1.00, 0.00),
+    'CNG': (0.88, 0.00, 2.30),
+    'Electric': (4.00, 0.00, 5.30),
+    'Hybrid': (1.25, 1.00, 0.00),
+}
+
+# Summary columns of evaluate(), in order
+SUMMARY_COLUMNS = ['AnnualGallons', 'MeanMonthlyCost', 'PeakMonthlyCost', 'AnnualCost',
+                   'CurrentAnnualCost', 'PotentialSavings', 'FuelShareOfFare']
+
+
+@dataclass
+class CostModel:
+    buses: int = 20
+    annual_miles: float = 30000      # miles per bus per year
+    mpg: float = AVG_MPG             # diesel bus fuel economy
+    fare: float = 2.50               # average fare
+    fuel_per_passenger: float = 0.15  # diesel gallons per passenger trip
+    savings: float = 0.15            # optimization savings share
+    diesel_scale: float = 1.0
+    mix: dict = field(default_factory=lambda: {'Diesel': 1.0})
+
+    def parameters(self):
+        """The scalar parameters plus one share per fuel type."""
+        params = {name: value for name, value in asdict(self).items() if name != 'mix'}
+        params.update({fuel: self.mix.get(fuel, 0.0) for fuel in FUEL_TYPES})
+        return params
+
+    def summary(self, diesel):
+        """evaluate() summary row of this one scenario."""
+        return evaluate(scenario_grid(self), diesel)[1].iloc[0]
+
+    def annual_cost(self, diesel_price):
+        """Fleet fuel cost of a year at a constant diesel price."""
+        return self.summary([diesel_price])['CurrentAnnualCost']
+
+    def annual_gallons(self):
+        """Diesel gallon equivalents the fleet burns in a year."""
+        return gallons_per_mile(scenario_grid(self)).sum() * self.buses * self.annual_miles
+
+
+# =============================================================================
+# SCENARIOS
+# =============================================================================
+
+def scenario_grid(model=None, **axes):
+    """
+    Every combination of the axis values (one array per parameter), the other parameters
+    taken from model. Fleet mixes whose shares do not fit in one fleet are dropped.
+    """
+    base = (model or CostModel()).parameters()
+    unknown = set(axes) - set(base)
+    if unknown:
+        raise ValueError(f"Unknown cost model parameter(s): {', '.join(sorted(unknown))}")
+
+    values = [np.atleast_1d(np.asarray(axes.get(name, value), dtype='float64')) for name, value in base.items()]
+    mesh = np.meshgrid(*values, indexing='ij')
+    grid = pd.DataFrame({name: column.ravel() for name, column in zip(base, mesh)})
+
+    fuels = list(FUEL_TYPES)
+    if 'Diesel' not in axes and any(fuel in axes for fuel in fuels):
+        grid['Diesel'] = 1.0 - grid[fuels[1:]].sum(axis=1)
+    shares = grid[fuels].to_numpy()
+    total = shares.sum(axis=1)
+    valid = (shares >= -1e-12).all(axis=1) & (total > 0)
+    grid.loc[:, fuels] = np.clip(shares, 0, None) / np.where(total > 0, total, 1)[:, None]
+    return grid[valid].reset_index(drop=True)
+
+
+def gallons_per_mile(grid):
+    """(scenarios x fuel types) diesel gallon equivalents per fleet-average mile."""
+    relative_mpg = np.array([spec[0] for spec in FUEL_TYPES.values()])
+    return grid[list(FUEL_TYPES)].to_numpy() / (grid['mpg'].to_numpy()[:, None] * relative_mpg)
+
+
+def mileage_coefficients(grid):
+    """(diesel weight, fixed cost) per scenario: a mile costs diesel weight x diesel price + fixed cost."""
+    gallons = gallons_per_mile(grid)
+    diesel_share = np.array([spec[1] for spec in FUEL_TYPES.values()])
+    fixed_price = np.array([spec[2] for spec in FUEL_TYPES.values()])
+    return gallons @ diesel_share * grid['diesel_scale'].to_numpy(), gallons @ fixed_price
+
+
+def cost_per_mile(grid, diesel):
+    """(scenarios x months) fuel cost per mile against a diesel price series (one outer product)."""
+    diesel_weight, fixed = mileage_coefficients(grid)
+    return np.outer(diesel_weight, np.asarray(diesel, dtype='float64')) + fixed[:, None]
+
+
+def evaluate(grid, diesel):
+    """
+    (monthly fleet fuel cost (scenarios x months), summary frame) of every scenario against
+    a diesel price series; the summary is the grid plus SUMMARY_COLUMNS:
+
+        AnnualGallons      diesel gallon equivalents per year
+        Mean/PeakMonthlyCost over the series
+        AnnualCost         12 x the mean of the last 12 months
+        CurrentAnnualCost  a year at the latest price
+        PotentialSavings   AnnualCost x savings
+        FuelShareOfFare    fuel cost per passenger at the latest price, % of the fare
+    """
+    per_mile = cost_per_mile(grid, diesel)
+    fleet_miles = grid['buses'].to_numpy() * grid['annual_miles'].to_numpy()
+    monthly = per_mile * (fleet_miles / 12)[:, None]
+
+    summary = grid.copy()
+    summary['AnnualGallons'] = fleet_miles * gallons_per_mile(grid).sum(axis=1)
+    with np.errstate(invalid='ignore'):
+        summary['MeanMonthlyCost'] = monthly.mean(axis=1)
+        summary['PeakMonthlyCost'] = monthly.max(axis=1)
+        summary['AnnualCost'] = monthly[:, -12:].mean(axis=1) * 12
+    summary['CurrentAnnualCost'] = monthly[:, -1] * 12
+    summary['PotentialSavings'] = summary['AnnualCost'] * grid['savings']
+    summary['FuelShareOfFare'] = fare_share(grid, per_mile)[:, -1]
+    return monthly, summary
+
+
+def fare_share(grid, per_mile):
+    """Fuel cost per passenger as % of the fare, from a (scenarios x months) cost per mile."""
+    # A passenger trip burns fuel_per_passenger diesel gallons, i.e. that many x mpg miles
+    miles_per_passenger = grid['fuel_per_passenger'].to_numpy() * grid['mpg'].to_numpy()
+    return per_mile * (miles_per_passenger / grid['fare'].to_numpy() * 100)[:, None]
+
+
+def fare_share_curve(prices, model=None):
+    """Fuel share of the fare (%) of one fleet at each diesel price."""
+    grid = scenario_grid(model)
+    return fare_share(grid, cost_per_mile(grid, prices))[0]
+
+
+def sensitivity(summary, rows, cols, value='AnnualCost'):
+    """Mean of value over the other parameters, for every rows x cols pair."""
+    return summary.pivot_table(index=rows, columns=cols, values=value, aggfunc='mean')
+
+
+def diesel_series(df):
+    """Monthly DieselPrice of the cleaned frame, gaps dropped, oldest first."""
+    monthly = df[['Date', 'DieselPrice']].assign(Date=pd.to_datetime(df['Date'])).dropna()
+    return monthly.sort_values('Date')['DieselPrice'].to_numpy(dtype='float64')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fleet fuel cost what-if scenarios over the DieselPrice series')
+    parser.add_argument('--input', default=CLEANED_CSV, help='Cleaned CSV (default: cleaned dataset)')
+    for name, value in CostModel().parameters().items():
+        flag = f"--{name.lower().replace('_', '-')}"
+        parser.add_argument(flag, dest=name, type=float, nargs='+',
+                            help=f'Values to try (default: {value:g})')
+    # Table axes are grid columns; accept them in any case (--rows electric -> Electric)
+    parameters = list(CostModel().parameters())
+    by_name = {name.lower(): name for name in parameters}
+
+    def parameter(value):
+        return by_name.get(value.lower(), value)
+
+    parser.add_argument('--rows', default='buses', type=parameter, choices=parameters,
+                        help='Sensitivity table rows (default: buses)')
+    parser.add_argument('--cols', default='mpg', type=parameter, choices=parameters,
+                        help='Sensitivity table columns (default: mpg)')
+    parser.add_argument('--value', default='AnnualCost', choices=SUMMARY_COLUMNS,
+                        help='Sensitivity table value (default: AnnualCost)')
+    parser.add_argument('--output', help='Write every scenario summary to this CSV')
+    args = parser.parse_args()
+
+    from .dataset_cache import load_cleaned
+    diesel = diesel_series(load_cleaned(csv_path=args.input))
+    axes = {name: values for name, values in vars(args).items() if name in parameters and values is not None}
+
+    start = time.perf_counter()
+    grid = scenario_grid(**axes)
+    monthly, summary = evaluate(grid, diesel)
+    seconds = time.perf_counter() - start
+
+    print("=" * 80)
+    print("FLEET COST SCENARIOS")
+    print("=" * 80)
+    print(f"✓ {len(grid):,} scenarios x {len(diesel)} months evaluated in {seconds * 1000:.1f} ms")
+    print(f"  {args.value}: {summary[args.value].min():,.2f} .. {summary[args.value].max():,.2f}")
+    print(f"\n{args.value} by {args.rows} (rows) and {args.cols} (columns):")
+    with pd.option_context('display.float_format', '{:,.2f}'.format, 'display.width', 120):
+        print(sensitivity(summary, args.rows, args.cols, args.value))
+    if args.output:
+        summary.to_csv(args.output, index=False)
+        print(f"✓ Saved: {args.output}")
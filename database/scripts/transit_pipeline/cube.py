@@ -0,0 +1,282 @@
+"""
+Aggregate Cube Stage
+Purpose: Roll every metric up by year / quarter / month and COVID phase in one pass
+Author: Fleet Management System
+Date: 2026-10-16
+
+The cleaned rows are grouped once at the finest grain (Year, Quarter, Month, Phase) and
+every coarser grain is rolled up from that, keeping count / sum / min / max per metric so
+means can be derived and the cube can be rolled up further without the rows. The result
+is a long table with one row per (Grain, keys) combination:
+
+    Grain            Year  Quarter  Month  Phase      RowCount  DieselPrice_count  DieselPrice_sum ...
+    All              -     -        -      -          108       108                 ...
+    Year             2015  -        -      -          12        12                  ...
+    Month+Phase      -     -        3      PreCOVID   5         5                   ...
+
+Phases: PreCOVID (before COVID_START), COVID (COVID_START..COVID_END), PostCOVID.
+
+The analysis metrics (and through them the charts and dashboard_data.json) are read from
+the cube. It is persisted as an Arrow/Feather file and can be loaded into a summary table
+(USDOTAggregateCube) for the API.
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - the CSV fallback is used instead
+    pa = None
+    feather = None
+
+from .bulk_load import is_sqlite
+from .config import COVID_END, COVID_START, CUBE_PATH
+
+CUBE_TABLE = 'USDOTAggregateCube'
+
+PHASES = ['PreCOVID', 'COVID', 'PostCOVID']
+KEYS = ['Year', 'Quarter', 'Month', 'Phase']
+STATS = ['count', 'sum', 'min', 'max']
+
+# Grouping sets, each with and without the COVID phase
+GRAINS = [(), ('Year',), ('Quarter',), ('Month',), ('Year', 'Quarter'), ('Year', 'Month')]
+
+# Calendar columns are keys, not metrics
+NON_METRICS = {'Date', 'Year', 'Quarter', 'Month', 'IsCOVIDPeriod'}
+
+
+def covid_phase(dates):
+    """PreCOVID / COVID / PostCOVID label for each date."""
+    dates = pd.to_datetime(dates)
+    phase = np.select([dates < pd.Timestamp(COVID_START), dates <= pd.Timestamp(COVID_END)],
+                      ['PreCOVID', 'COVID'], 'PostCOVID')
+    return pd.Categorical(phase, categories=PHASES)
+
+
+def grain_name(keys):
+    return '+'.join(keys) if keys else 'All'
+
+
+def metric_columns(df):
+    return [col for col in df.columns if col not in NON_METRICS and pd.api.types.is_numeric_dtype(df[col])]
+
+
+def build_cube(df, metrics=None, by=()):
+    """
+    Cube DataFrame of the cleaned (derived) frame; metrics default to every numeric column.
+
+    by names partition columns (e.g. Agency) that are kept as extra keys of every grain,
+    giving one cube per partition in a single pass.
+    """
+    by = list(by)
+    metrics = metric_columns(df.drop(columns=by)) if metrics is None else list(metrics)
+    dates = pd.to_datetime(df['Date'])
+    # Aggregate in float64 whatever the stored dtypes (nullable Int, float32 in compact frames)
+    frame = df[by + metrics].astype({metric: 'float64' for metric in metrics})
+    frame['Year'] = dates.dt.year
+    frame['Quarter'] = dates.dt.quarter
+    frame['Month'] = dates.dt.month
+    frame['Phase'] = covid_phase(dates)
+    frame['_rows'] = 1
+
+    # The only pass over the rows: finest grain
+    grouped = frame.groupby(by + KEYS, observed=True, sort=True)
+    base = grouped[metrics].agg(STATS)
+    base.columns = [f'{metric}_{stat}' for metric, stat in base.columns]
+    base['RowCount'] = grouped['_rows'].sum()
+    base = base.reset_index()
+    return _finish(_rollup(base, metrics, by), metrics, by)
+
+
+def _rollup(base, metrics, by, grains=None):
+    """Every grouping set of base (a cube at a finer grain), each within the by columns."""
+    # Counts and sums add up, minima and maxima reduce; one reduction per block and grain
+    sum_cols = ['RowCount'] + [f'{m}_{stat}' for m in metrics for stat in ('count', 'sum')]
+    min_cols = [f'{m}_min' for m in metrics]
+    max_cols = [f'{m}_max' for m in metrics]
+
+    parts = []
+    for keys in GRAINS:
+        for with_phase in (False, True):
+            grain_keys = list(keys) + (['Phase'] if with_phase else [])
+            group_keys = by + grain_keys
+            if group_keys:
+                grouped = base.groupby(group_keys, observed=True, sort=True)
+                part = pd.concat([grouped[sum_cols].sum(), grouped[min_cols].min(),
+                                  grouped[max_cols].max()], axis=1).reset_index()
+            else:
+                part = pd.concat([base[sum_cols].sum(), base[min_cols].min(),
+                                  base[max_cols].max()]).to_frame().T.infer_objects()
+            part.insert(0, 'Grain', grain_name(grain_keys))
+            parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+
+def _finish(cube, metrics, by):
+    for key in ('Year', 'Quarter', 'Month'):
+        cube[key] = cube[key].astype('Int16')
+    cube['Phase'] = cube['Phase'].astype(object).where(cube['Phase'].notna(), None)
+    cube['RowCount'] = cube['RowCount'].astype(np.int64)
+    for metric in metrics:
+        cube[f'{metric}_count'] = cube[f'{metric}_count'].astype(np.int64)
+    keys = ['Grain'] + by + KEYS
+    return cube[keys + [col for col in cube.columns if col not in keys]]
+
+
+def combine_cubes(cube, by):
+    """Roll a partitioned cube (built with by) up across the partitions into one cube."""
+    by = list(by)
+    metrics = [col[:-len('_count')] for col in cube.columns if col.endswith('_count')]
+    # Year+Month+Phase is the finest grain kept (a month fixes its quarter); every other
+    # grain rolls up from it
+    finest = cube[cube['Grain'] == grain_name(['Year', 'Month', 'Phase'])].drop(columns=['Grain'] + by)
+    finest['Quarter'] = (finest['Month'] - 1) // 3 + 1
+    finest['Phase'] = pd.Categorical(finest['Phase'], categories=PHASES)
+    return _finish(_rollup(finest, metrics, []), metrics, [])
+
+
+class AggregateCube:
+    """Read access to a cube: statistics of a metric at one grain, optionally within a phase."""
+
+    def __init__(self, table):
+        self.table = table
+        self._grains = None
+        self._slices = {}
+
+    def metrics(self):
+        return [col[:-len('_count')] for col in self.table.columns if col.endswith('_count')]
+
+    def _slice(self, keys, phase):
+        """(row positions, index) of one grain, optionally within a phase; only the column asked for is read."""
+        grain = grain_name(list(keys) + (['Phase'] if phase else []))
+        if (grain, phase) not in self._slices:
+            if self._grains is None:
+                self._grains = self.table.groupby('Grain', sort=False).indices
+            rows = self._grains.get(grain, np.array([], dtype=np.intp))
+            if phase:
+                rows = rows[self.table['Phase'].to_numpy()[rows] == phase]
+            index = None
+            if keys:
+                # int32 like dt.year / dt.month, so results index like a groupby on the rows
+                arrays = [pd.Index(np.asarray(self.table[key].iloc[rows], dtype=np.int32), name=key) for key in keys]
+                index = arrays[0] if len(arrays) == 1 else pd.MultiIndex.from_arrays(arrays)
+            self._slices[(grain, phase)] = (rows, index)
+        return self._slices[(grain, phase)]
+
+    def _stat(self, metric, stat, keys, phase):
+        rows, index = self._slice(tuple(keys), phase)
+        values = self.table[f'{metric}_{stat}'].to_numpy()[rows]
+        if not keys:
+            return values[0] if len(values) else np.nan
+        return pd.Series(values, index=index, name=metric)
+
+    def count(self, metric, keys=(), phase=None):
+        return self._stat(metric, 'count', keys, phase)
+
+    def sum(self, metric, keys=(), phase=None):
+        return self._stat(metric, 'sum', keys, phase)
+
+    def min(self, metric, keys=(), phase=None):
+        return self._stat(metric, 'min', keys, phase)
+
+    def max(self, metric, keys=(), phase=None):
+        return self._stat(metric, 'max', keys, phase)
+
+    def mean(self, metric, keys=(), phase=None):
+        """sum / count (NaN where the metric has no values), like a groupby mean."""
+        total = self.sum(metric, keys, phase)
+        count = self.count(metric, keys, phase)
+        if not keys:
+            return total / count if count else np.nan
+        return (total / count.where(count > 0)).astype('float64')
+
+    def last(self, metric):
+        """Mean of the metric in the latest month that has a value."""
+        monthly = self.mean(metric, ('Year', 'Month')).dropna()
+        return monthly.iloc[-1] if len(monthly) else np.nan
+
+
+# =============================================================================
+# PERSISTENCE
+# =============================================================================
+
+def write_cube(cube, path=CUBE_PATH):
+    """Write the cube as uncompressed Feather (or CSV when pyarrow is not installed)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if pa is None:
+        path = path.with_suffix('.csv')
+        cube.to_csv(path, index=False)
+        return path
+    tmp_path = path.with_suffix('.tmp')
+    feather.write_feather(pa.Table.from_pandas(cube, preserve_index=False), tmp_path,
+                          compression='uncompressed')
+    tmp_path.replace(path)
+    return path
+
+
+def read_cube(path=CUBE_PATH, metrics=None):
+    """AggregateCube from a file written by write_cube (metrics limits the columns read)."""
+    columns = None
+    if metrics is not None:
+        columns = ['Grain'] + KEYS + ['RowCount'] + [f'{m}_{s}' for m in metrics for s in STATS]
+    if pa is None or path.suffix == '.csv':
+        table = pd.read_csv(path.with_suffix('.csv'), usecols=columns)
+    else:
+        table = feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+    return AggregateCube(table)
+
+
+def _table_sql(cube, sqlite):
+    key_types = {'Grain': 'NVARCHAR(40) NOT NULL', 'Year': 'SMALLINT NULL', 'Quarter': 'TINYINT NULL',
+                 'Month': 'TINYINT NULL', 'Phase': 'NVARCHAR(20) NULL'}
+    columns = []
+    for col in cube.columns:
+        if col in key_types:
+            sql_type = key_types[col]
+        elif col == 'RowCount' or col.endswith('_count'):
+            sql_type = 'BIGINT NOT NULL'
+        else:
+            sql_type = 'FLOAT NULL'
+        columns.append(f'{col} {sql_type}')
+    body = ',\n    '.join(columns)
+    if sqlite:
+        return f'CREATE TABLE IF NOT EXISTS {CUBE_TABLE} (\n    {body}\n)'
+    return f"IF OBJECT_ID('{CUBE_TABLE}') IS NULL\nCREATE TABLE {CUBE_TABLE} (\n    {body}\n)"
+
+
+def load_cube_table(conn, cube):
+    """Replace the contents of USDOTAggregateCube (created if missing) in one transaction."""
+    sqlite = is_sqlite(conn)
+    rows = cube.astype(object).where(cube.notna(), None).itertuples(index=False, name=None)
+    rows = [tuple(v.item() if isinstance(v, np.generic) else v for v in row) for row in rows]
+    cursor = conn.cursor()
+    if not sqlite:
+        cursor.fast_executemany = True
+    try:
+        cursor.execute(_table_sql(cube, sqlite))
+        cursor.execute(f'DELETE FROM {CUBE_TABLE}')
+        cursor.executemany(f"INSERT INTO {CUBE_TABLE} ({', '.join(cube.columns)}) "
+                           f"VALUES ({', '.join('?' * len(cube.columns))})", rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return len(rows)
+
+
+# =============================================================================
+# PIPELINE STAGES
+# =============================================================================
+
+def cube(df):
+    """Stage: aggregate cube of the derived frame."""
+    return build_cube(df)
+
+
+def export_cube(cube_table, path=CUBE_PATH):
+    """Stage: write the cube file."""
+    return write_cube(cube_table, path)
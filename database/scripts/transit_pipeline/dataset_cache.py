@@ -0,0 +1,223 @@
+"""
+Columnar Dataset Cache
+Purpose: Share one parsed copy of the raw and cleaned CSVs between the pipeline scripts
+Author: Fleet Management System
+Date: 2026-10-16
+
+Each CSV is stored once as an uncompressed Arrow IPC (Feather v2) file next to a small
+JSON manifest recording the source path, size, mtime and SHA-256. Entries are named by the
+file stem plus a hash of the resolved path, so same-named CSVs in different directories
+(e.g. per-agency partitions) keep separate caches. Loads memory-map the Arrow file and
+read only the requested columns. When the source CSV has changed, or pyarrow is not
+installed, the CSV is parsed as before (and the cache rebuilt when possible).
+
+csv_shape() answers "how many rows and which columns" from the manifest alone, without
+importing pandas or pyarrow.
+
+Usage:
+    from transit_pipeline.dataset_cache import load_raw, load_cleaned
+    df = load_cleaned(columns=['Date', 'DieselPrice'])
+    df = load_cleaned(compact=True)                      # narrow typed frame (compact.py)
+
+    python -m transit_pipeline.dataset_cache             # show cache status
+    python -m transit_pipeline.dataset_cache --refresh   # rebuild the cache from the CSVs
+"""
+
+import argparse
+import csv
+import hashlib
+import importlib.util
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from .config import CACHE_DIR, CLEANED_CSV, RAW_CSV
+from .metrics import RECORDER
+
+# pandas and pyarrow are imported by the functions that read or write data, so that
+# freshness and shape checks (and the pipeline runner) start without them
+HAS_ARROW = importlib.util.find_spec('pyarrow') is not None
+
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_sha256(path):
+    """SHA-256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_key(csv_path):
+    """Resolved path of a source CSV, as recorded in its manifest."""
+    return str(Path(csv_path).resolve())
+
+
+def cache_paths(csv_path, cache_dir=CACHE_DIR):
+    """Return (arrow_path, manifest_path) for a source CSV."""
+    path_hash = hashlib.sha256(_source_key(csv_path).encode('utf-8')).hexdigest()[:16]
+    name = f'{Path(csv_path).stem}-{path_hash}'
+    return cache_dir / f'{name}.arrow', cache_dir / f'{name}.json'
+
+
+def _replace_atomically(target, write):
+    """Call write(tmp_path) on a unique temporary file beside target, then move it into place."""
+    with tempfile.NamedTemporaryFile(dir=target.parent, prefix=f'{target.name}.',
+                                     suffix='.tmp', delete=False) as tmp:
+        tmp_path = Path(tmp.name)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _read_manifest(manifest_path):
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(manifest_path, manifest):
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+    _replace_atomically(manifest_path, write)
+
+
+def is_fresh(csv_path, cache_dir=CACHE_DIR):
+    """
+    True if the cached copy was built from this source CSV and still matches it.
+
+    The manifest must name csv_path as its source. Size and mtime are checked first; only
+    when the mtime moved is the file re-hashed, so touching a file without changing it
+    keeps the cache (and updates the manifest).
+    """
+    if not HAS_ARROW:
+        return False
+    arrow_path, manifest_path = cache_paths(csv_path, cache_dir)
+    manifest = _read_manifest(manifest_path)
+    if manifest is None or not arrow_path.exists():
+        return False
+    if manifest.get('source') != _source_key(csv_path):
+        return False
+
+    stat = Path(csv_path).stat()
+    if stat.st_size != manifest.get('size'):
+        return False
+    if stat.st_mtime_ns == manifest.get('mtime_ns'):
+        return True
+
+    if file_sha256(csv_path) != manifest.get('sha256'):
+        return False
+    manifest['mtime_ns'] = stat.st_mtime_ns
+    _write_manifest(manifest_path, manifest)
+    return True
+
+
+def write_cache(df, csv_path, cache_dir=CACHE_DIR):
+    """Store a frame parsed from csv_path as an Arrow file plus manifest."""
+    if not HAS_ARROW:
+        return None
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    arrow_path, manifest_path = cache_paths(csv_path, cache_dir)
+
+    # Uncompressed so the file can be memory-mapped without decoding
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    _replace_atomically(arrow_path, lambda tmp_path: feather.write_feather(
+        table, tmp_path, compression='uncompressed'))
+
+    stat = Path(csv_path).stat()
+    _write_manifest(manifest_path, {
+        'source': _source_key(csv_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': file_sha256(csv_path),
+        'rows': len(df),
+        'columns': list(df.columns),
+    })
+    return arrow_path
+
+
+def load_csv(csv_path, columns=None, cache_dir=CACHE_DIR, refresh=False):
+    """
+    Load csv_path as pd.read_csv would, via the columnar cache when it is fresh.
+
+    columns limits the result to those columns (in the given order). On a stale or
+    missing cache the whole CSV is parsed once and the cache rebuilt.
+    """
+    hit = not refresh and is_fresh(csv_path, cache_dir)
+    RECORDER.cache_lookup('dataset', hit)
+    if hit:
+        import pyarrow.feather as feather
+        arrow_path, _ = cache_paths(csv_path, cache_dir)
+        table = feather.read_table(arrow_path, columns=columns, memory_map=True)
+        return table.to_pandas()
+
+    import pandas as pd
+    df = pd.read_csv(csv_path)
+    write_cache(df, csv_path, cache_dir)
+    return df if columns is None else df[list(columns)]
+
+
+def csv_shape(csv_path, cache_dir=CACHE_DIR):
+    """(rows, columns) of a CSV: from the cache manifest when fresh, else by counting lines."""
+    if is_fresh(csv_path, cache_dir):
+        manifest = _read_manifest(cache_paths(csv_path, cache_dir)[1])
+        return manifest['rows'], manifest['columns']
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        columns = next(reader, [])
+        return sum(1 for row in reader if row), columns
+
+
+def load_raw(columns=None, csv_path=RAW_CSV, **kwargs):
+    """Raw Monthly_Transportation_Statistics.csv (all 100+ columns unless columns is given)."""
+    return load_csv(csv_path, columns=columns, **kwargs)
+
+
+def load_cleaned(columns=None, csv_path=CLEANED_CSV, compact=False, **kwargs):
+    """
+    Cleaned us_bus_transit_data_2015_2023.csv written by 02_data_cleaning.py.
+
+    compact=True narrows every column to the smallest dtype its USDOTTransportationStats
+    type allows (compact.compact_frame), for large multi-agency extracts.
+    """
+    df = load_csv(csv_path, columns=columns, **kwargs)
+    if compact:
+        from .compact import compact_frame
+        return compact_frame(df)
+    return df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Inspect or rebuild the columnar dataset cache')
+    parser.add_argument('--refresh', action='store_true', help='Rebuild the cache from the CSVs')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("COLUMNAR DATASET CACHE")
+    print("=" * 80)
+    if not HAS_ARROW:
+        print("\n⚠ pyarrow is not installed - scripts read the CSVs directly")
+
+    for csv_path in (RAW_CSV, CLEANED_CSV):
+        if not csv_path.exists():
+            print(f"\n✗ {csv_path.name}: source not found")
+            continue
+        if args.refresh and HAS_ARROW:
+            load_csv(csv_path, refresh=True)
+        arrow_path, _ = cache_paths(csv_path)
+        status = 'fresh' if is_fresh(csv_path) else 'stale'
+        print(f"\n{csv_path.name}: {status}")
+        if arrow_path.exists():
+            print(f"  Cache: {arrow_path} ({arrow_path.stat().st_size:,} bytes)")
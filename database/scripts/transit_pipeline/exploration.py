@@ -0,0 +1,116 @@
+"""
+Data Exploration Stages
+Purpose: Column relevance, completeness and trend summaries of the raw US DOT extract
+Author: Fleet Management System
+Date: 2026-10-16
+
+Used by 01_data_exploration.py and by the pipeline runner (explore stage).
+"""
+
+import numpy as np
+
+from .config import COVID_START, START_DATE
+from .cleaning import parse_dates
+from .dataset_cache import load_raw
+from .profiling import profile_frame
+
+BUS_RELATED_KEYWORDS = [
+    'Transit', 'Bus', 'Ridership', 'Fuel', 'Diesel', 'Gasoline',
+    'Highway', 'Miles', 'Employment', 'Transportation Services',
+    'Fatalities', 'Safety'
+]
+
+# Key metrics for bus fleet management
+KEY_METRICS = [
+    'Transit Ridership - Fixed Route Bus - Adjusted',
+    'Highway Fuel Price - On-highway Diesel',
+    'Highway Fuel Price - Regular Gasoline',
+    'Highway Vehicle Miles Traveled - All Systems',
+    'Transportation Employment - Transit and ground passenger transportation',
+    'Highway Fatalities'
+]
+
+BUS_RIDERSHIP_COL = 'Transit Ridership - Fixed Route Bus - Adjusted'
+DIESEL_COL = 'Highway Fuel Price - On-highway Diesel'
+
+# Post-COVID starts when the 2020 lockdown months are over
+POST_COVID_START = '2021-01-01'
+
+
+def relevant_columns(columns):
+    """Columns whose name contains one of BUS_RELATED_KEYWORDS, in file order."""
+    keywords = [keyword.lower() for keyword in BUS_RELATED_KEYWORDS]
+    return [col for col in columns if any(keyword in col.lower() for keyword in keywords)]
+
+
+def completeness_report(df, columns):
+    """
+    Non-null count, null % and value range per column, plus the first and last dates with
+    a value (one vectorized pass, see profiling.py).
+    """
+    report = profile_frame(df, columns).report()
+
+    # Get data range if numeric
+    data_range = [
+        f"{lo:.0f} - {hi:.0f}" if non_null else "No data"
+        for lo, hi, non_null in zip(report['min'], report['max'], report['non_null'])
+    ]
+    report['data_range'] = np.where(report['numeric'], data_range, "Non-numeric")
+    return report[['column', 'non_null', 'null_pct', 'data_range', 'first_valid', 'last_valid']]
+
+
+def recent_rows(df):
+    """Rows from START_DATE onwards, with Date parsed."""
+    df = df.copy()
+    df['Date'] = parse_dates(df['Date'])
+    return df[df['Date'] >= START_DATE].copy()
+
+
+def metric_summary(series):
+    """Records/min/max/mean/latest of a metric, or None when it has no data."""
+    data = series.dropna()
+    if len(data) == 0:
+        return None
+    return {
+        'records': len(data),
+        'min': data.min(),
+        'max': data.max(),
+        'mean': data.mean(),
+        'latest': data.iloc[-1],
+    }
+
+
+def ridership_covid_periods(df_recent):
+    """Mean bus ridership before, during and after COVID, or None without ridership data."""
+    if BUS_RIDERSHIP_COL not in df_recent.columns:
+        return None
+    ridership = df_recent[['Date', BUS_RIDERSHIP_COL]].dropna()
+    if len(ridership) == 0:
+        return None
+
+    values = ridership[BUS_RIDERSHIP_COL]
+    return {
+        'pre_covid': values[ridership['Date'] < COVID_START].mean(),
+        'covid': values[(ridership['Date'] >= COVID_START) & (ridership['Date'] < POST_COVID_START)].mean(),
+        'post_covid': values[ridership['Date'] >= POST_COVID_START].mean(),
+    }
+
+
+def diesel_yearly_average(df_recent):
+    """Average diesel price per year, or None without diesel data."""
+    if DIESEL_COL not in df_recent.columns:
+        return None
+    diesel = df_recent[['Date', DIESEL_COL]].dropna()
+    if len(diesel) == 0:
+        return None
+    return diesel.groupby(diesel['Date'].dt.year.rename('Year'))[DIESEL_COL].mean()
+
+
+# =============================================================================
+# PIPELINE STAGES
+# =============================================================================
+
+def explore(csv_path):
+    """Stage: completeness report of the bus-related raw columns, most complete first."""
+    raw = load_raw(csv_path=csv_path)
+    return completeness_report(raw, relevant_columns(raw.columns)).sort_values('null_pct')
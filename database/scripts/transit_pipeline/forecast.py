@@ -0,0 +1,255 @@
+"""
+Forecasting Stage
+Purpose: Seasonal-trend forecasts of ridership and diesel price with prediction intervals
+Author: Fleet Management System
+Date: 2026-10-16
+
+Every series (one per metric, and per agency / region with --by) is put on a common
+monthly grid, one row per series, and all of them are fitted together in matrix form:
+
+    1. Seasonal decomposition - a centered 2x12 moving average gives the trend; the
+       seasonal index per calendar month is the mean detrended value, using only windows
+       clear of the COVID period. Ridership is multiplicative (y / trend), diesel price
+       additive (y - trend).
+    2. Trend regression - a least-squares line through the deseasonalized values from
+       fit_from (default: the first month after COVID_END, i.e. the recovery regime).
+    3. Forecast - the line extended horizon months and reseasonalized, with 80% and 95%
+       prediction intervals from the residual spread and the leverage of each month.
+
+Interval widths use Student's t quantiles for each series' residual degrees of freedom
+(a Cornish-Fisher expansion of the normal quantile, so SciPy is not needed). Forecasts are written to analysis_output/forecasts.csv for the
+dashboard.
+
+Usage:
+    python -m transit_pipeline.forecast                           # national series, 12 months
+    python -m transit_pipeline.forecast --horizon 24
+    python -m transit_pipeline.forecast --input raw.csv --by Agency   # one series per agency and metric
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from .config import CLEANED_CSV, COVID_END, COVID_START, FORECAST_PATH
+
+# Forecast metrics and their seasonal model
+FORECAST_METRICS = {
+    'BusRidership': 'multiplicative',
+    'DieselPrice': 'additive',
+}
+
+DEFAULT_HORIZON = 12
+SEASON = 12
+
+# Prediction intervals: level -> two-sided normal quantile (widened to Student's t per series)
+INTERVALS = {80: 1.2816, 95: 1.9600}
+
+# Fewest months in the fit window for a forecast (else the series gets NaN)
+MIN_FIT_MONTHS = 6
+
+# Centered 2x12 moving average
+_MA_WEIGHTS = np.r_[0.5, np.ones(SEASON - 1), 0.5] / SEASON
+
+
+def t_quantile(z, dof):
+    """Student's t quantile matching normal quantile z, for dof degrees of freedom (array)."""
+    dof = np.asarray(dof, dtype='float64')
+    return (z + (z**3 + z) / (4 * dof) + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * dof**2)
+            + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * dof**3))
+
+
+def month_grid(dates):
+    """Month starts from the first to the last date."""
+    dates = pd.to_datetime(dates)
+    return pd.date_range(dates.min().to_period('M').to_timestamp(), dates.max(), freq='MS')
+
+
+def series_matrix(df, metrics, by=()):
+    """
+    (values, keys, grid): one row per (group, metric) on a monthly grid.
+
+    values is float64 (series x months) with NaN for missing months; duplicate months in
+    a group are averaged. keys has the by values and the Metric of each row.
+    """
+    by = list(by)
+    dates = pd.to_datetime(df['Date'])
+    grid = month_grid(dates)
+    month = ((dates.dt.year - grid[0].year) * 12 + dates.dt.month - grid[0].month).to_numpy()
+    if by:
+        groups = df.groupby(by, sort=True).ngroup().to_numpy()
+        group_keys = df[by].iloc[np.unique(groups, return_index=True)[1]].reset_index(drop=True)
+    else:
+        groups = np.zeros(len(df), dtype=np.intp)
+        group_keys = pd.DataFrame(index=[0])
+    n_groups = len(group_keys)
+
+    values = np.full((len(metrics) * n_groups, len(grid)), np.nan)
+    for m, metric in enumerate(metrics):
+        column = pd.to_numeric(df[metric]).to_numpy(dtype='float64', na_value=np.nan)
+        present = ~np.isnan(column)
+        sums = np.zeros((n_groups, len(grid)))
+        counts = np.zeros((n_groups, len(grid)))
+        np.add.at(sums, (groups[present], month[present]), column[present])
+        np.add.at(counts, (groups[present], month[present]), 1)
+        with np.errstate(invalid='ignore'):
+            values[m * n_groups:(m + 1) * n_groups] = np.where(counts > 0, sums / counts, np.nan)
+
+    keys = pd.concat([group_keys] * len(metrics), ignore_index=True)
+    keys['Metric'] = np.repeat(metrics, n_groups)
+    return values, keys, grid
+
+
+def seasonal_indices(values, grid, multiplicative):
+    """(series x 12) seasonal index per calendar month from windows clear of COVID."""
+    n_series, n_months = values.shape
+    trend = np.full(values.shape, np.nan)
+    if n_months >= len(_MA_WEIGHTS):
+        windows = np.lib.stride_tricks.sliding_window_view(values, len(_MA_WEIGHTS), axis=1)
+        half = SEASON // 2
+        trend[:, half:n_months - half] = windows @ _MA_WEIGHTS
+
+    # A window touching the COVID months would fold the collapse into the seasonal pattern
+    half_window = pd.DateOffset(months=SEASON // 2)
+    clear = ((grid + half_window < pd.Timestamp(COVID_START)) | (grid - half_window > pd.Timestamp(COVID_END)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        detrended = np.where(multiplicative[:, None], values / trend, values - trend)
+    detrended[:, ~np.asarray(clear)] = np.nan
+
+    calendar = np.eye(SEASON)[grid.month - 1]                     # months x 12
+    present = ~np.isnan(detrended)
+    sums = np.where(present, detrended, 0.0) @ calendar
+    counts = present.astype('float64') @ calendar
+    neutral = np.where(multiplicative, 1.0, 0.0)[:, None]
+    with np.errstate(invalid='ignore'):
+        index = np.where(counts > 0, sums / counts, neutral)
+
+    # Normalize so a year of seasonal effects nets out
+    mean = index.mean(axis=1, keepdims=True)
+    return np.where(multiplicative[:, None], index / mean, index - mean)
+
+
+def fit_forecast(values, grid, multiplicative, horizon=DEFAULT_HORIZON, fit_from=None):
+    """
+    Batched decomposition + trend fit of every row of values.
+
+    Returns (future month starts, forecast, {level: (lower, upper)}), each series x horizon
+    (future flattened row-major); every series continues from its last observed month.
+    """
+    multiplicative = np.asarray(multiplicative, dtype=bool)
+    seasonal = seasonal_indices(values, grid, multiplicative)
+    month_of_year = grid.month.to_numpy() - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        adjusted = np.where(multiplicative[:, None], values / seasonal[:, month_of_year],
+                            values - seasonal[:, month_of_year])
+
+    # Weighted least squares, one line per row; weights pick the fit window and present months
+    fit_from = pd.Timestamp(COVID_END) + pd.DateOffset(days=1) if fit_from is None else pd.Timestamp(fit_from)
+    t = np.arange(len(grid), dtype='float64')
+    weights = (~np.isnan(adjusted)) & np.asarray(grid >= fit_from)[None, :]
+    y = np.where(weights, adjusted, 0.0)
+    n = weights.sum(axis=1).astype('float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_mean = (weights * t).sum(axis=1) / n
+        y_mean = y.sum(axis=1) / n
+        t_dev = np.where(weights, t - t_mean[:, None], 0.0)
+        sxx = (t_dev ** 2).sum(axis=1)
+        slope = (t_dev * (y - y_mean[:, None])).sum(axis=1) / sxx
+        intercept = y_mean - slope * t_mean
+        residuals = np.where(weights, y - (intercept[:, None] + slope[:, None] * t), 0.0)
+        sigma = np.sqrt((residuals ** 2).sum(axis=1) / (n - 2))
+    enough = n >= MIN_FIT_MONTHS
+
+    # Each series continues from its own last observed month
+    observed = ~np.isnan(values)
+    last = np.where(observed.any(axis=1), len(grid) - 1 - np.argmax(observed[:, ::-1], axis=1), len(grid) - 1)
+    t_future = (last[:, None] + 1 + np.arange(horizon)).astype('float64')
+    months = grid[0].year * 12 + grid[0].month - 1 + t_future.astype(np.int64)
+    future_season = np.take_along_axis(seasonal, months % SEASON, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        line = intercept[:, None] + slope[:, None] * t_future
+        spread = sigma[:, None] * np.sqrt(1 + 1 / n[:, None] + (t_future - t_mean[:, None]) ** 2 / sxx[:, None])
+    future = pd.to_datetime({'year': (months // SEASON).ravel(), 'month': (months % SEASON).ravel() + 1, 'day': 1})
+
+    def reseasonalize(trend_values):
+        out = np.where(multiplicative[:, None], trend_values * future_season, trend_values + future_season)
+        # Multiplicative series (counts) cannot go negative
+        out = np.where(multiplicative[:, None], np.maximum(out, 0.0), out)
+        return np.where(enough[:, None], out, np.nan)
+
+    forecast = reseasonalize(line)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        quantiles = {level: t_quantile(z, n - 2)[:, None] for level, z in INTERVALS.items()}
+    intervals = {level: (reseasonalize(line - q * spread), reseasonalize(line + q * spread))
+                 for level, q in quantiles.items()}
+    return future, forecast, intervals
+
+
+def forecast_frame(df, metrics=None, by=(), horizon=DEFAULT_HORIZON, fit_from=None):
+    """
+    Long forecast table of the cleaned frame: by columns, Metric, Date, Forecast and the
+    Lower/Upper bounds of each interval, one row per series and future month.
+    """
+    metrics = list(FORECAST_METRICS) if metrics is None else list(metrics)
+    values, keys, grid = series_matrix(df, metrics, by)
+    multiplicative = keys['Metric'].map(FORECAST_METRICS).eq('multiplicative').to_numpy()
+    future, forecast, intervals = fit_forecast(values, grid, multiplicative, horizon, fit_from)
+
+    n_series = len(keys)
+    table = keys.loc[np.repeat(np.arange(n_series), horizon)].reset_index(drop=True)
+    table['Date'] = future.dt.strftime('%Y-%m-%d').to_numpy()
+    table['Forecast'] = forecast.ravel()
+    for level, (lower, upper) in intervals.items():
+        table[f'Lower{level}'] = lower.ravel()
+        table[f'Upper{level}'] = upper.ravel()
+    return table
+
+
+# =============================================================================
+# PIPELINE STAGES
+# =============================================================================
+
+def forecast(df, horizon=DEFAULT_HORIZON):
+    """Stage: ridership and diesel forecasts of the derived frame."""
+    return forecast_frame(df, horizon=horizon)
+
+
+def export_forecast(forecasts, path=FORECAST_PATH):
+    """Stage: write forecasts.csv."""
+    forecasts.to_csv(path, index=False)
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Forecast ridership and diesel price with prediction intervals')
+    parser.add_argument('--input', default=CLEANED_CSV,
+                        help='Cleaned CSV, or with --by a raw extract with one time series per partition')
+    parser.add_argument('--by', nargs='+', default=[], help='Partition column(s) of a raw extract, e.g. Agency')
+    parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON, help='Months to forecast (default: 12)')
+    parser.add_argument('--fit-from', help='First month of the trend fit (default: the month after COVID_END)')
+    parser.add_argument('--output', default=FORECAST_PATH, help='Forecast CSV (default: analysis_output/forecasts.csv)')
+    args = parser.parse_args()
+
+    if args.by:
+        from .cleaning import clean_chunk
+        from .partitioned import PARTITION, load_partitioned
+        raw, partitions, available_cols = load_partitioned(args.input, args.by)
+        df = clean_chunk(raw, available_cols).join(partitions[args.by], on=PARTITION)
+    else:
+        from .dataset_cache import load_cleaned
+        df = load_cleaned(columns=['Date'] + list(FORECAST_METRICS), csv_path=args.input)
+
+    forecasts = forecast_frame(df, by=args.by, horizon=args.horizon, fit_from=args.fit_from)
+    export_forecast(forecasts, args.output)
+
+    print("=" * 80)
+    print("FORECASTS")
+    print("=" * 80)
+    series = forecasts.groupby(args.by + ['Metric'], sort=False).ngroups
+    print(f"✓ {series:,} series x {args.horizon} months, {forecasts['Date'].iloc[0]} to {forecasts['Date'].iloc[-1]}")
+    if not args.by:
+        for metric, rows in forecasts.groupby('Metric', sort=False):
+            last = rows.iloc[-1]
+            print(f"  {metric:<14} {last['Date']}: {last['Forecast']:,.2f} "
+                  f"(95%: {last['Lower95']:,.2f} - {last['Upper95']:,.2f})")
+    print(f"✓ Saved: {args.output}")
@@ -0,0 +1,247 @@
+"""
+Fuel Budget Risk
+Purpose: Monte Carlo distribution of next year's fleet fuel spend from simulated diesel price paths
+Author: Fleet Management System
+Date: 2026-10-16
+
+The monthly diesel price of fuel_price_data.csv is modeled as an AR(1) process on its log
+(mean-reverting), or as a random walk with drift ('gbm'):
+
+    log p[t] = c + phi * log p[t-1] + e[t]
+
+fitted by least squares. Innovations e are normal with the residual spread, or drawn from
+the fitted residuals themselves ('bootstrap', keeping their fat tails). Paths start from
+the latest price and run horizon months.
+
+Paths are generated in chunks of chunk_size (a chunk x horizon matrix at a time, so memory
+stays bounded for millions of paths), one SeedSequence child per chunk: a seed gives the
+same result whatever the number of worker processes the chunks are sharded over. The fleet
+cost of a month is linear in the diesel price (costmodel.mileage_coefficients), so only the
+sum of each path's prices is kept, and the annual cost per path is one multiply-add.
+
+The report gives the mean, percentiles, VaR (the cost at a confidence level) and CVaR
+(the mean cost beyond that level) next to the single point estimate at the latest price.
+VaR and CVaR are both stated as the excess over the expected cost.
+
+Usage:
+    python -m transit_pipeline.fuel_risk
+    python -m transit_pipeline.fuel_risk --paths 1000000 --jobs 4 --seed 7 --buses 120
+    python -m transit_pipeline.fuel_risk --process gbm --innovations bootstrap --output risk.json
+"""
+
+import argparse
+import json
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+from .config import CLEANED_DIR
+from .costmodel import FUEL_TYPES, CostModel, mileage_coefficients, scenario_grid
+
+FUEL_PRICE_CSV = CLEANED_DIR / 'fuel_price_data.csv'
+
+PROCESSES = ('ar1', 'gbm')
+INNOVATIONS = ('normal', 'bootstrap')
+
+DEFAULT_PATHS = 100_000
+DEFAULT_HORIZON = 12
+DEFAULT_CHUNK_SIZE = 50_000
+
+PERCENTILES = [1, 5, 25, 50, 75, 95, 99]
+CONFIDENCE_LEVELS = [0.95, 0.99]
+
+# Mean reversion is capped below a unit root so the AR(1) stays stationary
+MAX_PHI = 0.999
+
+
+@dataclass
+class DieselProcess:
+    process: str
+    c: float
+    phi: float
+    sigma: float
+    start_price: float
+    months: int
+    residuals: np.ndarray
+
+    def describe(self):
+        if self.process == 'gbm':
+            return f"random walk on log price: drift {self.c:+.4f}/month, volatility {self.sigma:.4f}"
+        half_life = math.log(0.5) / math.log(self.phi) if 0 < self.phi < 1 else float('inf')
+        mean_price = math.exp(self.c / (1 - self.phi)) if self.phi < 1 else float('nan')
+        return (f"AR(1) on log price: phi {self.phi:.3f} (half-life {half_life:.1f} months), "
+                f"long-run ${mean_price:.2f}, volatility {self.sigma:.4f}")
+
+
+@dataclass
+class BudgetRisk:
+    paths: int
+    horizon: int
+    seed: int
+    mean: float
+    std: float
+    point_estimate: float
+    percentiles: dict
+    var: dict
+    cvar: dict
+    mean_price: dict
+    seconds: float
+
+
+def fit_process(prices, process='ar1'):
+    """DieselProcess fitted to a monthly price series (oldest first, gaps dropped)."""
+    if process not in PROCESSES:
+        raise ValueError(f"Unknown process '{process}' (expected {' or '.join(PROCESSES)})")
+    log_price = np.log(np.asarray(prices, dtype='float64'))
+    if len(log_price) < 3:
+        raise ValueError("Need at least 3 months of diesel prices to fit a process")
+    previous, current = log_price[:-1], log_price[1:]
+
+    if process == 'gbm':
+        c, phi = float(np.mean(current - previous)), 1.0
+    else:
+        design = np.column_stack([np.ones_like(previous), previous])
+        (c, phi), *_ = np.linalg.lstsq(design, current, rcond=None)
+        if phi > MAX_PHI:
+            # Near or past a unit root: revert (slowly) to the sample mean instead
+            c, phi = log_price.mean() * (1 - MAX_PHI), MAX_PHI
+    residuals = current - (c + phi * previous)
+    return DieselProcess(process, float(c), float(phi), float(residuals.std(ddof=2)), float(np.exp(log_price[-1])),
+                         len(log_price), residuals)
+
+
+def load_prices(csv_path=FUEL_PRICE_CSV):
+    """Monthly DieselPrice of fuel_price_data.csv, oldest first."""
+    prices = pd.read_csv(csv_path, usecols=['Date', 'DieselPrice'], parse_dates=['Date'])
+    return prices.dropna().sort_values('Date')['DieselPrice'].to_numpy(dtype='float64')
+
+
+# =============================================================================
+# SIMULATION
+# =============================================================================
+
+def price_sums(fitted, n, horizon, seed, innovations='normal'):
+    """Sum of the horizon monthly prices of n paths from one seed."""
+    rng = np.random.default_rng(seed)
+    if innovations == 'bootstrap':
+        shocks = rng.choice(fitted.residuals, size=(n, horizon))
+    else:
+        shocks = rng.standard_normal((n, horizon)) * fitted.sigma
+    log_price = np.full(n, math.log(fitted.start_price))
+    total = np.zeros(n)
+    for month in range(horizon):
+        log_price = fitted.c + fitted.phi * log_price + shocks[:, month]
+        total += np.exp(log_price)
+    return total
+
+
+def _simulate_chunk(fitted, n, horizon, seed, innovations, diesel_weight, fixed, fleet_miles):
+    """Pool task: annual fleet fuel cost and mean diesel price of one chunk of paths."""
+    total = price_sums(fitted, n, horizon, seed, innovations)
+    cost = fleet_miles / 12 * (diesel_weight * total + fixed * horizon)
+    return cost, total / horizon
+
+
+def simulate(fitted, model=None, paths=DEFAULT_PATHS, horizon=DEFAULT_HORIZON, seed=0,
+             chunk_size=DEFAULT_CHUNK_SIZE, jobs=1, innovations='normal'):
+    """(fuel cost over the horizon, mean diesel price) of every simulated path."""
+    if innovations not in INNOVATIONS:
+        raise ValueError(f"Unknown innovations '{innovations}' (expected {' or '.join(INNOVATIONS)})")
+    grid = scenario_grid(model)
+    diesel_weight, fixed = (float(value[0]) for value in mileage_coefficients(grid))
+    fleet_miles = float(grid['buses'].iloc[0] * grid['annual_miles'].iloc[0])
+
+    sizes = [min(chunk_size, paths - start) for start in range(0, paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(fitted, n, horizon, child, innovations, diesel_weight, fixed, fleet_miles)
+             for n, child in zip(sizes, seeds)]
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_simulate_chunk, *zip(*tasks)))
+    else:
+        results = [_simulate_chunk(*task) for task in tasks]
+    return np.concatenate([cost for cost, _ in results]), np.concatenate([price for _, price in results])
+
+
+def budget_risk(costs, prices, point_estimate, horizon, seed, seconds=0.0):
+    """BudgetRisk of simulated costs; var and cvar are excesses over the mean cost."""
+    values = np.percentile(costs, PERCENTILES)
+    mean = float(costs.mean())
+    var, cvar = {}, {}
+    for level in CONFIDENCE_LEVELS:
+        threshold = np.quantile(costs, level)
+        var[f'{level:.0%}'] = float(threshold - mean)
+        cvar[f'{level:.0%}'] = float(costs[costs >= threshold].mean() - mean)
+    return BudgetRisk(
+        paths=len(costs), horizon=horizon, seed=seed, mean=mean, std=float(costs.std()),
+        point_estimate=float(point_estimate),
+        percentiles={f'P{p}': float(v) for p, v in zip(PERCENTILES, values)},
+        var=var, cvar=cvar,
+        mean_price={f'P{p}': float(v) for p, v in zip(PERCENTILES, np.percentile(prices, PERCENTILES))},
+        seconds=seconds,
+    )
+
+
+# =============================================================================
+# PIPELINE STAGES
+# =============================================================================
+
+def fuel_risk(prices, model=None, process='ar1', paths=DEFAULT_PATHS, horizon=DEFAULT_HORIZON, seed=0,
+              chunk_size=DEFAULT_CHUNK_SIZE, jobs=1, innovations='normal'):
+    """Stage: (fitted DieselProcess, BudgetRisk) of next horizon months of fleet fuel spend."""
+    model = model or CostModel()
+    start = time.perf_counter()
+    fitted = fit_process(prices, process)
+    costs, mean_prices = simulate(fitted, model, paths, horizon, seed, chunk_size, jobs, innovations)
+    point_estimate = model.annual_cost(fitted.start_price) * horizon / 12
+    return fitted, budget_risk(costs, mean_prices, point_estimate, horizon, seed, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Monte Carlo distribution of next year\'s fleet fuel spend')
+    parser.add_argument('--input', default=FUEL_PRICE_CSV, help='fuel_price_data.csv (default: cleaned output)')
+    parser.add_argument('--paths', type=int, default=DEFAULT_PATHS, help=f'Price paths (default: {DEFAULT_PATHS})')
+    parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON, help='Months simulated (default: 12)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--process', choices=PROCESSES, default='ar1', help='Diesel price process (default: ar1)')
+    parser.add_argument('--innovations', choices=INNOVATIONS, default='normal',
+                        help='Monthly shocks: normal, or resampled fit residuals (default: normal)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'Paths generated at a time (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='Worker processes for the chunks (default: 1)')
+    parser.add_argument('--output', help='Write the report as JSON')
+    defaults = CostModel()
+    for name, value in defaults.parameters().items():
+        parser.add_argument(f"--{name.lower().replace('_', '-')}", dest=name, type=float,
+                            help=f'Cost model {name} (default: {value:g})')
+    args = parser.parse_args()
+
+    overrides = {name: getattr(args, name) for name in defaults.parameters() if getattr(args, name) is not None}
+    mix = {fuel: overrides.pop(fuel) for fuel in FUEL_TYPES if fuel in overrides}
+    model = CostModel(**overrides, **({'mix': {**defaults.mix, **mix}} if mix else {}))
+
+    fitted, risk = fuel_risk(load_prices(args.input), model, args.process, args.paths, args.horizon, args.seed,
+                             args.chunk_size, args.jobs, args.innovations)
+
+    print("=" * 80)
+    print("FUEL BUDGET RISK")
+    print("=" * 80)
+    print(f"✓ Fitted on {fitted.months} months: {fitted.describe()}")
+    print(f"✓ {risk.paths:,} paths x {risk.horizon} months (seed {risk.seed}) in {risk.seconds:.2f}s")
+    print(f"\nFleet of {model.buses:g} buses, {model.annual_miles:,.0f} miles/bus/year, {model.mpg:g} MPG")
+    print(f"  Point estimate (latest ${fitted.start_price:.3f}/gal): ${risk.point_estimate:>14,.0f}")
+    print(f"  Expected:                                ${risk.mean:>14,.0f}  (std ${risk.std:,.0f})")
+    for name, value in risk.percentiles.items():
+        print(f"  {name:<4} ${value:>14,.0f}   mean diesel ${risk.mean_price[name]:.2f}/gal")
+    for level in risk.var:
+        print(f"  VaR {level}: ${risk.var[level]:,.0f} over expected, "
+              f"CVaR {level}: ${risk.cvar[level]:,.0f} over expected")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'process': {k: v for k, v in asdict(fitted).items() if k != 'residuals'},
+                       'model': asdict(model), 'risk': asdict(risk)}, f, indent=2)
+        print(f"✓ Saved: {args.output}")
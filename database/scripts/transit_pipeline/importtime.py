@@ -0,0 +1,157 @@
+"""
+Import-Time Report
+Purpose: Measure what each pipeline entry point imports at startup, and how long that takes
+Author: Fleet Management System
+Date: 2026-10-16
+
+Each entry point module is imported in a fresh interpreter under `python -X importtime`;
+the report shows the process wall time, the summed import time, the largest imports made
+by the entry module and which heavy libraries (pandas, NumPy, pyarrow, matplotlib,
+seaborn) were pulled in. The best of --runs runs is kept, so a cold disk cache does not
+count.
+
+Headless entry points (the pipeline runner, dashboard KPI export, report and schema
+generation) must start within --budget-ms and must not import a plotting library; the
+command exits 1 otherwise, so it can guard CI or a container build.
+
+Usage:
+    python -m transit_pipeline.importtime                  # 300 ms budget
+    python -m transit_pipeline.importtime --budget-ms 200 --runs 5 --json importtime.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+
+from .config import SCRIPTS_DIR
+
+# (name, module imported at startup, headless)
+ENTRY_POINTS = [
+    ('runner', 'transit_pipeline.__main__', True),         # python -m transit_pipeline
+    ('kpis', 'transit_pipeline.kpis', True),               # dashboard_data.json appends
+    ('reports', 'transit_pipeline.reports', True),         # export_summary / export_dashboard stages
+    ('schema', 'transit_pipeline.schema', True),           # schema stage
+    ('dataset_cache', 'transit_pipeline.dataset_cache', True),   # 03_generate_sql_schema.py
+    ('analysis', 'transit_pipeline.analysis', False),
+    ('charts', 'transit_pipeline.charts', False),
+]
+
+HEAVY = ('pandas', 'numpy', 'pyarrow', 'matplotlib', 'seaborn', 'scipy')
+PLOTTING = ('matplotlib', 'seaborn')
+
+DEFAULT_BUDGET_MS = 300
+TOP_IMPORTS = 3
+
+
+@dataclass
+class ImportProfile:
+    name: str
+    module: str
+    headless: bool
+    wall_ms: float
+    import_ms: float
+    heavy: list = field(default_factory=list)
+    top: list = field(default_factory=list)          # largest direct imports, [(package, cumulative ms)]
+
+
+def parse_importtime(stderr, module):
+    """(total self ms, [(package, cumulative ms)] imported directly by module, all package names) of -X importtime output."""
+    total_us = 0
+    children, direct = [], []
+    packages = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        package = name.strip()
+        packages.add(package)
+        # Nested imports are indented two spaces per level and listed before their parent
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((package, int(cumulative_us) / 1000))
+        elif depth == 0:
+            if package == module or module.startswith(package + '.'):
+                direct.extend(children)
+            children = []
+    return total_us / 1000, direct, packages
+
+
+def profile_import(name, module, headless, runs=3):
+    """Best-of-runs ImportProfile of importing module in a fresh interpreter."""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                cwd=SCRIPTS_DIR, capture_output=True, text=True)
+        wall_ms = (time.perf_counter() - start) * 1000
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+        if best is None or wall_ms < best[0]:
+            best = (wall_ms, result.stderr)
+
+    wall_ms, stderr = best
+    import_ms, direct, packages = parse_importtime(stderr, module)
+    heavy = sorted({package.split('.')[0] for package in packages} & set(HEAVY))
+    top = sorted(direct, key=lambda item: item[1], reverse=True)[:TOP_IMPORTS]
+    return ImportProfile(name, module, headless, round(wall_ms, 1), round(import_ms, 1), heavy,
+                         [(package, round(ms, 1)) for package, ms in top])
+
+
+def failures(profiles, budget_ms):
+    """Messages for headless entry points over budget or importing a plotting library."""
+    messages = []
+    for profile in profiles:
+        if not profile.headless:
+            continue
+        if profile.wall_ms > budget_ms:
+            messages.append(f"{profile.name}: {profile.wall_ms:.0f} ms > {budget_ms} ms budget")
+        plotting = [package for package in profile.heavy if package in PLOTTING]
+        if plotting:
+            messages.append(f"{profile.name}: imports {', '.join(plotting)}")
+    return messages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Startup import time of the pipeline entry points')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f'Startup budget for headless entry points (default: {DEFAULT_BUDGET_MS})')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per entry point; the fastest is kept (default: 3)')
+    parser.add_argument('--json', help='Also write the profiles to this JSON file')
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("IMPORT-TIME REPORT")
+    print("=" * 80)
+    print(f"  {'Entry point':<15} {'Wall':>9} {'Imports':>9}  {'Heavy libraries':<36} Largest direct imports (ms)")
+    print("  " + "-" * 100)
+    profiles = []
+    for name, module, headless in ENTRY_POINTS:
+        profile = profile_import(name, module, headless, args.runs)
+        profiles.append(profile)
+        label = f"{name}{'' if headless else ' *'}"
+        heavy = ', '.join(profile.heavy) or '-'
+        top = ', '.join(f"{package} {ms:.0f}" for package, ms in profile.top)
+        print(f"  {label:<15} {profile.wall_ms:>7.0f}ms {profile.import_ms:>7.0f}ms  {heavy:<36} {top}")
+    print("  * not headless (no budget)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump([asdict(profile) for profile in profiles], f, indent=2)
+        print(f"\n✓ Saved: {args.json}")
+
+    print("=" * 80)
+    failed = failures(profiles, args.budget_ms)
+    for message in failed:
+        print(f"✗ {message}")
+    if failed:
+        return 1
+    print(f"✓ Headless entry points start within {args.budget_ms:.0f} ms without plotting libraries")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
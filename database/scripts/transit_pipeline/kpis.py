@@ -0,0 +1,306 @@
+"""
+Dashboard KPI Engine
+Purpose: Keep the dashboard_data.json figures as running state that new months update in place
+Author: Fleet Management System
+Date: 2026-10-16
+
+Every figure in dashboard_data.json (diesel averages, peak and latest price, pre-COVID
+baseline, COVID low, recovery, best/worst quarter and month, low-fuel months) is derived
+from a small fixed-size state: per-year diesel sums, per-month and per-quarter ridership
+sums, running max/min and latest values. The state is built once from the aggregate cube
+and saved next to the dataset cache; appending a month folds one row into it (O(1)) and
+rewrites the JSON without reloading the history, running the analysis or importing
+pandas, NumPy or matplotlib (only the bulk build needs pandas, and imports it itself).
+
+Usage:
+    python -m transit_pipeline.kpis                          # rebuild from the cleaned CSV
+    python -m transit_pipeline.kpis --append new_months.csv   # fold new months into the saved state
+"""
+
+import argparse
+import calendar
+import csv
+import datetime
+import json
+import math
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from .config import ANALYSIS_DIR, CLEANED_CSV, COVID_END, COVID_START, KPI_STATE_PATH
+
+KPI_METRICS = ['DieselPrice', 'BusRidership']
+DASHBOARD_PATH = ANALYSIS_DIR / 'dashboard_data.json'
+
+# Years compared by the diesel increase figure
+BASE_YEAR = 2015
+COMPARE_YEAR = 2022
+
+LOW_FUEL_MONTHS = 3
+LOW_RIDERSHIP_MONTHS = 2
+HIGH_FUEL_QUARTERS = 2
+
+COVID_START_DATE = datetime.date.fromisoformat(COVID_START)
+COVID_END_DATE = datetime.date.fromisoformat(COVID_END)
+
+
+def _pairs(n):
+    return [[0.0, 0] for _ in range(n)]
+
+
+def _mean(pair):
+    total, count = pair
+    return total / count if count else math.nan
+
+
+def _number(value):
+    """float, or None for missing values (the state is stored as JSON)."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):  # None, '', pd.NA
+        return None
+    return None if math.isnan(value) else value
+
+
+def _date(value):
+    """datetime.date of an ISO string, date, datetime or pd.Timestamp."""
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value[:10])
+    return datetime.date(value.year, value.month, value.day)
+
+
+def _phase(date):
+    if date < COVID_START_DATE:
+        return 'PreCOVID'
+    return 'COVID' if date <= COVID_END_DATE else 'PostCOVID'
+
+
+def _pick(values, best):
+    """Index of the first max (best=max) or min (best=min) value, ignoring NaN; None if all NaN."""
+    valid = [(value, i) for i, value in enumerate(values) if not math.isnan(value)]
+    return best(valid, key=lambda pair: pair[0])[1] if valid else None
+
+
+def seasonal_picks(month_ridership, month_diesel):
+    """
+    Best / worst ridership month, lowest-ridership and lowest-fuel months (lowest first) and
+    the highest-fuel quarters (in calendar order) from 12 monthly means (NaN: no data).
+    """
+    def lowest(values, n):
+        return sorted((i for i, value in enumerate(values) if not math.isnan(value)), key=lambda i: values[i])[:n]
+
+    def month_name(index):
+        return None if index is None else calendar.month_name[index + 1]
+
+    quarter_diesel = []
+    for q in range(4):
+        values = [value for value in month_diesel[3 * q:3 * q + 3] if not math.isnan(value)]
+        quarter_diesel.append(sum(values) / len(values) if values else math.nan)
+    return {
+        'best_month': month_name(_pick(month_ridership, max)),
+        'worst_month': month_name(_pick(month_ridership, min)),
+        'low_ridership_months': [calendar.month_name[i + 1] for i in lowest(month_ridership, LOW_RIDERSHIP_MONTHS)],
+        'low_fuel_months': [calendar.month_name[i + 1] for i in lowest(month_diesel, LOW_FUEL_MONTHS)],
+        'high_fuel_quarters': sorted(i + 1 for i in lowest([-value for value in quarter_diesel], HIGH_FUEL_QUARTERS)),
+    }
+
+
+@dataclass
+class KPIState:
+    """Running aggregates behind the dashboard; every list is a [sum, count] pair or a list of them."""
+
+    last_date: str = None
+    year_diesel: dict = field(default_factory=dict)              # 'YYYY' -> [sum, count]
+    month_diesel: list = field(default_factory=lambda: _pairs(12))
+    diesel_peak: float = None
+    diesel_peak_date: str = None
+    diesel_current: float = None
+    pre_covid_ridership: list = field(default_factory=lambda: [0.0, 0])
+    month_ridership: list = field(default_factory=lambda: _pairs(12))    # pre-COVID
+    quarter_ridership: list = field(default_factory=lambda: _pairs(4))   # pre-COVID
+    covid_min: float = None
+    latest_ridership: float = None
+
+
+class KPIEngine:
+    """KPIState plus the operations on it: bulk build, O(1) append, KPIs, persistence."""
+
+    def __init__(self, state=None):
+        self.state = state or KPIState()
+
+    # -------------------------------------------------------------------------
+    # Building
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def from_cube(cls, cube_table):
+        """State of the whole history, read from the aggregate cube."""
+        from .cube import AggregateCube
+        cube = AggregateCube(cube_table)
+        state = KPIState()
+
+        months = cube.count('DieselPrice', ('Year', 'Month')).index
+        if len(months):
+            last = months[-1]
+            state.last_date = f'{last[0]:04d}-{last[1]:02d}-01'
+
+        def pairs(metric, keys, phase=None):
+            total = cube.sum(metric, keys, phase)
+            count = cube.count(metric, keys, phase)
+            return {key: [float(total[key]), int(count[key])] for key in total.index}
+
+        state.year_diesel = {str(year): pair for year, pair in pairs('DieselPrice', ('Year',)).items()}
+        for month, pair in pairs('DieselPrice', ('Month',)).items():
+            state.month_diesel[month - 1] = pair
+        for month, pair in pairs('BusRidership', ('Month',), 'PreCOVID').items():
+            state.month_ridership[month - 1] = pair
+        for quarter, pair in pairs('BusRidership', ('Quarter',), 'PreCOVID').items():
+            state.quarter_ridership[quarter - 1] = pair
+        state.pre_covid_ridership = [_number(cube.sum('BusRidership', phase='PreCOVID')) or 0.0,
+                                     int(_number(cube.count('BusRidership', phase='PreCOVID')) or 0)]
+
+        peaks = cube.max('DieselPrice', ('Year', 'Month')).dropna()
+        if len(peaks):
+            year, month = peaks.idxmax()
+            state.diesel_peak = float(peaks.max())
+            state.diesel_peak_date = f'{year:04d}-{month:02d}-01'
+        state.diesel_current = _number(cube.last('DieselPrice'))
+        state.covid_min = _number(cube.min('BusRidership', phase='COVID'))
+        state.latest_ridership = _number(cube.last('BusRidership'))
+        return cls(state)
+
+    @classmethod
+    def from_frame(cls, df):
+        from .cube import build_cube
+        return cls.from_cube(build_cube(df, KPI_METRICS))
+
+    def append(self, date, diesel=None, ridership=None):
+        """Fold one new month into the state. Months must arrive in date order."""
+        date = _date(date)
+        state = self.state
+        if state.last_date is not None and date <= _date(state.last_date):
+            raise ValueError(f"{date:%Y-%m-%d} is not after the last month in the state ({state.last_date})")
+        state.last_date = date.isoformat()
+        phase = _phase(date)
+        diesel, ridership = _number(diesel), _number(ridership)
+
+        if diesel is not None:
+            year = state.year_diesel.setdefault(str(date.year), [0.0, 0])
+            year[0] += diesel
+            year[1] += 1
+            month = state.month_diesel[date.month - 1]
+            month[0] += diesel
+            month[1] += 1
+            if state.diesel_peak is None or diesel > state.diesel_peak:
+                state.diesel_peak = diesel
+                state.diesel_peak_date = state.last_date
+            state.diesel_current = diesel
+
+        if ridership is not None:
+            if phase == 'PreCOVID':
+                for pair in (state.pre_covid_ridership, state.month_ridership[date.month - 1],
+                             state.quarter_ridership[(date.month - 1) // 3]):
+                    pair[0] += ridership
+                    pair[1] += 1
+            elif phase == 'COVID' and (state.covid_min is None or ridership < state.covid_min):
+                state.covid_min = ridership
+            state.latest_ridership = ridership
+        return self
+
+    def append_rows(self, rows):
+        """append() for every mapping with Date, DieselPrice and BusRidership (e.g. csv.DictReader rows)."""
+        for row in sorted(rows, key=lambda row: _date(row['Date'])):
+            self.append(row['Date'], row.get('DieselPrice'), row.get('BusRidership'))
+        return self
+
+    def append_frame(self, df):
+        return self.append_rows(df.to_dict('records'))
+
+    # -------------------------------------------------------------------------
+    # Results
+    # -------------------------------------------------------------------------
+
+    def kpis(self):
+        """Flat KPI dict (same keys as the analysis metrics where they overlap, ridership in millions)."""
+        state = self.state
+        year_diesel = state.year_diesel
+        diesel_base = _mean(year_diesel.get(str(BASE_YEAR), [0.0, 0]))
+        diesel_compare = _mean(year_diesel.get(str(COMPARE_YEAR), [0.0, 0]))
+        pre_covid_avg = _mean(state.pre_covid_ridership) / 1e6
+        latest = math.nan if state.latest_ridership is None else state.latest_ridership / 1e6
+
+        quarter_ridership = [_mean(pair) for pair in state.quarter_ridership]
+
+        def quarter(index):
+            return None if index is None else index + 1
+
+        return {
+            'diesel_2015': diesel_base,
+            'diesel_2022': diesel_compare,
+            'diesel_increase': ((diesel_compare - diesel_base) / diesel_base) * 100,
+            'diesel_peak': math.nan if state.diesel_peak is None else state.diesel_peak,
+            'diesel_peak_date': state.diesel_peak_date,
+            'diesel_current': math.nan if state.diesel_current is None else state.diesel_current,
+            'pre_covid_avg': pre_covid_avg,
+            'covid_min': math.nan if state.covid_min is None else state.covid_min / 1e6,
+            'latest_ridership': latest,
+            'recovery_pct': (latest / pre_covid_avg) * 100,
+            'best_q': quarter(_pick(quarter_ridership, max)),
+            'worst_q': quarter(_pick(quarter_ridership, min)),
+            **seasonal_picks([_mean(pair) for pair in state.month_ridership],
+                             [_mean(pair) for pair in state.month_diesel]),
+            'last_date': state.last_date,
+        }
+
+    # -------------------------------------------------------------------------
+    # Persistence
+    # -------------------------------------------------------------------------
+
+    def save(self, path=KPI_STATE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(asdict(self.state), f, indent=2)
+        tmp_path.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path=KPI_STATE_PATH):
+        with open(path, encoding='utf-8') as f:
+            return cls(KPIState(**json.load(f)))
+
+
+# =============================================================================
+# PIPELINE STAGES
+# =============================================================================
+
+def kpis(cube_table, state_path=KPI_STATE_PATH):
+    """Stage: dashboard KPIs of the whole history; the running state is saved for later appends."""
+    engine = KPIEngine.from_cube(cube_table)
+    engine.save(state_path)
+    return engine.kpis()
+
+
+if __name__ == '__main__':
+    from .reports import export_dashboard
+
+    parser = argparse.ArgumentParser(description='Maintain dashboard_data.json from running KPI state')
+    parser.add_argument('--append', metavar='CSV',
+                        help='Cleaned-format CSV of new months (Date, DieselPrice, BusRidership) to fold into the saved state')
+    parser.add_argument('--input', default=CLEANED_CSV, help='Cleaned CSV for a full rebuild (default: cleaned dataset)')
+    parser.add_argument('--state', default=KPI_STATE_PATH, help='KPI state file')
+    parser.add_argument('--output', default=DASHBOARD_PATH, help='Dashboard JSON to write')
+    args = parser.parse_args()
+
+    state_path, output = Path(args.state), Path(args.output)
+    if args.append:
+        engine = KPIEngine.load(state_path)
+        with open(args.append, newline='', encoding='utf-8') as f:
+            new_rows = list(csv.DictReader(f))
+        engine.append_rows(new_rows)
+        print(f"✓ Appended {len(new_rows)} month(s); state now ends {engine.state.last_date}")
+    else:
+        from .dataset_cache import load_cleaned
+        engine = KPIEngine.from_frame(load_cleaned(columns=['Date'] + KPI_METRICS, csv_path=args.input))
+        print(f"✓ Rebuilt KPI state through {engine.state.last_date}")
+    print(f"✓ Saved: {engine.save(state_path)}")
+    print(f"✓ Saved: {export_dashboard(engine.kpis(), output)}")
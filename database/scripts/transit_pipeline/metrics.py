@@ -0,0 +1,256 @@
+"""
+Stage Instrumentation
+Purpose: Timers, rows in/out, bytes read/written, peak memory and cache hits per stage, as JSON lines or Prometheus text
+Author: Fleet Management System
+Date: 2026-10-16
+
+Every instrumented stage (pipeline runner stages, the numbered scripts' load / clean /
+profile / chart / JSON export / SQL generation steps) produces one StageMetrics record:
+
+    stage          name, e.g. 'clean' or 'render_fuel_cost_trends'
+    seconds        wall time
+    rows_in/out    rows of the stage's input and result (when they are tables)
+    bytes_read     size of the files it read
+    bytes_written  size of the files it wrote
+    peak_rss_mb    peak resident memory of the process so far (None where unavailable)
+    cache          'hit' when the stage was skipped as up to date, 'miss' when it ran
+
+Records are collected by the process-wide RECORDER. Nothing is written unless a sink is
+configured, by the caller (RECORDER.configure) or through the environment, so the
+numbered scripts are instrumented without new arguments:
+
+    TRANSIT_METRICS=run.jsonl                 append one JSON line per stage record
+    TRANSIT_METRICS_PROM=transit.prom         write all records as Prometheus text at exit
+                                              (node_exporter textfile collector format)
+    TRANSIT_METRICS_PUSHGATEWAY=http://pushgateway:9091
+                                              push the same text to a Prometheus Pushgateway
+
+Cache lookups (the columnar dataset cache, the stage cache) are also counted on their own
+as transit_cache_lookups_total{cache, result}. Only the standard library is imported.
+
+Usage:
+    with RECORDER.stage('clean') as m:
+        df = clean(raw)
+        m.rows_out = len(df)
+        m.wrote(output_path)
+
+    TRANSIT_METRICS=run.jsonl python 02_data_cleaning.py
+    python -m transit_pipeline --metrics run.jsonl --prometheus transit.prom
+"""
+
+import atexit
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+ENV_JSONL = 'TRANSIT_METRICS'
+ENV_PROMETHEUS = 'TRANSIT_METRICS_PROM'
+ENV_PUSHGATEWAY = 'TRANSIT_METRICS_PUSHGATEWAY'
+
+PUSHGATEWAY_JOB = 'transit_pipeline'
+PREFIX = 'transit'
+
+# Prometheus gauges per stage: (metric suffix, StageMetrics field, scale, help)
+STAGE_GAUGES = [
+    ('stage_duration_seconds', 'seconds', 1, 'Wall time of the last run of the stage'),
+    ('stage_rows_in', 'rows_in', 1, 'Rows of the stage input'),
+    ('stage_rows_out', 'rows_out', 1, 'Rows of the stage result'),
+    ('stage_bytes_read', 'bytes_read', 1, 'Bytes of the files the stage read'),
+    ('stage_bytes_written', 'bytes_written', 1, 'Bytes of the files the stage wrote'),
+    ('stage_peak_rss_bytes', 'peak_rss_mb', 1 << 20, 'Peak resident memory of the process at the end of the stage'),
+]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def file_bytes(paths):
+    """Total size of the existing files among paths."""
+    total = 0
+    for path in paths:
+        try:
+            total += os.path.getsize(path)
+        except (OSError, TypeError):
+            pass
+    return total
+
+
+def count_rows(obj):
+    """Rows of a table-like result (DataFrame, array, or a tuple of them); None otherwise."""
+    shape = getattr(obj, 'shape', None)
+    if shape:
+        return int(shape[0])
+    if isinstance(obj, (tuple, list)) and obj and all(getattr(item, 'shape', None) for item in obj):
+        return sum(int(item.shape[0]) for item in obj)
+    return None
+
+
+def timed_call(func, *args, **kwargs):
+    """(result, seconds, peak RSS MB) of one call; picklable, for timing work in worker processes."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start, peak_rss_mb()
+
+
+@dataclass
+class StageMetrics:
+    stage: str
+    seconds: float = 0.0
+    rows_in: int = None
+    rows_out: int = None
+    bytes_read: int = None
+    bytes_written: int = None
+    peak_rss_mb: float = None
+    cache: str = None
+    started_at: str = None
+
+    def read(self, *paths):
+        self.bytes_read = (self.bytes_read or 0) + file_bytes(paths)
+
+    def wrote(self, *paths):
+        self.bytes_written = (self.bytes_written or 0) + file_bytes(paths)
+
+
+class Recorder:
+    """StageMetrics records of this process and the sinks they go to."""
+
+    def __init__(self):
+        self.records = []
+        self.cache_lookups = {}
+        self.jsonl_path = None
+        self.prometheus_path = None
+        self.pushgateway = None
+        self.run_id = f"{datetime.datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+        self._lock = threading.Lock()
+        self._exit_hook = False
+
+    def configure(self, jsonl=None, prometheus=None, pushgateway=None):
+        """Set the sinks (None leaves one unchanged); the Prometheus ones are written at exit."""
+        self.jsonl_path = Path(jsonl) if jsonl else self.jsonl_path
+        self.prometheus_path = Path(prometheus) if prometheus else self.prometheus_path
+        self.pushgateway = pushgateway or self.pushgateway
+        if (self.prometheus_path or self.pushgateway) and not self._exit_hook:
+            atexit.register(self.flush)
+            self._exit_hook = True
+        return self
+
+    def configure_from_env(self):
+        return self.configure(os.environ.get(ENV_JSONL), os.environ.get(ENV_PROMETHEUS),
+                              os.environ.get(ENV_PUSHGATEWAY))
+
+    # -------------------------------------------------------------------------
+    # Recording
+    # -------------------------------------------------------------------------
+
+    @contextmanager
+    def stage(self, name, rows_in=None, cache='miss'):
+        """Time the block as stage name; the yielded StageMetrics takes rows and bytes."""
+        metrics = StageMetrics(name, rows_in=rows_in, cache=cache,
+                               started_at=datetime.datetime.now().isoformat(timespec='seconds'))
+        start = time.perf_counter()
+        try:
+            yield metrics
+        finally:
+            metrics.seconds = time.perf_counter() - start
+            metrics.peak_rss_mb = peak_rss_mb()
+            self.record(metrics)
+
+    def record(self, metrics):
+        with self._lock:
+            self.records.append(metrics)
+            if self.jsonl_path is not None:
+                line = {'run_id': self.run_id, **asdict(metrics)}
+                line['seconds'] = round(line['seconds'], 6)
+                if line['peak_rss_mb'] is not None:
+                    line['peak_rss_mb'] = round(line['peak_rss_mb'], 1)
+                self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(line) + '\n')
+        return metrics
+
+    def cache_lookup(self, cache, hit):
+        key = (cache, 'hit' if hit else 'miss')
+        with self._lock:
+            self.cache_lookups[key] = self.cache_lookups.get(key, 0) + 1
+
+    # -------------------------------------------------------------------------
+    # Prometheus
+    # -------------------------------------------------------------------------
+
+    def prometheus_text(self):
+        """Prometheus text exposition of the last record per stage and the cache counters."""
+        with self._lock:
+            latest = {metrics.stage: metrics for metrics in self.records}
+            lookups = dict(self.cache_lookups)
+        lines = []
+        for suffix, attr, scale, help_text in STAGE_GAUGES:
+            samples = [(stage, getattr(metrics, attr)) for stage, metrics in latest.items()
+                       if getattr(metrics, attr) is not None]
+            if not samples:
+                continue
+            lines += [f'# HELP {PREFIX}_{suffix} {help_text}', f'# TYPE {PREFIX}_{suffix} gauge']
+            lines += [f'{PREFIX}_{suffix}{{stage="{stage}"}} {float(value * scale)!r}' for stage, value in samples]
+        if latest:
+            lines += [f'# HELP {PREFIX}_stage_cache_hit 1 when the stage was up to date, 0 when it ran',
+                      f'# TYPE {PREFIX}_stage_cache_hit gauge']
+            lines += [f'{PREFIX}_stage_cache_hit{{stage="{stage}"}} {int(metrics.cache == "hit")}'
+                      for stage, metrics in latest.items()]
+        if lookups:
+            lines += [f'# HELP {PREFIX}_cache_lookups_total Cache lookups by cache and result',
+                      f'# TYPE {PREFIX}_cache_lookups_total counter']
+            lines += [f'{PREFIX}_cache_lookups_total{{cache="{cache}",result="{result}"}} {count}'
+                      for (cache, result), count in sorted(lookups.items())]
+        lines += [f'# HELP {PREFIX}_last_run_timestamp_seconds Time the batch run finished',
+                  f'# TYPE {PREFIX}_last_run_timestamp_seconds gauge',
+                  f'{PREFIX}_last_run_timestamp_seconds {time.time():.0f}']
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Write the Prometheus text atomically (the textfile collector may read at any time)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        tmp_path.write_text(self.prometheus_text(), encoding='utf-8')
+        os.replace(tmp_path, path)
+        return path
+
+    def push(self, url, job=PUSHGATEWAY_JOB, timeout=5):
+        """PUT the Prometheus text to a Pushgateway (replacing the job's previous batch)."""
+        import urllib.request
+        request = urllib.request.Request(f"{url.rstrip('/')}/metrics/job/{job}",
+                                         data=self.prometheus_text().encode('utf-8'), method='PUT',
+                                         headers={'Content-Type': 'text/plain; version=0.0.4'})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status
+
+    def flush(self):
+        """Write the configured Prometheus sinks; a failing push only warns (the batch itself succeeded)."""
+        if not self.records and not self.cache_lookups:
+            return
+        if self.prometheus_path is not None:
+            self.write_prometheus(self.prometheus_path)
+        if self.pushgateway:
+            try:
+                self.push(self.pushgateway)
+            except OSError as exc:
+                print(f"⚠ Could not push metrics to {self.pushgateway}: {exc}", file=sys.stderr)
+
+
+RECORDER = Recorder().configure_from_env()
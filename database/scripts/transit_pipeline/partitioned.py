@@ -0,0 +1,225 @@
+"""
+Partitioned Processing
+Purpose: Clean, derive, cube and compute the dashboard KPIs per agency / region in a process pool
+Author: Fleet Management System
+Date: 2026-10-16
+
+The raw extract is read once (the kept columns plus the partition columns), filtered from
+START_DATE and sorted by partition, so every partition is a contiguous row range. Those rows
+go into one shared memory block (shared_frame.py). Each pool task attaches to the rows of a
+batch of whole partitions, cleans and derives them, builds one aggregate cube for the batch
+(build_cube with the partition as an extra key) and computes every partition's KPIs.
+Batches are sized by rows, several per worker, so the pool stays busy whatever the
+partition sizes; the parent only sorts, slices and merges the small per-batch cubes.
+
+Outputs under --output-dir:
+    <key>=<value>/...           the cleaned CSVs and dashboard_data.json of one partition
+    partition_kpis.csv          one row of KPIs per partition
+    partition_cube.feather      the cube of every partition (partition columns as keys)
+    rollup_cube.feather         the partitions rolled up into one cube
+    dashboard_data.json         KPIs of the rollup (averages are per partition-month)
+
+Usage:
+    python -m transit_pipeline.partitioned raw.csv --by Agency
+    python -m transit_pipeline.partitioned raw.csv --by Agency Region --jobs 8 --no-cleaned
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from .cleaning import CleanedWriter, available_columns, clean_chunk, parse_dates
+from .config import PARTITIONED_DIR, START_DATE
+from .cube import KEYS, STATS, build_cube, combine_cubes, write_cube
+from .dataset_cache import load_raw
+from .kpis import KPI_METRICS, KPIEngine
+from .reports import dashboard_data
+from .shared_frame import SharedFrame, attach_frame
+
+PARTITION = 'PartitionId'
+
+# Pool tasks per worker process, so uneven batches still balance out
+TASKS_PER_WORKER = 4
+
+
+@dataclass
+class PartitionReport:
+    partitions: int
+    rows: int
+    batches: int
+    seconds: float
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def partition_dir(keys):
+    """Relative directory of one partition, e.g. 'Agency=Metro%20Transit/Region=West'."""
+    return '/'.join(f'{col}={quote(str(value), safe="")}' for col, value in keys.items())
+
+
+def load_partitioned(csv_path, by):
+    """
+    (raw, partitions, available_cols) of a raw extract split by the by columns.
+
+    raw holds the kept raw columns plus an int32 PartitionId, sorted by partition and date.
+    partitions has one row per PartitionId: the by values, its row range (start, rows)
+    and its output directory. Rows without a partition key are dropped.
+    """
+    by = list(by)
+    header = pd.read_csv(csv_path, nrows=0).columns
+    missing = [col for col in by if col not in header]
+    if missing:
+        raise ValueError(f"Partition column(s) not in {csv_path}: {', '.join(missing)}")
+    available_cols, _ = available_columns(header)
+
+    raw = load_raw(columns=list(available_cols) + by, csv_path=csv_path)
+    raw['Date'] = parse_dates(raw['Date'])
+    raw = raw[(raw['Date'] >= START_DATE) & raw[by].notna().all(axis=1)]
+
+    codes = raw.groupby(by, sort=True).ngroup().to_numpy(np.int32)
+    order = np.lexsort((raw['Date'].to_numpy(), codes))
+    keys = raw[by].iloc[order]
+    raw = raw[list(available_cols)].iloc[order].reset_index(drop=True)
+    raw[PARTITION] = codes[order]
+
+    counts = np.bincount(raw[PARTITION].to_numpy(), minlength=codes.max() + 1 if len(codes) else 0)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+    partitions = keys.iloc[starts].reset_index(drop=True)
+    partitions['start'] = starts
+    partitions['rows'] = counts
+    partitions['path'] = [partition_dir(row) for row in partitions[by].to_dict('records')]
+    partitions.index.name = PARTITION
+    return raw, partitions, available_cols
+
+
+def plan_batches(partitions, tasks):
+    """Contiguous [first, last) PartitionId ranges of roughly equal row counts."""
+    target = max(1, math.ceil(partitions['rows'].sum() / max(tasks, 1)))
+    batches, first, rows = [], 0, 0
+    for code, count in enumerate(partitions['rows']):
+        rows += count
+        if rows >= target:
+            batches.append((first, code + 1))
+            first, rows = code + 1, 0
+    if first < len(partitions):
+        batches.append((first, len(partitions)))
+    return batches
+
+
+def process_batch(raw, paths, available_cols, output_dir=None, write_cleaned=True):
+    """
+    Clean, derive, cube and KPIs of the rows of whole partitions.
+
+    paths maps each PartitionId in raw to its output directory (used when output_dir is
+    set). Returns (cube with a PartitionId key, {PartitionId: KPI dict}).
+    """
+    df = clean_chunk(raw, available_cols)
+    cube = build_cube(df, by=[PARTITION])
+    # Split only the columns the KPI engine reads
+    kpi_cols = ['Grain'] + KEYS + [f'{metric}_{stat}' for metric in KPI_METRICS for stat in STATS]
+    kpis = {int(code): KPIEngine.from_cube(part).kpis()
+            for code, part in cube[kpi_cols].groupby(cube[PARTITION].to_numpy(), sort=False)}
+
+    if output_dir is not None:
+        columns = [col for col in df.columns if col != PARTITION]
+        for code, part in df.groupby(PARTITION, sort=False):
+            part_dir = output_dir / paths[code]
+            part_dir.mkdir(parents=True, exist_ok=True)
+            if write_cleaned:
+                CleanedWriter(part_dir, columns).write(part[columns])
+            with open(part_dir / 'dashboard_data.json', 'w') as f:
+                json.dump(dashboard_data(kpis[int(code)]), f, indent=2)
+    return cube, kpis
+
+
+def _process_shared(handle, rows, paths, available_cols, output_dir, write_cleaned):
+    """Pool task: attach to this batch's rows of the shared raw frame and process them."""
+    return process_batch(attach_frame(handle, rows=rows), paths, available_cols, output_dir, write_cleaned)
+
+
+def _kpi_rows(partitions, by, kpis):
+    table = pd.DataFrame.from_dict(kpis, orient='index').sort_index()
+    table['low_fuel_months'] = table['low_fuel_months'].str.join(';')
+    return pd.concat([partitions[by], partitions[['rows']], table], axis=1)
+
+
+def run_partitioned(csv_path, by, output_dir=PARTITIONED_DIR, jobs=None, write_cleaned=True):
+    """
+    Process every partition of csv_path and write the partitioned outputs plus the rollup.
+
+    jobs=1 processes the batches in this process; otherwise up to jobs worker processes
+    (default: the CPU count) share the rows through shared memory.
+    """
+    start = time.perf_counter()
+    by = list(by)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    raw, partitions, available_cols = load_partitioned(csv_path, by)
+    jobs = jobs or os.cpu_count() or 1
+    batches = plan_batches(partitions, jobs * TASKS_PER_WORKER if jobs > 1 else 1)
+    paths = partitions['path']
+
+    def row_range(first, last):
+        begin = int(partitions['start'].iloc[first])
+        end = int(partitions['start'].iloc[last - 1] + partitions['rows'].iloc[last - 1])
+        return slice(begin, end)
+
+    if jobs == 1:
+        results = [process_batch(raw.iloc[row_range(first, last)], paths.iloc[first:last].to_dict(),
+                                 available_cols, output_dir, write_cleaned)
+                   for first, last in batches]
+    else:
+        with SharedFrame(raw) as shared, ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(_process_shared, shared.handle(), row_range(first, last),
+                                   paths.iloc[first:last].to_dict(), available_cols, output_dir, write_cleaned)
+                       for first, last in batches]
+            results = [future.result() for future in futures]
+
+    # Partition order, whichever batches the partitions were processed in
+    cube = pd.concat([result[0] for result in results], ignore_index=True)
+    cube = cube.sort_values(PARTITION, kind='stable', ignore_index=True)
+    kpis = {code: values for result in results for code, values in result[1].items()}
+
+    # Partition cube with the key columns in place of the PartitionId
+    keyed = cube.join(partitions[by], on=PARTITION)
+    keyed = keyed[['Grain'] + by + [col for col in cube.columns if col not in ('Grain', PARTITION)]]
+    write_cube(keyed, output_dir / 'partition_cube.feather')
+    _kpi_rows(partitions, by, kpis).to_csv(output_dir / 'partition_kpis.csv', index=False)
+
+    rollup = combine_cubes(cube, [PARTITION])
+    write_cube(rollup, output_dir / 'rollup_cube.feather')
+    with open(output_dir / 'dashboard_data.json', 'w') as f:
+        json.dump(dashboard_data(KPIEngine.from_cube(rollup).kpis()), f, indent=2)
+
+    return PartitionReport(len(partitions), len(raw), len(batches), time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run cleaning, cube and KPIs per agency / region partition')
+    parser.add_argument('input', help='Raw extract with one time series per partition')
+    parser.add_argument('--by', nargs='+', required=True, help='Partition column(s), e.g. Agency Region')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes (default: CPU count; 1 = no pool)')
+    parser.add_argument('--output-dir', default=PARTITIONED_DIR, help='Output directory (default: data/partitioned)')
+    parser.add_argument('--no-cleaned', action='store_true', help='Skip the per-partition cleaned CSVs')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("PARTITIONED PROCESSING")
+    print("=" * 80)
+    report = run_partitioned(args.input, args.by, Path(args.output_dir), args.jobs, not args.no_cleaned)
+    print(f"✓ {report.partitions:,} partitions, {report.rows:,} rows in {report.batches} batches")
+    print(f"✓ {report.seconds:.2f}s ({report.rows_per_sec:,.0f} rows/sec)")
+    print(f"✓ Outputs: {args.output_dir}")
+    print("=" * 80)
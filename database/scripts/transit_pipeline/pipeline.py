@@ -0,0 +1,75 @@
+"""
+Transit Data Pipeline
+Purpose: The stage DAG behind the numbered scripts (load -> clean -> derive -> cube -> analyze -> render -> export)
+Author: Fleet Management System
+Date: 2026-10-16
+
+    load ─> clean ─> derive ─┬─> export_cleaned
+                             ├─> schema
+                             ├─> forecast ─> export_forecast
+                             ├─> anomalies ─> export_anomalies
+                             └─> cube ─┬─> export_cube
+                                       ├─> kpis ─> export_dashboard
+                                       └─> analyze ─┬─> render_* (4 charts)
+                                                    └─> export_summary
+    explore (raw completeness report, independent)
+"""
+
+from .config import (ALERTS_PATH, ANALYSIS_DIR, CHART_FILES, CLEANED_DIR, FORECAST_PATH, KPI_STATE_PATH,
+                     MONTHLY_STATS_PATH, OUTPUT_FILES, RAW_CSV, SQL_PATH)
+from .runner import Pipeline, Stage, STAGE_CACHE_DIR
+
+
+def build_pipeline(raw_csv=RAW_CSV, cleaned_dir=CLEANED_DIR, analysis_dir=ANALYSIS_DIR,
+                   sql_path=SQL_PATH, cache_dir=STAGE_CACHE_DIR, kpi_state_path=KPI_STATE_PATH,
+                   expected_trips=None, precision=None, fmt='csv', compression=None):
+    """
+    The full pipeline for one raw extract.
+
+    expected_trips sizes the generated schema; precision, fmt and compression choose how the
+    cleaned outputs are written (see cleaning.CleanedWriter).
+    """
+    from .serialize import output_name  # pandas: keep the package import headless
+
+    stages = [
+        Stage('load', 'transit_pipeline.cleaning:load',
+              params={'csv_path': raw_csv}, inputs=(raw_csv,)),
+        Stage('clean', 'transit_pipeline.cleaning:clean', deps=('load',)),
+        Stage('derive', 'transit_pipeline.cleaning:derive', deps=('clean',)),
+        Stage('export_cleaned', 'transit_pipeline.cleaning:export_cleaned', deps=('derive',),
+              params={'output_dir': cleaned_dir, 'precision': precision, 'fmt': fmt,
+                      'compression': compression},
+              outputs=tuple(cleaned_dir / output_name(name, fmt, compression) for name in OUTPUT_FILES)),
+        Stage('explore', 'transit_pipeline.exploration:explore',
+              params={'csv_path': raw_csv}, inputs=(raw_csv,)),
+        Stage('cube', 'transit_pipeline.cube:cube', deps=('derive',)),
+        Stage('export_cube', 'transit_pipeline.cube:export_cube', deps=('cube',),
+              params={'path': analysis_dir / 'aggregate_cube.feather'},
+              outputs=(analysis_dir / 'aggregate_cube.feather',)),
+        Stage('analyze', 'transit_pipeline.analysis:analyze', deps=('derive', 'cube')),
+        Stage('export_summary', 'transit_pipeline.reports:export_summary', deps=('analyze',),
+              params={'path': analysis_dir / 'executive_summary.txt'},
+              outputs=(analysis_dir / 'executive_summary.txt',)),
+        Stage('kpis', 'transit_pipeline.kpis:kpis', deps=('cube',),
+              params={'state_path': kpi_state_path}, outputs=(kpi_state_path,)),
+        Stage('export_dashboard', 'transit_pipeline.reports:export_dashboard', deps=('kpis',),
+              params={'path': analysis_dir / 'dashboard_data.json'},
+              outputs=(analysis_dir / 'dashboard_data.json',)),
+        Stage('forecast', 'transit_pipeline.forecast:forecast', deps=('derive',)),
+        Stage('export_forecast', 'transit_pipeline.forecast:export_forecast', deps=('forecast',),
+              params={'path': analysis_dir / FORECAST_PATH.name},
+              outputs=(analysis_dir / FORECAST_PATH.name,)),
+        Stage('anomalies', 'transit_pipeline.anomalies:anomalies', deps=('derive',)),
+        Stage('export_anomalies', 'transit_pipeline.anomalies:export_anomalies', deps=('anomalies',),
+              params={'stats_path': analysis_dir / MONTHLY_STATS_PATH.name,
+                      'alerts_path': analysis_dir / ALERTS_PATH.name},
+              outputs=(analysis_dir / MONTHLY_STATS_PATH.name, analysis_dir / ALERTS_PATH.name)),
+        Stage('schema', 'transit_pipeline.schema:write_schema', deps=('derive',),
+              params={'path': sql_path, 'expected_trips': expected_trips}, outputs=(sql_path,)),
+    ]
+    for chart in CHART_FILES:
+        name = chart.rsplit('.', 1)[0]
+        stages.append(Stage(f'render_{name}', f'transit_pipeline.charts:render_{name}',
+                            deps=('derive', 'analyze'),
+                            params={'path': analysis_dir / chart}, outputs=(analysis_dir / chart,)))
+    return Pipeline(stages, cache_dir=cache_dir)
@@ -0,0 +1,263 @@
+"""
+Column Profiler
+Purpose: Null counts, value ranges, valid date spans and per-year coverage of every column in one pass
+Author: Fleet Management System
+Date: 2026-10-16
+
+Each chunk is converted once to a float64 matrix (numeric and boolean columns) plus a
+validity matrix, and every statistic is a NumPy reduction over those matrices; there is no
+per-column loop. Chunks can arrive one at a time (streaming), so a whole extract never
+needs to be in memory.
+
+With decimals=True the profiler also records what a SQL type needs: the decimal places
+that hold every value exactly (up to MAX_SCALE), the smallest non-zero magnitude and, for
+text columns, the longest value (see sql_types.py). profile_csv(sample=...) parses only a
+random fraction of the rows for a quick profile of a wide extract.
+
+Used by the exploration completeness report (01_data_exploration.py) and by the cleaned
+data quality summary (02_data_cleaning.py).
+
+Usage:
+    python -m transit_pipeline.profiling                       # raw extract, 50,000-row chunks
+    python -m transit_pipeline.profiling cleaned.csv --json profile.json
+"""
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from .config import RAW_CSV
+
+_NO_DATE = np.iinfo(np.int64).max
+
+# Decimal places tracked with decimals=True; values needing more are flagged inexact
+MAX_SCALE = 8
+
+# Relative tolerance for "rounds exactly" (float64 holds ~16 significant digits)
+_EXACT_TOLERANCE = 1e-12
+
+
+class ColumnProfiler:
+    """
+    Running per-column statistics over chunks of one table.
+
+    columns defaults to the columns of the first chunk. Dates come from date_col (parsed
+    if needed) and feed the first/last valid dates and the per-year coverage. decimals adds
+    the scale / magnitude / text length statistics used to infer SQL types.
+    """
+
+    def __init__(self, columns=None, date_col='Date', decimals=False):
+        self.columns = None if columns is None else list(columns)
+        self.date_col = date_col
+        self.decimals = decimals
+        self.sampled = False
+        self.rows = 0
+        self._numeric = None
+
+    def _setup(self, chunk):
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+        self._numeric = np.array([pd.api.types.is_numeric_dtype(chunk[col]) for col in self.columns], dtype=bool)
+        self._boolean = np.array([pd.api.types.is_bool_dtype(chunk[col]) for col in self.columns], dtype=bool)
+        n = len(self.columns)
+        self._numeric_cols = [col for col, num in zip(self.columns, self._numeric) if num]
+        self._other_cols = [col for col, num in zip(self.columns, self._numeric) if not num]
+        self._non_null = np.zeros(n, dtype=np.int64)
+        self._min = np.full(n, np.inf)
+        self._max = np.full(n, -np.inf)
+        self._total = np.zeros(n)
+        self._last_value = np.full(n, np.nan)
+        self._first_date = np.full(n, _NO_DATE, dtype=np.int64)
+        self._last_date = np.full(n, -_NO_DATE, dtype=np.int64)
+        self._year_rows = pd.Series(dtype=np.int64)
+        self._year_valid = None
+        self._scale = np.zeros(n, dtype=np.int64)
+        self._inexact = np.zeros(n, dtype=bool)
+        self._min_abs = np.full(n, np.inf)
+        self._max_length = np.zeros(n, dtype=np.int64)
+
+    def _dates(self, chunk):
+        if self.date_col is None or self.date_col not in chunk.columns:
+            return None
+        dates = chunk[self.date_col]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            from .cleaning import parse_dates
+            dates = parse_dates(dates)
+        return pd.DatetimeIndex(dates)
+
+    def update(self, chunk):
+        """Fold one chunk into the running statistics."""
+        if self._numeric is None:
+            self._setup(chunk)
+        n = len(chunk)
+        self.rows += n
+        if n == 0:
+            return self
+
+        # One float64 copy of the numeric columns; validity for every column
+        values = chunk[self._numeric_cols].to_numpy(dtype='float64', na_value=np.nan)
+        valid = np.empty((n, len(self.columns)), dtype=bool)
+        valid[:, self._numeric] = ~np.isnan(values)
+        if self._other_cols:
+            valid[:, ~self._numeric] = chunk[self._other_cols].notna().to_numpy()
+        self._non_null += valid.sum(axis=0)
+
+        numeric_valid = valid[:, self._numeric]
+        if values.shape[1]:
+            idx = self._numeric
+            self._min[idx] = np.minimum(self._min[idx], np.where(numeric_valid, values, np.inf).min(axis=0))
+            self._max[idx] = np.maximum(self._max[idx], np.where(numeric_valid, values, -np.inf).max(axis=0))
+            self._total[idx] += np.where(numeric_valid, values, 0.0).sum(axis=0)
+            seen = numeric_valid.any(axis=0)
+            last_row = n - 1 - numeric_valid[::-1].argmax(axis=0)
+            last = values[last_row, np.arange(values.shape[1])]
+            self._last_value[idx] = np.where(seen, last, self._last_value[idx])
+            if self.decimals:
+                self._update_decimals(values, numeric_valid)
+        if self.decimals and self._other_cols:
+            lengths = [chunk[col].dropna().astype(str).str.len().max() for col in self._other_cols]
+            idx = ~self._numeric
+            self._max_length[idx] = np.maximum(self._max_length[idx], np.nan_to_num(np.array(lengths, dtype='float64')))
+
+        dates = self._dates(chunk)
+        if dates is not None:
+            stamps = dates.as_unit('ns').asi8[:, None]
+            dated = valid & ~dates.isna()[:, None]
+            self._first_date = np.minimum(self._first_date, np.where(dated, stamps, _NO_DATE).min(axis=0))
+            self._last_date = np.maximum(self._last_date, np.where(dated, stamps, -_NO_DATE).max(axis=0))
+
+            years = dates.year
+            year_valid = pd.DataFrame(valid, columns=self.columns).groupby(years).sum()
+            year_rows = pd.Series(1, index=years).groupby(level=0).sum()
+            self._year_rows = self._year_rows.add(year_rows, fill_value=0)
+            self._year_valid = year_valid if self._year_valid is None else self._year_valid.add(year_valid, fill_value=0)
+        return self
+
+    def _update_decimals(self, values, valid):
+        """Decimal places per value (the first scale that rounds it exactly), folded per column."""
+        idx = self._numeric
+        magnitude = np.abs(np.where(valid, values, 0.0))
+        tolerance = _EXACT_TOLERANCE * np.maximum(magnitude, 1.0)
+        needed = np.full(values.shape, MAX_SCALE + 1, dtype=np.int64)
+        for scale in range(MAX_SCALE, -1, -1):
+            needed[np.abs(np.round(values, scale) - values) <= tolerance] = scale
+        needed[~valid] = 0
+        self._scale[idx] = np.maximum(self._scale[idx], np.minimum(needed.max(axis=0), MAX_SCALE))
+        self._inexact[idx] |= (needed > MAX_SCALE).any(axis=0)
+        self._min_abs[idx] = np.minimum(self._min_abs[idx], np.where(magnitude > 0, magnitude, np.inf).min(axis=0))
+
+    # -------------------------------------------------------------------------
+    # Results
+    # -------------------------------------------------------------------------
+
+    def _date_array(self, stamps, missing):
+        return pd.to_datetime(np.where(stamps == missing, np.iinfo(np.int64).min, stamps))
+
+    def report(self):
+        """One row per column: non_null, null_pct, min, max, sum, mean, last, first_valid, last_valid."""
+        if self._numeric is None:
+            return pd.DataFrame(columns=['column', 'numeric', 'non_null', 'null_pct', 'min', 'max',
+                                         'sum', 'mean', 'last', 'first_valid', 'last_valid'])
+        has_values = self._numeric & (self._non_null > 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            null_pct = (self.rows - self._non_null) / self.rows * 100 if self.rows else np.full(len(self.columns), np.nan)
+            mean = self._total / self._non_null
+        return pd.DataFrame({
+            'column': self.columns,
+            'numeric': self._numeric,
+            'non_null': self._non_null,
+            'null_pct': null_pct,
+            'min': np.where(has_values, self._min, np.nan),
+            'max': np.where(has_values, self._max, np.nan),
+            'sum': np.where(has_values, self._total, np.nan),
+            'mean': np.where(has_values, mean, np.nan),
+            'last': np.where(has_values, self._last_value, np.nan),
+            'first_valid': self._date_array(self._first_date, _NO_DATE),
+            'last_valid': self._date_array(self._last_date, -_NO_DATE),
+        })
+
+    def types_report(self):
+        """
+        One row per column for SQL type inference (requires decimals=True): rows, non_null,
+        min, max, boolean, scale, inexact, min_abs (smallest non-zero |value|) and max_length.
+        """
+        if not self.decimals:
+            raise ValueError("types_report() needs a profiler created with decimals=True")
+        report = self.report()[['column', 'numeric', 'non_null', 'min', 'max']]
+        if not len(report):
+            return report
+        report.insert(1, 'rows', self.rows)
+        report['boolean'] = self._boolean
+        report['scale'] = self._scale
+        report['inexact'] = self._inexact
+        report['min_abs'] = np.where(np.isfinite(self._min_abs), self._min_abs, np.nan)
+        report['max_length'] = self._max_length
+        return report
+
+    def coverage(self):
+        """Non-null % per year (rows) and column (columns)."""
+        if self._year_valid is None:
+            return pd.DataFrame(columns=self.columns or [])
+        return self._year_valid.div(self._year_rows, axis=0).mul(100)[self.columns]
+
+    def to_dict(self):
+        """JSON-ready report: row count, per-column statistics and per-year coverage."""
+        report = self.report()
+        for col in ('first_valid', 'last_valid'):
+            report[col] = report[col].dt.strftime('%Y-%m-%d')
+        report = report.astype(object).where(report.notna(), None)
+        coverage = self.coverage().round(1)
+        return {
+            'rows': self.rows,
+            'columns': report.to_dict(orient='records'),
+            'coverage': {str(year): {col: (None if pd.isna(pct) else float(pct)) for col, pct in row.items()}
+                         for year, row in coverage.iterrows()},
+        }
+
+
+def profile_frame(df, columns=None, date_col='Date', decimals=False):
+    """ColumnProfiler over a whole in-memory frame (columns default to all of them)."""
+    return ColumnProfiler(columns, date_col, decimals).update(df)
+
+
+def profile_csv(csv_path, chunksize=50_000, columns=None, date_col='Date', decimals=False, sample=None, seed=0):
+    """
+    ColumnProfiler over a CSV read chunk by chunk.
+
+    sample (a fraction in (0, 1]) parses only that share of the data rows, drawn at random
+    with seed; the profiler is then marked sampled (nulls and extremes may have been missed).
+    """
+    usecols = None if columns is None else list(columns) + ([date_col] if date_col and date_col not in columns else [])
+    profiler = ColumnProfiler(columns, date_col, decimals)
+    skiprows = None
+    if sample is not None and sample < 1:
+        rng = np.random.default_rng(seed)
+        skiprows = lambda row: row > 0 and rng.random() >= sample
+        profiler.sampled = True
+    for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=chunksize, skiprows=skiprows):
+        profiler.update(chunk)
+    return profiler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Profile column completeness of a CSV in one streaming pass')
+    parser.add_argument('csv', nargs='?', default=RAW_CSV, help='CSV to profile (default: raw DOT extract)')
+    parser.add_argument('--chunksize', type=int, default=50_000, help='Rows per chunk (default: 50000)')
+    parser.add_argument('--json', help='Write the report as JSON to this file')
+    args = parser.parse_args()
+
+    profiler = profile_csv(args.csv, args.chunksize)
+    report = profiler.report().sort_values('null_pct')
+    print(f"{profiler.rows} rows, {len(report)} columns")
+    print(f"{'Column':<60} {'Non-Null':<10} {'Null %':<8} {'First':<12} {'Last':<12}")
+    print("-" * 104)
+    for row in report.itertuples():
+        first = row.first_valid.strftime('%Y-%m-%d') if pd.notna(row.first_valid) else '-'
+        last = row.last_valid.strftime('%Y-%m-%d') if pd.notna(row.last_valid) else '-'
+        print(f"{row.column[:60]:<60} {row.non_null:<10} {row.null_pct:<8.1f} {first:<12} {last:<12}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(profiler.to_dict(), f, indent=2)
+        print(f"✓ Saved: {args.json}")
@@ -0,0 +1,120 @@
+"""
+Report Export Stages
+Purpose: Executive summary text (analysis metrics) and dashboard JSON (dashboard KPIs)
+Author: Fleet Management System
+Date: 2026-10-16
+"""
+
+import datetime
+import json
+
+# Inner width of the executive summary box
+BOX_WIDTH = 78
+
+
+def recommendations(metrics):
+    """Recommendation lines, with the months and quarters taken from the metrics."""
+    low_months = ', '.join(month[:3] for month in metrics['low_ridership_months'])
+    high_quarters = ' and '.join(f'Q{q}' for q in metrics['high_fuel_quarters'])
+    return [
+        f'Reduce frequency during low-ridership months ({low_months})',
+        f'Use fuel hedging for {high_quarters} (historically high prices)',
+        'Optimize routes to reduce miles per passenger',
+        'Consider hybrid/electric fleet for long-term savings'
+    ]
+
+
+def _row(text):
+    """One line of the summary box, padded to its width."""
+    return f'│{text:<{BOX_WIDTH}}│'
+
+
+def executive_summary(metrics):
+    """Boxed executive summary text."""
+    break_even = metrics['break_even']
+    peak_date = datetime.date.fromisoformat(metrics['diesel_peak_date']).strftime('%B %Y')
+    low_date = datetime.date.fromisoformat(metrics['covid_min_date']).strftime('%B %Y')
+    period = _row(f"{'Analysis Period: %d-%d' % (metrics['first_year'], metrics['last_year']):^{BOX_WIDTH}}")
+    diesel = _row(f"     • Diesel price increased {metrics['diesel_increase']:.0f}% "
+                  f"(${metrics['diesel_2015']:.2f} → ${metrics['diesel_2022']:.2f})")
+    peak = _row(f"     • Peak price: ${metrics['diesel_peak']:.2f} ({peak_date})")
+    fare = _row(f"     • Fuel now ~{break_even[-1]:.0f}% of passenger fare at current prices")
+    covid = _row(f"     • COVID impact: {metrics['covid_drop_pct']:.0f}% ridership ({low_date})")
+    recovery = _row(f"     • Current recovery: {metrics['recovery_pct']:.0f}% of pre-COVID levels")
+    efficiency = _row(f"     • Efficiency declining: {metrics['cost_per_passenger_ratio']:.1f}x cost per passenger "
+                      f"({metrics['cost_per_passenger_peak_year']} vs {metrics['first_year']})")
+    best = _row(f"     • Best operating months: {metrics['best_month']} (highest ridership)")
+    low_fuel = _row(f"     • Lowest fuel costs: {', '.join(metrics['low_fuel_months'])}")
+    saving = _row(f"     • Seasonal scheduling can save up to {metrics['seasonal_saving_pct']:.0f}% on fuel")
+    actions = '\n'.join(_row(f'     {i}. {line}') for i, line in enumerate(recommendations(metrics), 1))
+    return f"""
+┌─────────────────────────────────────────────────────────────────────────────┐
+│                    FLEET MANAGEMENT COST OPTIMIZATION                        │
+{period}
+├─────────────────────────────────────────────────────────────────────────────┤
+│                                                                              │
+│  🔴 CHALLENGE: RISING FUEL COSTS                                            │
+{diesel}
+{peak}
+{fare}
+│                                                                              │
+│  🟡 CHALLENGE: REDUCED RIDERSHIP                                            │
+{covid}
+{recovery}
+{efficiency}
+│                                                                              │
+│  🟢 OPTIMIZATION OPPORTUNITIES                                              │
+{best}
+{low_fuel}
+{saving}
+│                                                                              │
+│  📋 RECOMMENDATIONS                                                         │
+{actions}
+│                                                                              │
+└─────────────────────────────────────────────────────────────────────────────┘
+"""
+
+
+def dashboard_data(metrics):
+    """Dict written to dashboard_data.json, from the KPI engine's figures (kpis.KPIEngine.kpis)."""
+    return {
+        'fuel_metrics': {
+            'diesel_2015_avg': round(metrics['diesel_2015'], 2),
+            'diesel_2022_avg': round(metrics['diesel_2022'], 2),
+            'diesel_increase_pct': round(metrics['diesel_increase'], 1),
+            'diesel_peak': round(metrics['diesel_peak'], 2),
+            'diesel_current': round(metrics['diesel_current'], 2)
+        },
+        'ridership_metrics': {
+            'pre_covid_avg_millions': round(metrics['pre_covid_avg'], 0),
+            'covid_low_millions': round(metrics['covid_min'], 0),
+            'latest_millions': round(metrics['latest_ridership'], 0),
+            'recovery_pct': round(metrics['recovery_pct'], 1)
+        },
+        'optimization': {
+            'best_quarter': f"Q{metrics['best_q']}",
+            'worst_quarter': f"Q{metrics['worst_q']}",
+            'best_month': metrics['best_month'],
+            'worst_month': metrics['worst_month'],
+            'low_fuel_months': list(metrics['low_fuel_months'])
+        },
+        'recommendations': recommendations(metrics)
+    }
+
+
+# =============================================================================
+# PIPELINE STAGES
+# =============================================================================
+
+def export_summary(metrics, path):
+    """Stage: write executive_summary.txt."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(executive_summary(metrics))
+    return path
+
+
+def export_dashboard(metrics, path):
+    """Stage: write dashboard_data.json."""
+    with open(path, 'w') as f:
+        json.dump(dashboard_data(metrics), f, indent=2)
+    return path
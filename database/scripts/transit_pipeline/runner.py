@@ -0,0 +1,348 @@
+"""
+Pipeline DAG Runner
+Purpose: Run pipeline stages in dependency order with per-stage result caching
+Author: Fleet Management System
+Date: 2026-10-16
+
+A stage's cache key combines its name, the source code of the module that implements it
+and of every transit_pipeline module that module imports (directly or through another
+one, lazy imports inside functions included), its parameters, the digests of its input files and the keys of the stages it depends on.
+A stage whose key matches the last successful run (and whose output files still exist) is
+skipped; its pickled result is loaded only if a stage that does run needs it. Independent
+stages run concurrently in a thread pool.
+
+Every planned stage is recorded in metrics.RECORDER: cache hits as such, stages that ran
+with their time, rows in/out, input/output file bytes and peak memory.
+"""
+
+import ast
+import datetime
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .config import CACHE_DIR
+from .metrics import RECORDER, StageMetrics, count_rows, file_bytes, peak_rss_mb
+
+STAGE_CACHE_DIR = CACHE_DIR / 'stages'
+
+# Every stage key also covers these modules (shared constants)
+SHARED_MODULES = ('transit_pipeline.config',)
+
+
+@dataclass
+class Stage:
+    """
+    One node of the pipeline DAG.
+
+    func is a 'module:function' reference, imported only when the stage actually runs. The
+    function is called with the results of deps (in order) followed by params as keywords.
+    """
+
+    name: str
+    func: str
+    deps: tuple = ()
+    params: dict = field(default_factory=dict)
+    inputs: tuple = ()       # source files hashed into the cache key
+    outputs: tuple = ()      # files the stage writes; a missing one forces a rerun
+    cache: bool = True       # pickle the result for downstream stages of later runs
+
+    @property
+    def module(self):
+        return self.func.split(':')[0]
+
+    def resolve(self):
+        module, name = self.func.split(':')
+        return getattr(importlib.import_module(module), name)
+
+
+@dataclass
+class StageRun:
+    name: str
+    status: str              # 'ran' or 'cached'
+    seconds: float = 0.0
+
+
+def _module_source(module):
+    """Source bytes of a module, read without importing it."""
+    spec = importlib.util.find_spec(module)
+    with open(spec.origin, 'rb') as f:
+        return f.read()
+
+
+def _is_package_module(name):
+    """True for a module (not a package attribute) of this package, checked on disk."""
+    parts = name.split('.')
+    if parts[0] != __package__ or len(parts) < 2:
+        return False
+    path = Path(__file__).parent.joinpath(*parts[1:])
+    return path.with_suffix('.py').exists() or (path / '__init__.py').exists()
+
+
+def _package_imports(module, source):
+    """Modules of this package imported anywhere in source (relative or absolute)."""
+    found = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = module.rsplit('.', node.level)[0]
+                base = f'{base}.{node.module}' if node.module else base
+            else:
+                base = node.module or ''
+            # 'from . import x' may name a submodule
+            names = [base] + [f'{base}.{alias.name}' for alias in node.names]
+        else:
+            continue
+        found.update(name for name in names if name != module and _is_package_module(name))
+    return found
+
+
+class _CodeDigests:
+    """Digest of a module's source together with every package module it transitively imports."""
+
+    def __init__(self):
+        self.sources = {}
+        self.imports = {}
+
+    def _scan(self, module):
+        if module not in self.sources:
+            source = _module_source(module)
+            self.sources[module] = hashlib.sha256(source).hexdigest()
+            self.imports[module] = _package_imports(module, source)
+
+    def closure(self, module):
+        seen, pending = set(), [module]
+        while pending:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            self._scan(name)
+            pending.extend(self.imports[name])
+        return seen
+
+    def digest(self, *modules):
+        closure = set().union(*(self.closure(module) for module in modules))
+        combined = hashlib.sha256()
+        for name in sorted(closure):
+            combined.update(f'{name}:{self.sources[name]}\n'.encode('utf-8'))
+        return combined.hexdigest()
+
+
+class Pipeline:
+    """A set of stages forming a DAG, with a result cache under cache_dir."""
+
+    def __init__(self, stages, cache_dir=STAGE_CACHE_DIR):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = Path(cache_dir)
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    # -------------------------------------------------------------------------
+    # Planning
+    # -------------------------------------------------------------------------
+
+    def plan(self, targets=None):
+        """Stage names needed for targets (all stages by default), in topological order."""
+        targets = list(self.stages) if not targets else list(targets)
+        order, visiting, done = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}'")
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in targets:
+            visit(name)
+        return order
+
+    def keys(self, names):
+        """Cache key of every stage in names (which must be in topological order)."""
+        digests = _FileDigests(self.cache_dir / 'file_digests.json')
+        code = _CodeDigests()
+        keys = {}
+        for name in names:
+            stage = self.stages[name]
+            payload = {
+                'name': name,
+                'func': stage.func,
+                'code': code.digest(stage.module, *SHARED_MODULES),
+                'params': sorted((k, repr(v)) for k, v in stage.params.items()),
+                'inputs': [digests.get(path) for path in stage.inputs],
+                'deps': [keys[dep] for dep in stage.deps],
+            }
+            keys[name] = hashlib.sha256(json.dumps(payload).encode('utf-8')).hexdigest()
+        digests.save()
+        return keys
+
+    # -------------------------------------------------------------------------
+    # Cache
+    # -------------------------------------------------------------------------
+
+    def _key_path(self, name):
+        return self.cache_dir / f'{name}.key'
+
+    def _result_path(self, name):
+        return self.cache_dir / f'{name}.pkl'
+
+    def is_fresh(self, name, key):
+        stage = self.stages[name]
+        key_path = self._key_path(name)
+        if not key_path.exists() or key_path.read_text() != key:
+            return False
+        if stage.cache and not self._result_path(name).exists():
+            return False
+        return all(Path(path).exists() for path in stage.outputs)
+
+    def _load_result(self, name):
+        with open(self._result_path(name), 'rb') as f:
+            return pickle.load(f)
+
+    def _store(self, name, key, result):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if self.stages[name].cache:
+            tmp_path = self._result_path(name).with_suffix('.pkl.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._result_path(name))
+        self._key_path(name).write_text(key)
+
+    # -------------------------------------------------------------------------
+    # Execution
+    # -------------------------------------------------------------------------
+
+    def run(self, targets=None, jobs=1, force=False, log=print, recorder=RECORDER):
+        """
+        Run the stages needed for targets, skipping the ones that are up to date.
+
+        Returns (results, runs): results of the stages that ran or had to be loaded, and a
+        StageRun per planned stage in completion order. Each stage is also recorded in
+        recorder (None: not instrumented).
+        """
+        names = self.plan(targets)
+        keys = self.keys(names)
+        to_run = {name for name in names if force or not self.is_fresh(name, keys[name])}
+
+        # A stage that runs needs its deps' results; a fresh dep without a pickled
+        # result (cache=False) has to run again
+        changed = True
+        while changed:
+            changed = False
+            for name in names:
+                if name in to_run:
+                    for dep in self.stages[name].deps:
+                        if dep not in to_run and not self.stages[dep].cache:
+                            to_run.add(dep)
+                            changed = True
+
+        results = {}
+        runs = []
+        for name in names:
+            if name not in to_run:
+                runs.append(StageRun(name, 'cached'))
+                if recorder is not None:
+                    recorder.cache_lookup('stage', hit=True)
+                    recorder.record(StageMetrics(name, cache='hit'))
+                log(f"  ✓ {name:<32} up to date")
+
+        for name in names:
+            if name in to_run:
+                for dep in self.stages[name].deps:
+                    if dep not in to_run and dep not in results:
+                        results[dep] = self._load_result(dep)
+
+        pending = [name for name in names if name in to_run]
+        running = {}
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            while pending or running:
+                for name in list(pending):
+                    if len(running) >= max(1, jobs):
+                        break
+                    if all(dep in results for dep in self.stages[name].deps):
+                        pending.remove(name)
+                        running[pool.submit(self._execute, name, results)] = name
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    result, metrics = future.result()
+                    self._store(name, keys[name], result)
+                    results[name] = result
+                    runs.append(StageRun(name, 'ran', metrics.seconds))
+                    if recorder is not None:
+                        recorder.cache_lookup('stage', hit=False)
+                        recorder.record(metrics)
+                    log(f"  ▶ {name:<32} {metrics.seconds:6.2f}s")
+        return results, runs
+
+    def _execute(self, name, results):
+        stage = self.stages[name]
+        func = stage.resolve()
+        args = [results[dep] for dep in stage.deps]
+        rows_in = [rows for rows in map(count_rows, args) if rows is not None]
+        metrics = StageMetrics(name, cache='miss', rows_in=sum(rows_in) if rows_in else None,
+                               bytes_read=file_bytes(stage.inputs) if stage.inputs else None,
+                               started_at=datetime.datetime.now().isoformat(timespec='seconds'))
+        start = time.perf_counter()
+        result = func(*args, **stage.params)
+        metrics.seconds = time.perf_counter() - start
+        metrics.rows_out = count_rows(result)
+        metrics.bytes_written = file_bytes(stage.outputs) if stage.outputs else None
+        metrics.peak_rss_mb = peak_rss_mb()
+        return result, metrics
+
+
+class _FileDigests:
+    """SHA-256 of input files, memoized on (size, mtime) so unchanged files are not re-read."""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        self.dirty = False
+
+    def get(self, path):
+        path = Path(path)
+        if not path.exists():
+            return None
+        stat = path.stat()
+        entry = self.entries.get(str(path))
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+
+        from .dataset_cache import file_sha256
+        digest = file_sha256(path)
+        self.entries[str(path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        self.dirty = True
+        return digest
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2)
+        self.dirty = False
@@ -0,0 +1,900 @@
+"""
+SQL Schema Stage
+Purpose: SQL Server schema for the bus transit database (04_create_database.sql)
+Author: Fleet Management System
+Date: 2026-10-16
+
+The script is assembled from one constant per section. USDOTTransportationStats is
+emitted from column types inferred from the data (sql_types.py) when a frame or profile
+is given. The other tables keep the standard layout unless expected_trips
+(DailyOperations rows) reaches LARGE_VOLUME_TRIPS; then DailyOperations and FuelPurchases
+get BIGINT keys, monthly partitions (pf_Monthly / ps_Monthly) and clustered columnstore
+indexes, the views and procedures get covering indexes, and vw_BusPerformance reads an
+indexed view of per-bus trip totals (SQL Server 2016 or later).
+"""
+
+HEADER_SQL = """-- ============================================================================
+-- US Bus Transit Management Database Schema
+-- Generated from real US DOT data (2015-2023)
+-- Author: Harvad Li
+-- Date: 2024-12-30
+-- ============================================================================
+
+USE master;
+GO
+
+-- Drop database if exists
+IF EXISTS (SELECT name FROM sys.databases WHERE name = 'USBusTransit')
+BEGIN
+    ALTER DATABASE USBusTransit SET SINGLE_USER WITH ROLLBACK IMMEDIATE;
+    DROP DATABASE USBusTransit;
+END
+GO
+
+-- Create database
+CREATE DATABASE USBusTransit;
+GO
+
+USE USBusTransit;
+GO
+
+"""
+
+STATS_TABLE_SQL = """-- ============================================================================
+-- TABLE 1: US DOT Transportation Statistics (Historical Data)
+-- Source: US Department of Transportation - Bureau of Transportation Statistics
+-- ============================================================================
+
+CREATE TABLE USDOTTransportationStats (
+    StatId INT PRIMARY KEY IDENTITY(1,1),
+    Date DATE NOT NULL UNIQUE,
+    Year INT NOT NULL,
+    Month INT NOT NULL,
+    Quarter INT NOT NULL,
+    
+    -- Bus Ridership (PRIMARY METRIC)
+    BusRidership BIGINT NULL,                    -- Monthly bus passengers
+    RailRidership BIGINT NULL,                   -- Monthly rail passengers
+    OtherTransitRidership BIGINT NULL,           -- Other transit modes
+    
+    -- Fuel Prices (COST ANALYSIS)
+    DieselPrice DECIMAL(10,3) NULL,              -- $/gallon
+    GasolinePrice DECIMAL(10,3) NULL,            -- $/gallon
+    
+    -- Highway/Traffic Data (ROUTE OPTIMIZATION)
+    HighwayMilesTraveled BIGINT NULL,            -- Total miles
+    HighwayFatalities INT NULL,                  -- Monthly fatalities
+    FatalityRate DECIMAL(10,3) NULL,             -- Per 100M miles
+    
+    -- Employment (WORKFORCE PLANNING)
+    TransitEmployment INT NULL,                  -- Transit workers
+    TruckEmployment INT NULL,                    -- Truck drivers
+    
+    -- Economic Indicators
+    UnemploymentRate DECIMAL(5,3) NULL,          -- Percentage
+    GDP BIGINT NULL,                             -- Real GDP
+    
+    -- Vehicle Sales (MARKET TRENDS)
+    HeavyTruckSales INT NULL,
+    AutoSales INT NULL,
+    
+    -- Calculated Fields
+    IsCOVIDPeriod BIT NOT NULL DEFAULT 0,        -- COVID period flag
+    EstimatedFuelCostPerMonth DECIMAL(12,2) NULL,
+    EstimatedCostPerPassenger DECIMAL(10,4) NULL,
+    
+    -- Metadata
+    CreatedAt DATETIME2 DEFAULT GETDATE(),
+    UpdatedAt DATETIME2 DEFAULT GETDATE()
+);
+GO
+
+-- Index for date queries
+CREATE INDEX IX_USDOTStats_Date ON USDOTTransportationStats(Date);
+CREATE INDEX IX_USDOTStats_Year ON USDOTTransportationStats(Year);
+CREATE INDEX IX_USDOTStats_COVID ON USDOTTransportationStats(IsCOVIDPeriod);
+GO
+
+"""
+
+FLEET_TABLES_SQL = """-- ============================================================================
+-- TABLE 2: Bus Fleet (Simulated based on typical small city fleet)
+-- ============================================================================
+
+CREATE TABLE BusFleet (
+    BusId INT PRIMARY KEY IDENTITY(1,1),
+    BusNumber NVARCHAR(20) NOT NULL UNIQUE,      -- e.g., "BUS-001"
+    VIN NVARCHAR(17) UNIQUE,                     -- Vehicle Identification Number
+    
+    -- Bus Details
+    Manufacturer NVARCHAR(50) NOT NULL,          -- e.g., "Volvo", "New Flyer"
+    Model NVARCHAR(50) NOT NULL,                 -- e.g., "7900 Hybrid"
+    Year INT NOT NULL,
+    Capacity INT NOT NULL,                       -- Passenger capacity
+    
+    -- Fuel & Efficiency
+    FuelType NVARCHAR(20) NOT NULL,              -- Diesel, CNG, Electric, Hybrid
+    AverageMPG DECIMAL(5,2) NULL,                -- Miles per gallon
+    
+    -- Status
+    Status NVARCHAR(20) NOT NULL,                -- Operational, Maintenance, Retired
+    CurrentOdometer INT NULL,                    -- Current miles
+    
+    -- Dates
+    PurchaseDate DATE NOT NULL,
+    LastMaintenanceDate DATE NULL,
+    NextMaintenanceDate DATE NULL,
+    
+    -- Metadata
+    CreatedAt DATETIME2 DEFAULT GETDATE(),
+    UpdatedAt DATETIME2 DEFAULT GETDATE(),
+    
+    CONSTRAINT CK_BusFleet_Status CHECK (Status IN ('Operational', 'Maintenance', 'Retired')),
+    CONSTRAINT CK_BusFleet_FuelType CHECK (FuelType IN ('Diesel', 'CNG', 'Electric', 'Hybrid'))
+);
+GO
+
+CREATE INDEX IX_BusFleet_Status ON BusFleet(Status);
+CREATE INDEX IX_BusFleet_Year ON BusFleet(Year);
+GO
+
+-- ============================================================================
+-- TABLE 3: Routes
+-- ============================================================================
+
+CREATE TABLE Routes (
+    RouteId INT PRIMARY KEY IDENTITY(1,1),
+    RouteNumber NVARCHAR(20) NOT NULL UNIQUE,    -- e.g., "Route 1", "Downtown Express"
+    RouteName NVARCHAR(100) NOT NULL,
+    
+    -- Route Details
+    StartLocation NVARCHAR(100) NOT NULL,
+    EndLocation NVARCHAR(100) NOT NULL,
+    TotalDistance DECIMAL(10,2) NOT NULL,        -- Miles
+    EstimatedDuration INT NOT NULL,              -- Minutes
+    
+    -- Schedule
+    IsActive BIT NOT NULL DEFAULT 1,
+    ServiceDays NVARCHAR(50) NOT NULL,           -- e.g., "Mon-Fri", "Daily"
+    
+    -- Metadata
+    CreatedAt DATETIME2 DEFAULT GETDATE(),
+    UpdatedAt DATETIME2 DEFAULT GETDATE()
+);
+GO
+
+"""
+
+DAILY_OPERATIONS_SQL = """-- ============================================================================
+-- TABLE 4: Daily Operations (Trip Records)
+-- ============================================================================
+
+CREATE TABLE DailyOperations (
+    OperationId INT PRIMARY KEY IDENTITY(1,1),
+    BusId INT NOT NULL FOREIGN KEY REFERENCES BusFleet(BusId),
+    RouteId INT NOT NULL FOREIGN KEY REFERENCES Routes(RouteId),
+    
+    -- Trip Details
+    TripDate DATE NOT NULL,
+    DepartureTime TIME NOT NULL,
+    ArrivalTime TIME NULL,
+    
+    -- Performance Metrics
+    PassengerCount INT NULL,
+    ActualDistance DECIMAL(10,2) NULL,           -- Miles
+    FuelConsumed DECIMAL(10,2) NULL,             -- Gallons
+    FuelCost DECIMAL(10,2) NULL,                 -- Dollars
+    
+    -- Status
+    TripStatus NVARCHAR(20) NOT NULL,            -- Completed, Cancelled, Delayed
+    DelayMinutes INT NULL,
+    
+    -- Metadata
+    CreatedAt DATETIME2 DEFAULT GETDATE(),
+    
+    CONSTRAINT CK_DailyOps_Status CHECK (TripStatus IN ('Completed', 'Cancelled', 'Delayed'))
+);
+GO
+
+CREATE INDEX IX_DailyOps_Date ON DailyOperations(TripDate);
+CREATE INDEX IX_DailyOps_Bus ON DailyOperations(BusId);
+CREATE INDEX IX_DailyOps_Route ON DailyOperations(RouteId);
+GO
+
+"""
+
+MAINTENANCE_RECORDS_SQL = """-- ============================================================================
+-- TABLE 5: Maintenance Records
+-- ============================================================================
+
+CREATE TABLE MaintenanceRecords (
+    MaintenanceId INT PRIMARY KEY IDENTITY(1,1),
+    BusId INT NOT NULL FOREIGN KEY REFERENCES BusFleet(BusId),
+    
+    -- Maintenance Details
+    MaintenanceDate DATE NOT NULL,
+    MaintenanceType NVARCHAR(50) NOT NULL,       -- Preventive, Corrective, Emergency
+    Description NVARCHAR(500) NULL,
+    
+    -- Cost
+    LaborCost DECIMAL(10,2) NULL,
+    PartsCost DECIMAL(10,2) NULL,
+    TotalCost DECIMAL(10,2) NULL,
+    
+    -- Odometer
+    OdometerAtMaintenance INT NULL,
+    
+    -- Status
+    Status NVARCHAR(20) NOT NULL,                -- Scheduled, InProgress, Completed
+    
+    -- Metadata
+    CreatedAt DATETIME2 DEFAULT GETDATE(),
+    CompletedAt DATETIME2 NULL,
+    
+    CONSTRAINT CK_Maintenance_Type CHECK (MaintenanceType IN ('Preventive', 'Corrective', 'Emergency')),
+    CONSTRAINT CK_Maintenance_Status CHECK (Status IN ('Scheduled', 'InProgress', 'Completed'))
+);
+GO
+
+CREATE INDEX IX_Maintenance_Bus ON MaintenanceRecords(BusId);
+CREATE INDEX IX_Maintenance_Date ON MaintenanceRecords(MaintenanceDate);
+GO
+
+"""
+
+FUEL_PURCHASES_SQL = """-- ============================================================================
+-- TABLE 6: Fuel Purchases
+-- ============================================================================
+
+CREATE TABLE FuelPurchases (
+    PurchaseId INT PRIMARY KEY IDENTITY(1,1),
+    BusId INT NOT NULL FOREIGN KEY REFERENCES BusFleet(BusId),
+    
+    -- Purchase Details
+    PurchaseDate DATE NOT NULL,
+    Gallons DECIMAL(10,2) NOT NULL,
+    PricePerGallon DECIMAL(10,3) NOT NULL,
+    TotalCost DECIMAL(10,2) NOT NULL,
+    
+    -- Location
+    FuelStation NVARCHAR(100) NULL,
+    
+    -- Odometer
+    OdometerAtPurchase INT NULL,
+    
+    -- Metadata
+    CreatedAt DATETIME2 DEFAULT GETDATE()
+);
+GO
+
+CREATE INDEX IX_FuelPurchases_Bus ON FuelPurchases(BusId);
+CREATE INDEX IX_FuelPurchases_Date ON FuelPurchases(PurchaseDate);
+GO
+
+"""
+
+ALERTS_SQL = """-- ============================================================================
+-- TABLE 7: Alerts (Predictive Maintenance, Cost Warnings)
+-- ============================================================================
+
+CREATE TABLE Alerts (
+    AlertId INT PRIMARY KEY IDENTITY(1,1),
+    BusId INT NULL FOREIGN KEY REFERENCES BusFleet(BusId),
+    
+    -- Alert Details
+    AlertType NVARCHAR(50) NOT NULL,             -- Maintenance, Fuel, Performance, Safety
+    Severity NVARCHAR(20) NOT NULL,              -- Low, Medium, High, Critical
+    Title NVARCHAR(200) NOT NULL,
+    Message NVARCHAR(1000) NOT NULL,
+    
+    -- Status
+    Status NVARCHAR(20) NOT NULL,                -- New, Acknowledged, Resolved
+    CreatedAt DATETIME2 DEFAULT GETDATE(),
+    AcknowledgedAt DATETIME2 NULL,
+    ResolvedAt DATETIME2 NULL,
+    
+    CONSTRAINT CK_Alert_Type CHECK (AlertType IN ('Maintenance', 'Fuel', 'Performance', 'Safety')),
+    CONSTRAINT CK_Alert_Severity CHECK (Severity IN ('Low', 'Medium', 'High', 'Critical')),
+    CONSTRAINT CK_Alert_Status CHECK (Status IN ('New', 'Acknowledged', 'Resolved'))
+);
+GO
+
+CREATE INDEX IX_Alerts_Status ON Alerts(Status);
+CREATE INDEX IX_Alerts_Severity ON Alerts(Severity);
+CREATE INDEX IX_Alerts_Bus ON Alerts(BusId);
+GO
+
+"""
+
+DASHBOARD_SNAPSHOT_SQL = """-- ============================================================================
+-- TABLE 8: Dashboard Snapshot (Monthly KPI Facts)
+-- Refreshed by the pipeline after each load (python -m transit_pipeline.snapshot)
+-- ============================================================================
+
+CREATE TABLE DashboardSnapshot (
+    SnapshotMonth DATE PRIMARY KEY,              -- First day of the month
+    
+    -- Fleet Status (at refresh time)
+    OperationalBuses INT NOT NULL DEFAULT 0,
+    BusesInMaintenance INT NOT NULL DEFAULT 0,
+    TotalBuses INT NOT NULL DEFAULT 0,
+    
+    -- Ridership and Fuel
+    BusRidership BIGINT NULL,                    -- This month
+    DieselPrice DECIMAL(10,3) NULL,              -- This month, $/gallon
+    LatestMonthRidership BIGINT NULL,            -- Latest reported up to this month
+    CurrentDieselPrice DECIMAL(10,3) NULL,       -- Latest reported up to this month
+    
+    -- Operations (this month)
+    Trips INT NOT NULL DEFAULT 0,
+    Passengers BIGINT NULL,
+    FuelCost DECIMAL(14,2) NULL,
+    MaintenanceCost DECIMAL(14,2) NULL,
+    
+    -- Alerts (at refresh time)
+    NewAlerts INT NOT NULL DEFAULT 0,
+    CriticalAlerts INT NOT NULL DEFAULT 0,
+    
+    RefreshedAt DATETIME2 DEFAULT GETDATE()
+);
+GO
+
+"""
+
+VIEWS_SQL = """-- ============================================================================
+-- VIEWS FOR COMMON QUERIES
+-- ============================================================================
+
+-- View: Fleet Summary
+CREATE VIEW vw_FleetSummary AS
+SELECT 
+    Status,
+    COUNT(*) AS BusCount,
+    AVG(CurrentOdometer) AS AvgOdometer,
+    AVG(YEAR(GETDATE()) - Year) AS AvgAge,
+    AVG(AverageMPG) AS AvgMPG
+FROM BusFleet
+GROUP BY Status;
+GO
+
+-- View: Monthly Ridership Trends
+CREATE VIEW vw_MonthlyRidershipTrends AS
+SELECT 
+    Year,
+    Month,
+    BusRidership,
+    DieselPrice,
+    IsCOVIDPeriod,
+    EstimatedCostPerPassenger,
+    LAG(BusRidership) OVER (ORDER BY Date) AS PreviousMonthRidership,
+    ((BusRidership - LAG(BusRidership) OVER (ORDER BY Date)) * 100.0 / 
+     NULLIF(LAG(BusRidership) OVER (ORDER BY Date), 0)) AS RidershipChangePercent
+FROM USDOTTransportationStats
+WHERE BusRidership IS NOT NULL;
+GO
+
+-- View: Fuel Cost Analysis
+CREATE VIEW vw_FuelCostAnalysis AS
+SELECT 
+    Year,
+    AVG(DieselPrice) AS AvgDieselPrice,
+    MIN(DieselPrice) AS MinDieselPrice,
+    MAX(DieselPrice) AS MaxDieselPrice,
+    AVG(GasolinePrice) AS AvgGasolinePrice
+FROM USDOTTransportationStats
+WHERE DieselPrice IS NOT NULL
+GROUP BY Year;
+GO
+
+"""
+
+BUS_PERFORMANCE_VIEW_SQL = """-- View: Bus Performance
+CREATE VIEW vw_BusPerformance AS
+SELECT 
+    b.BusId,
+    b.BusNumber,
+    b.Manufacturer,
+    b.Model,
+    b.Year,
+    b.CurrentOdometer,
+    COUNT(DISTINCT do.OperationId) AS TotalTrips,
+    SUM(do.PassengerCount) AS TotalPassengers,
+    SUM(do.FuelConsumed) AS TotalFuelConsumed,
+    SUM(do.FuelCost) AS TotalFuelCost,
+    AVG(do.PassengerCount) AS AvgPassengersPerTrip,
+    CASE 
+        WHEN SUM(do.FuelConsumed) > 0 
+        THEN SUM(do.ActualDistance) / SUM(do.FuelConsumed)
+        ELSE NULL 
+    END AS ActualMPG
+FROM BusFleet b
+LEFT JOIN DailyOperations do ON b.BusId = do.BusId
+GROUP BY b.BusId, b.BusNumber, b.Manufacturer, b.Model, b.Year, b.CurrentOdometer;
+GO
+
+"""
+
+PROCEDURES_SQL = """-- ============================================================================
+-- STORED PROCEDURES
+-- ============================================================================
+
+-- Procedure: Get Dashboard KPIs
+-- Reads the latest precomputed DashboardSnapshot row; the live queries are only the
+-- fallback before the first snapshot refresh
+CREATE PROCEDURE sp_GetDashboardKPIs
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    IF EXISTS (SELECT 1 FROM DashboardSnapshot)
+    BEGIN
+        SELECT TOP 1
+            OperationalBuses,
+            BusesInMaintenance,
+            TotalBuses,
+            LatestMonthRidership,
+            CurrentDieselPrice,
+            NewAlerts,
+            CriticalAlerts
+        FROM DashboardSnapshot
+        ORDER BY SnapshotMonth DESC;
+        RETURN;
+    END;
+    
+    SELECT 
+        -- Fleet Status
+        (SELECT COUNT(*) FROM BusFleet WHERE Status = 'Operational') AS OperationalBuses,
+        (SELECT COUNT(*) FROM BusFleet WHERE Status = 'Maintenance') AS BusesInMaintenance,
+        (SELECT COUNT(*) FROM BusFleet) AS TotalBuses,
+        
+        -- Recent Ridership
+        (SELECT TOP 1 BusRidership FROM USDOTTransportationStats 
+         WHERE BusRidership IS NOT NULL ORDER BY Date DESC) AS LatestMonthRidership,
+        
+        -- Fuel Prices
+        (SELECT TOP 1 DieselPrice FROM USDOTTransportationStats 
+         WHERE DieselPrice IS NOT NULL ORDER BY Date DESC) AS CurrentDieselPrice,
+        
+        -- Alerts
+        (SELECT COUNT(*) FROM Alerts WHERE Status = 'New') AS NewAlerts,
+        (SELECT COUNT(*) FROM Alerts WHERE Status = 'New' AND Severity = 'Critical') AS CriticalAlerts;
+END;
+GO
+
+-- Procedure: Get Ridership Trends
+CREATE PROCEDURE sp_GetRidershipTrends
+    @StartDate DATE,
+    @EndDate DATE
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    SELECT 
+        Date,
+        Year,
+        Month,
+        BusRidership,
+        DieselPrice,
+        IsCOVIDPeriod,
+        EstimatedCostPerPassenger
+    FROM USDOTTransportationStats
+    WHERE Date BETWEEN @StartDate AND @EndDate
+        AND BusRidership IS NOT NULL
+    ORDER BY Date;
+END;
+GO
+
+"""
+
+FOOTER_SQL = """-- ============================================================================
+-- SAMPLE DATA NOTES
+-- ============================================================================
+
+PRINT '
+============================================================================
+DATABASE SCHEMA CREATED SUCCESSFULLY!
+============================================================================
+
+Tables Created:
+1. USDOTTransportationStats - Real US DOT data (2015-2023)
+2. BusFleet - Bus inventory
+3. Routes - Bus routes
+4. DailyOperations - Trip records
+5. MaintenanceRecords - Maintenance history
+6. FuelPurchases - Fuel purchase records
+7. Alerts - System alerts
+8. DashboardSnapshot - Monthly KPI facts behind sp_GetDashboardKPIs
+
+Views Created:
+- vw_FleetSummary
+- vw_MonthlyRidershipTrends
+- vw_FuelCostAnalysis
+- vw_BusPerformance
+
+Stored Procedures:
+- sp_GetDashboardKPIs
+- sp_GetRidershipTrends
+
+Next Steps:
+1. Run python 05_import_data.py to load US DOT data (also refreshes DashboardSnapshot)
+2. Run python 06_generate_sample_fleet.py to create sample bus fleet data
+3. Build .NET API with Entity Framework models
+
+============================================================================
+';
+GO
+"""
+
+
+# =============================================================================
+# DATA-DRIVEN USDOTTransportationStats
+# =============================================================================
+
+# Column order, section comments and notes of TABLE 1; the types come from the data
+STATS_SECTIONS = [
+    (None, ['Date', 'Year', 'Month', 'Quarter']),
+    ('Bus Ridership (PRIMARY METRIC)', ['BusRidership', 'RailRidership', 'OtherTransitRidership']),
+    ('Fuel Prices (COST ANALYSIS)', ['DieselPrice', 'GasolinePrice']),
+    ('Highway/Traffic Data (ROUTE OPTIMIZATION)', ['HighwayMilesTraveled', 'HighwayFatalities', 'FatalityRate']),
+    ('Employment (WORKFORCE PLANNING)', ['TransitEmployment', 'TruckEmployment']),
+    ('Economic Indicators', ['UnemploymentRate', 'GDP']),
+    ('Vehicle Sales (MARKET TRENDS)', ['HeavyTruckSales', 'AutoSales']),
+    ('Calculated Fields', ['IsCOVIDPeriod', 'EstimatedFuelCostPerMonth', 'EstimatedCostPerPassenger']),
+]
+
+STATS_NOTES = {
+    'BusRidership': 'Monthly bus passengers',
+    'RailRidership': 'Monthly rail passengers',
+    'OtherTransitRidership': 'Other transit modes',
+    'DieselPrice': '$/gallon',
+    'GasolinePrice': '$/gallon',
+    'HighwayMilesTraveled': 'Total miles',
+    'HighwayFatalities': 'Monthly fatalities',
+    'FatalityRate': 'Per 100M miles',
+    'TransitEmployment': 'Transit workers',
+    'TruckEmployment': 'Truck drivers',
+    'UnemploymentRate': 'Percentage',
+    'GDP': 'Real GDP',
+    'IsCOVIDPeriod': 'COVID period flag',
+}
+
+# Constraints that do not depend on the data
+STATS_CONSTRAINTS = {'Date': 'NOT NULL UNIQUE', 'IsCOVIDPeriod': 'NOT NULL DEFAULT 0'}
+
+STATS_TABLE_HEAD_SQL = STATS_TABLE_SQL.split('    StatId INT', 1)[0]
+STATS_TABLE_TAIL_SQL = '    -- Metadata' + STATS_TABLE_SQL.split('    -- Metadata', 1)[1]
+
+
+def stats_table_sql(sql_types):
+    """
+    TABLE 1 with the columns of sql_types ({column: (SQL type, nullable)}, see sql_types.py),
+    laid out in STATS_SECTIONS order; columns outside the layout follow under Other Columns.
+    """
+    def line(col):
+        sql_type, nullable = sql_types[col]
+        constraint = STATS_CONSTRAINTS.get(col, 'NULL' if nullable else 'NOT NULL')
+        text = f'    {col} {sql_type} {constraint},'
+        return f'{text:<48} -- {STATS_NOTES[col]}' if col in STATS_NOTES else text
+
+    laid_out = {col for _, cols in STATS_SECTIONS for col in cols}
+    sections = STATS_SECTIONS + [('Other Columns', [col for col in sql_types if col not in laid_out])]
+    lines = ['    StatId INT PRIMARY KEY IDENTITY(1,1),']
+    for title, cols in sections:
+        cols = [col for col in cols if col in sql_types]
+        if not cols:
+            continue
+        if title:
+            lines += ['    ', f'    -- {title}']
+        lines += [line(col) for col in cols]
+    return STATS_TABLE_HEAD_SQL + '\n'.join(lines) + '\n    \n' + STATS_TABLE_TAIL_SQL
+
+# Standard schema (small and medium volumes)
+SCHEMA_SQL = ''.join([HEADER_SQL, STATS_TABLE_SQL, FLEET_TABLES_SQL, DAILY_OPERATIONS_SQL,
+                      MAINTENANCE_RECORDS_SQL, FUEL_PURCHASES_SQL, ALERTS_SQL, DASHBOARD_SNAPSHOT_SQL,
+                      VIEWS_SQL, BUS_PERFORMANCE_VIEW_SQL, PROCEDURES_SQL, FOOTER_SQL])
+
+# =============================================================================
+# HIGH-VOLUME VARIANTS (expected_trips >= LARGE_VOLUME_TRIPS)
+# =============================================================================
+
+# DailyOperations rows above which the fact tables get BIGINT keys, monthly partitions and
+# clustered columnstore indexes (a columnstore rowgroup holds ~1M rows, so smaller tables
+# gain little from it)
+LARGE_VOLUME_TRIPS = 10_000_000
+
+# Monthly partition boundaries: from the first data month this many months ahead
+PARTITION_MONTHS_AHEAD = 36
+DEFAULT_PARTITION_START = '2015-01-01'
+DEFAULT_PARTITION_END = '2026-12-01'
+
+PARTITIONING_SQL = """-- ============================================================================
+-- PARTITIONING: one partition per month for the trip and fuel fact tables
+-- Add months ahead of the data with:
+--   ALTER PARTITION SCHEME ps_Monthly NEXT USED [PRIMARY];
+--   ALTER PARTITION FUNCTION pf_Monthly() SPLIT RANGE ('YYYY-MM-01');
+-- ============================================================================
+
+CREATE PARTITION FUNCTION pf_Monthly (DATE)
+AS RANGE RIGHT FOR VALUES (
+{boundaries}
+);
+GO
+
+CREATE PARTITION SCHEME ps_Monthly
+AS PARTITION pf_Monthly ALL TO ([PRIMARY]);
+GO
+
+"""
+
+LARGE_DAILY_OPERATIONS_SQL = """-- ============================================================================
+-- TABLE 4: Daily Operations (Trip Records)
+-- High volume: BIGINT key, partitioned by TripDate month, clustered columnstore
+-- ============================================================================
+
+CREATE TABLE DailyOperations (
+    OperationId BIGINT IDENTITY(1,1) NOT NULL,
+    BusId INT NOT NULL FOREIGN KEY REFERENCES BusFleet(BusId),
+    RouteId INT NOT NULL FOREIGN KEY REFERENCES Routes(RouteId),
+    
+    -- Trip Details
+    TripDate DATE NOT NULL,
+    DepartureTime TIME NOT NULL,
+    ArrivalTime TIME NULL,
+    
+    -- Performance Metrics
+    PassengerCount INT NULL,
+    ActualDistance DECIMAL(10,2) NULL,           -- Miles
+    FuelConsumed DECIMAL(10,2) NULL,             -- Gallons
+    FuelCost DECIMAL(10,2) NULL,                 -- Dollars
+    
+    -- Status
+    TripStatus NVARCHAR(20) NOT NULL,            -- Completed, Cancelled, Delayed
+    DelayMinutes INT NULL,
+    
+    -- Metadata
+    CreatedAt DATETIME2 DEFAULT GETDATE(),
+    
+    CONSTRAINT CK_DailyOps_Status CHECK (TripStatus IN ('Completed', 'Cancelled', 'Delayed')),
+    -- Partition-aligned: the partitioning column is part of the key
+    CONSTRAINT PK_DailyOperations PRIMARY KEY NONCLUSTERED (OperationId, TripDate) ON ps_Monthly(TripDate)
+) ON ps_Monthly(TripDate);
+GO
+
+CREATE CLUSTERED COLUMNSTORE INDEX CCI_DailyOperations ON DailyOperations ON ps_Monthly(TripDate);
+GO
+
+-- Covering rowstore indexes for per-bus / per-route lookups (vw_BusPerformance, route reports)
+CREATE INDEX IX_DailyOps_Bus ON DailyOperations(BusId, TripDate)
+    INCLUDE (PassengerCount, ActualDistance, FuelConsumed, FuelCost) ON ps_Monthly(TripDate);
+CREATE INDEX IX_DailyOps_Route ON DailyOperations(RouteId, TripDate)
+    INCLUDE (PassengerCount, TripStatus, DelayMinutes) ON ps_Monthly(TripDate);
+GO
+
+"""
+
+LARGE_MAINTENANCE_RECORDS_SQL = """-- ============================================================================
+-- TABLE 5: Maintenance Records
+-- High volume: BIGINT key (rowstore: volume follows the fleet, not the trips)
+-- ============================================================================
+
+CREATE TABLE MaintenanceRecords (
+    MaintenanceId BIGINT PRIMARY KEY IDENTITY(1,1),
+    BusId INT NOT NULL FOREIGN KEY REFERENCES BusFleet(BusId),
+    
+    -- Maintenance Details
+    MaintenanceDate DATE NOT NULL,
+    MaintenanceType NVARCHAR(50) NOT NULL,       -- Preventive, Corrective, Emergency
+    Description NVARCHAR(500) NULL,
+    
+    -- Cost
+    LaborCost DECIMAL(10,2) NULL,
+    PartsCost DECIMAL(10,2) NULL,
+    TotalCost DECIMAL(10,2) NULL,
+    
+    -- Odometer
+    OdometerAtMaintenance INT NULL,
+    
+    -- Status
+    Status NVARCHAR(20) NOT NULL,                -- Scheduled, InProgress, Completed
+    
+    -- Metadata
+    CreatedAt DATETIME2 DEFAULT GETDATE(),
+    CompletedAt DATETIME2 NULL,
+    
+    CONSTRAINT CK_Maintenance_Type CHECK (MaintenanceType IN ('Preventive', 'Corrective', 'Emergency')),
+    CONSTRAINT CK_Maintenance_Status CHECK (Status IN ('Scheduled', 'InProgress', 'Completed'))
+);
+GO
+
+-- Per-bus history (latest maintenance, cost per bus) without key lookups
+CREATE INDEX IX_Maintenance_Bus ON MaintenanceRecords(BusId, MaintenanceDate)
+    INCLUDE (MaintenanceType, TotalCost, OdometerAtMaintenance, Status);
+CREATE INDEX IX_Maintenance_Date ON MaintenanceRecords(MaintenanceDate);
+GO
+
+"""
+
+LARGE_FUEL_PURCHASES_SQL = """-- ============================================================================
+-- TABLE 6: Fuel Purchases
+-- High volume: BIGINT key, partitioned by PurchaseDate month, clustered columnstore
+-- ============================================================================
+
+CREATE TABLE FuelPurchases (
+    PurchaseId BIGINT IDENTITY(1,1) NOT NULL,
+    BusId INT NOT NULL FOREIGN KEY REFERENCES BusFleet(BusId),
+    
+    -- Purchase Details
+    PurchaseDate DATE NOT NULL,
+    Gallons DECIMAL(10,2) NOT NULL,
+    PricePerGallon DECIMAL(10,3) NOT NULL,
+    TotalCost DECIMAL(10,2) NOT NULL,
+    
+    -- Location
+    FuelStation NVARCHAR(100) NULL,
+    
+    -- Odometer
+    OdometerAtPurchase INT NULL,
+    
+    -- Metadata
+    CreatedAt DATETIME2 DEFAULT GETDATE(),
+    
+    -- Partition-aligned: the partitioning column is part of the key
+    CONSTRAINT PK_FuelPurchases PRIMARY KEY NONCLUSTERED (PurchaseId, PurchaseDate) ON ps_Monthly(PurchaseDate)
+) ON ps_Monthly(PurchaseDate);
+GO
+
+CREATE CLUSTERED COLUMNSTORE INDEX CCI_FuelPurchases ON FuelPurchases ON ps_Monthly(PurchaseDate);
+GO
+
+CREATE INDEX IX_FuelPurchases_Bus ON FuelPurchases(BusId, PurchaseDate)
+    INCLUDE (Gallons, PricePerGallon, TotalCost) ON ps_Monthly(PurchaseDate);
+GO
+
+"""
+
+# Indexed views need SCHEMABINDING, two-part names, COUNT_BIG(*) and SUMs of non-nullable
+# expressions, and cannot contain outer joins or COUNT(DISTINCT): the per-bus trip totals
+# are materialized on their own and joined to BusFleet by the view
+LARGE_BUS_PERFORMANCE_VIEW_SQL = """-- View: Bus Trip Totals (indexed: maintained by SQL Server on every DailyOperations write)
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+GO
+
+CREATE VIEW dbo.vw_BusTripTotals
+WITH SCHEMABINDING
+AS
+SELECT 
+    BusId,
+    COUNT_BIG(*) AS TotalTrips,
+    SUM(ISNULL(PassengerCount, 0)) AS TotalPassengers,
+    SUM(CASE WHEN PassengerCount IS NULL THEN 0 ELSE 1 END) AS TripsWithPassengerCount,
+    SUM(ISNULL(ActualDistance, 0)) AS TotalDistance,
+    SUM(ISNULL(FuelConsumed, 0)) AS TotalFuelConsumed,
+    SUM(ISNULL(FuelCost, 0)) AS TotalFuelCost
+FROM dbo.DailyOperations
+GROUP BY BusId;
+GO
+
+CREATE UNIQUE CLUSTERED INDEX IX_vw_BusTripTotals ON dbo.vw_BusTripTotals(BusId);
+GO
+
+-- View: Bus Performance (reads the materialized totals; OperationId is unique, so
+-- COUNT(DISTINCT OperationId) is the trip count)
+CREATE VIEW vw_BusPerformance AS
+SELECT 
+    b.BusId,
+    b.BusNumber,
+    b.Manufacturer,
+    b.Model,
+    b.Year,
+    b.CurrentOdometer,
+    ISNULL(t.TotalTrips, 0) AS TotalTrips,
+    t.TotalPassengers,
+    t.TotalFuelConsumed,
+    t.TotalFuelCost,
+    t.TotalPassengers / NULLIF(t.TripsWithPassengerCount, 0) AS AvgPassengersPerTrip,
+    CASE 
+        WHEN t.TotalFuelConsumed > 0 
+        THEN t.TotalDistance / t.TotalFuelConsumed
+        ELSE NULL 
+    END AS ActualMPG
+FROM BusFleet b
+LEFT JOIN dbo.vw_BusTripTotals t WITH (NOEXPAND) ON b.BusId = t.BusId;
+GO
+
+"""
+
+ACCESS_PATH_INDEXES_SQL = """-- ============================================================================
+-- COVERING INDEXES FOR THE VIEW AND PROCEDURE ACCESS PATHS
+-- ============================================================================
+
+-- sp_GetRidershipTrends (Date range), DashboardSnapshot refresh (latest values), vw_MonthlyRidershipTrends
+CREATE INDEX IX_USDOTStats_Date_Covering ON USDOTTransportationStats(Date)
+    INCLUDE (Year, Month, BusRidership, DieselPrice, IsCOVIDPeriod, EstimatedCostPerPassenger);
+
+-- vw_FuelCostAnalysis
+CREATE INDEX IX_USDOTStats_Year_Fuel ON USDOTTransportationStats(Year)
+    INCLUDE (DieselPrice, GasolinePrice);
+
+-- DashboardSnapshot refresh alert counts
+CREATE INDEX IX_Alerts_Status_Severity ON Alerts(Status, Severity);
+GO
+
+"""
+
+
+
+def _months(first, last):
+    """'YYYY-MM-01' strings from the month of first through the month of last."""
+    year, month = int(first[:4]), int(first[5:7])
+    months = []
+    while (year, month) <= (int(last[:4]), int(last[5:7])):
+        months.append(f'{year:04d}-{month:02d}-01')
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def partition_range(date_range=None):
+    """(first, last) monthly partition boundary: the data's months plus PARTITION_MONTHS_AHEAD."""
+    if date_range is None:
+        return DEFAULT_PARTITION_START, DEFAULT_PARTITION_END
+    first, last = (str(date)[:7] for date in date_range)
+    year, month = int(last[:4]), int(last[5:7]) + PARTITION_MONTHS_AHEAD
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return f'{first}-01', f'{year:04d}-{month:02d}-01'
+
+
+def partitioning_sql(first, last):
+    """pf_Monthly / ps_Monthly with one boundary per month, a year per line."""
+    months = _months(first, last)
+    lines = [', '.join(f"'{month}'" for month in months[i:i + 12]) for i in range(0, len(months), 12)]
+    return PARTITIONING_SQL.format(boundaries=',\n'.join(f'    {line}' for line in lines))
+
+
+def generate_schema(df=None, expected_trips=None, sql_types=None, date_range=None):
+    """
+    SQL Server DDL for the transit database.
+
+    The USDOTTransportationStats column types are inferred from df (one profiling pass), or
+    taken from sql_types (e.g. a streamed CSV profile, see sql_types.py); without either the
+    standard types are kept.
+
+    expected_trips (DailyOperations rows) at or above LARGE_VOLUME_TRIPS switches the fact
+    tables to BIGINT keys, monthly partitions and clustered columnstore indexes, adds
+    covering indexes for the view / procedure access paths and materializes
+    vw_BusPerformance as an indexed view. The partitions cover date_range (first, last
+    date; taken from df when given).
+    """
+    if df is not None:
+        if sql_types is None:
+            from .sql_types import frame_sql_types
+            sql_types = frame_sql_types(df)
+        if date_range is None and 'Date' in df.columns and df['Date'].notna().any():
+            dates = df['Date'].dropna()
+            date_range = (dates.min(), dates.max())
+    stats_sql = STATS_TABLE_SQL if sql_types is None else stats_table_sql(sql_types)
+
+    if expected_trips is None or expected_trips < LARGE_VOLUME_TRIPS:
+        return ''.join([HEADER_SQL, stats_sql, FLEET_TABLES_SQL, DAILY_OPERATIONS_SQL,
+                        MAINTENANCE_RECORDS_SQL, FUEL_PURCHASES_SQL, ALERTS_SQL, DASHBOARD_SNAPSHOT_SQL,
+                        VIEWS_SQL, BUS_PERFORMANCE_VIEW_SQL, PROCEDURES_SQL, FOOTER_SQL])
+    footer = FOOTER_SQL.replace('- vw_BusPerformance\n', '- vw_BusPerformance (over indexed vw_BusTripTotals)\n')
+    return ''.join([
+        HEADER_SQL, stats_sql, FLEET_TABLES_SQL,
+        partitioning_sql(*partition_range(date_range)),
+        LARGE_DAILY_OPERATIONS_SQL, LARGE_MAINTENANCE_RECORDS_SQL, LARGE_FUEL_PURCHASES_SQL,
+        ALERTS_SQL.replace('AlertId INT PRIMARY KEY', 'AlertId BIGINT PRIMARY KEY'), DASHBOARD_SNAPSHOT_SQL,
+        VIEWS_SQL, LARGE_BUS_PERFORMANCE_VIEW_SQL, ACCESS_PATH_INDEXES_SQL,
+        PROCEDURES_SQL, footer,
+    ])
+
+
+# =============================================================================
+# PIPELINE STAGES
+# =============================================================================
+
+def write_schema(df, path, expected_trips=None):
+    """Stage: write 04_create_database.sql."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(generate_schema(df, expected_trips))
+    return path
@@ -0,0 +1,163 @@
+"""
+Cleaned Output Serialization
+Purpose: Format every cleaned column once and build the CSV text of each output projection from it
+Author: Fleet Management System
+Date: 2026-10-16
+
+The four cleaned outputs share most of their columns (Date, Year, Month, BusRidership,
+DieselPrice ...). Calling to_csv once per output formats those columns four times;
+FormattedFrame formats each column the first time an output asks for it and every
+projection joins the cached text:
+
+    Date            'YYYY-MM-DD'
+    floats          repr (exact round trip, as to_csv writes them), or with precision set
+                    that many significant digits in positional notation, integer digits
+                    always kept: 3.6836930095940523e-05 -> 0.0000368369, 406792856.0 -> 406792856
+    NaN / NaT       empty field
+    text            quoted when it holds a comma, quote or line break (csv QUOTE_MINIMAL)
+
+Output files can be compressed (gzip, or zstd with the zstandard package) or written as
+Parquet (pyarrow), where the compression names the Parquet codec instead.
+
+Usage:
+    formatted = FormattedFrame(df_clean, precision=6)
+    text = formatted.csv(['Date', 'BusRidership'], mask=df_clean['BusRidership'].notna())
+"""
+
+import gzip
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMATS = ('csv', 'parquet')
+
+# Compression -> file name suffix of a compressed CSV
+COMPRESSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+# Decimal places never exceed this, whatever the precision
+MAX_DECIMALS = 15
+
+# Line terminator of to_csv
+LINESEP = os.linesep
+
+DATE_ISO = '%Y-%m-%d'
+
+
+def check_options(fmt='csv', compression=None):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}' (expected {' or '.join(FORMATS)})")
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}' (expected {' or '.join(COMPRESSIONS)})")
+    if fmt == 'csv' and compression == 'zstd' and zstandard is None:
+        raise ImportError("zstd compression needs the zstandard package (pip install zstandard)")
+
+
+def output_name(name, fmt='csv', compression=None):
+    """File name of a cleaned output ('ridership_data.csv') in the given format."""
+    if fmt == 'parquet':
+        return name.rsplit('.', 1)[0] + '.parquet'
+    return name + COMPRESSIONS[compression] if compression else name
+
+
+def open_stream(path, compression=None):
+    """New binary file for CSV bytes, compressed on the way when asked."""
+    if compression == 'gzip':
+        return gzip.open(path, 'wb')
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor().stream_writer(open(path, 'wb'))
+    return open(path, 'wb')
+
+
+# =============================================================================
+# COLUMN FORMATTING
+# =============================================================================
+
+def format_floats(values, precision=None):
+    """Text of a float array: repr, or precision significant digits without exponents."""
+    text = np.full(len(values), '', dtype=object)
+    present = ~np.isnan(values)
+    x = values[present]
+    if precision is None:
+        text[present] = list(map(repr, x.tolist()))
+        return text
+
+    with np.errstate(divide='ignore'):
+        magnitude = np.floor(np.log10(np.abs(x)))
+    magnitude[~np.isfinite(magnitude)] = 0
+    decimals = np.clip(precision - 1 - magnitude, 0, MAX_DECIMALS).astype('int64')
+    formatted = np.empty(len(x), dtype=object)
+    for places in np.unique(decimals).tolist():
+        selected = decimals == places
+        strings = map(f'{{:.{places}f}}'.format, x[selected].tolist())
+        formatted[selected] = [s.rstrip('0').rstrip('.') for s in strings] if places else list(strings)
+    text[present] = formatted
+    return text
+
+
+def _quote(text):
+    """QUOTE_MINIMAL of an object array of strings."""
+    needs_quotes = np.fromiter((',' in s or '"' in s or '\n' in s or '\r' in s for s in text),
+                               dtype=bool, count=len(text))
+    if needs_quotes.any():
+        text[needs_quotes] = ['"' + s.replace('"', '""') + '"' for s in text[needs_quotes]]
+    return text
+
+
+def format_column(series, precision=None):
+    """Object array of the CSV field text of every value of a column."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime(DATE_ISO).fillna('').to_numpy(dtype=object)
+    if pd.api.types.is_bool_dtype(series) and not series.hasnans:
+        return np.where(series.to_numpy(dtype=bool), 'True', 'False').astype(object)
+    if pd.api.types.is_float_dtype(series):
+        return format_floats(series.to_numpy(dtype='float64', na_value=np.nan), precision)
+    if pd.api.types.is_integer_dtype(series) and not series.hasnans:
+        return series.to_numpy().astype(str).astype(object)
+    text = series.astype(object).where(series.notna(), '').astype(str).to_numpy(dtype=object)
+    return _quote(text)
+
+
+class FormattedFrame:
+    """Column text of one frame, formatted on first use and shared by every projection."""
+
+    def __init__(self, df, precision=None):
+        self.df = df
+        self.precision = precision
+        self._columns = {}
+
+    def column(self, col):
+        if col not in self._columns:
+            self._columns[col] = format_column(self.df[col], self.precision)
+        return self._columns[col]
+
+    def lines(self, cols, mask=None):
+        """Data lines (without terminators) of the rows in mask, projected on cols."""
+        columns = [self.column(col) for col in cols]
+        if mask is not None:
+            mask = np.asarray(mask, dtype=bool)
+            columns = [column[mask] for column in columns]
+        return list(map(','.join, zip(*(column.tolist() for column in columns))))
+
+    def csv(self, cols, mask=None, header=True):
+        """CSV text of the projection, as to_csv(index=False) writes it."""
+        return (header_line(cols) if header else '') + join_lines(self.lines(cols, mask))
+
+
+def header_line(cols):
+    return ','.join(_quote(np.array(cols, dtype=object))) + LINESEP
+
+
+def join_lines(lines):
+    return LINESEP.join(lines) + LINESEP if lines else ''
+
+
+def line_sizes(lines, text):
+    """UTF-8 size of every line of text (the lines joined by join_lines), terminator included."""
+    sizes = map(len, lines) if text.isascii() else (len(line.encode('utf-8')) for line in lines)
+    return np.fromiter(sizes, dtype='int64', count=len(lines)) + len(LINESEP)
@@ -0,0 +1,92 @@
+"""
+Shared-Memory Frames
+Purpose: Hand numeric DataFrame columns to worker processes without pickling them
+Author: Fleet Management System
+Date: 2026-10-16
+
+The parent copies the columns once into a single shared memory block; a worker attaches
+by name and rebuilds only the columns it asks for. Only fixed-width dtypes (numbers,
+booleans, datetimes) are supported.
+"""
+
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+
+class SharedFrame:
+    """
+    Numeric columns of a DataFrame copied into one shared memory block.
+
+    Use as a context manager in the parent; pass handle() to workers and call
+    attach_frame(handle, columns) there.
+    """
+
+    def __init__(self, df):
+        arrays = {}
+        for col in df.columns:
+            values = np.ascontiguousarray(df[col].to_numpy())
+            if values.dtype.kind not in 'biufcmM':
+                raise TypeError(f"Column '{col}' has non fixed-width dtype {values.dtype}")
+            arrays[col] = values
+
+        self.length = len(df)
+        self.spec = []
+        offset = 0
+        for col, values in arrays.items():
+            self.spec.append((col, values.dtype.str, offset))
+            offset += values.nbytes
+
+        self.shm = SharedMemory(create=True, size=max(offset, 1))
+        for (col, dtype, start), values in zip(self.spec, arrays.values()):
+            view = np.ndarray(values.shape, dtype=dtype, buffer=self.shm.buf, offset=start)
+            view[:] = values
+            del view
+
+    def handle(self):
+        """Picklable reference to the block: (name, length, column spec)."""
+        return self.shm.name, self.length, self.spec
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _attach(name):
+    # The parent owns (and unlinks) the block. Before Python 3.13 attaching always
+    # registers it again, which is harmless for pool workers: they share the parent's
+    # resource tracker, where the name is already registered
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        return SharedMemory(name=name)
+
+
+def attach_frame(handle, columns=None, rows=None):
+    """
+    Copy the requested columns (all by default) out of a SharedFrame into a DataFrame.
+
+    rows (a slice) limits the copy to a row range, so workers can each take their own part.
+    """
+    name, length, spec = handle
+    wanted = None if columns is None else set(columns)
+    rows = slice(None) if rows is None else rows
+    shm = _attach(name)
+    try:
+        data = {}
+        for col, dtype, start in spec:
+            if wanted is None or col in wanted:
+                view = np.ndarray((length,), dtype=dtype, buffer=shm.buf, offset=start)
+                data[col] = view[rows].copy()
+                del view
+    finally:
+        shm.close()
+    order = [col for col, _, _ in spec if col in data] if columns is None else list(columns)
+    return pd.DataFrame({col: data[col] for col in order})
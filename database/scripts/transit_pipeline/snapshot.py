@@ -0,0 +1,251 @@
+"""
+Dashboard Snapshot
+Purpose: Maintain DashboardSnapshot, the monthly KPI fact table behind sp_GetDashboardKPIs
+Author: Fleet Management System
+Date: 2026-10-16
+
+sp_GetDashboardKPIs reads the latest DashboardSnapshot row instead of counting BusFleet
+and Alerts and scanning USDOTTransportationStats on every request. refresh_snapshot()
+keeps the table current after each load, touching only the months that changed:
+
+    stale months   months with no snapshot row, months whose USDOTTransportationStats row
+                   was updated at or after the snapshot (UpdatedAt only moves when a value
+                   changes; at or after, as timestamps have a finite resolution),
+                   and always the latest snapshot month
+    refreshed      every month from the first stale one on (the latest ridership / diesel
+                   values carry forward), with the month's DailyOperations and
+                   MaintenanceRecords totals read from that month on only
+
+Fleet and alert counts are current state: each refreshed row gets the counts at refresh
+time. Tables missing from a SQLite stand-in (fleet, trips) count as empty, and the
+DashboardSnapshot table itself is created there when needed.
+
+Usage:
+    python -m transit_pipeline.snapshot --target local.db
+    python -m transit_pipeline.snapshot --target "<ODBC connection string>" --full
+"""
+
+import argparse
+import datetime
+import time
+from dataclasses import dataclass
+
+from .bulk_load import SQLITE_NOW, TABLE as STATS_TABLE, connect, is_sqlite
+
+TABLE = 'DashboardSnapshot'
+
+# Written columns in order (RefreshedAt is set by the database)
+SNAPSHOT_COLUMNS = [
+    'SnapshotMonth',
+    'OperationalBuses', 'BusesInMaintenance', 'TotalBuses',
+    'BusRidership', 'DieselPrice', 'LatestMonthRidership', 'CurrentDieselPrice',
+    'Trips', 'Passengers', 'FuelCost', 'MaintenanceCost',
+    'NewAlerts', 'CriticalAlerts',
+]
+
+# Lower bound that selects every month (empty snapshot or a full refresh)
+EARLIEST = datetime.date(1900, 1, 1)
+
+SQLITE_TABLE_SQL = f"""CREATE TABLE IF NOT EXISTS {TABLE} (
+    SnapshotMonth TEXT PRIMARY KEY,
+    OperationalBuses INTEGER NOT NULL DEFAULT 0,
+    BusesInMaintenance INTEGER NOT NULL DEFAULT 0,
+    TotalBuses INTEGER NOT NULL DEFAULT 0,
+    BusRidership INTEGER NULL,
+    DieselPrice REAL NULL,
+    LatestMonthRidership INTEGER NULL,
+    CurrentDieselPrice REAL NULL,
+    Trips INTEGER NOT NULL DEFAULT 0,
+    Passengers INTEGER NULL,
+    FuelCost REAL NULL,
+    MaintenanceCost REAL NULL,
+    NewAlerts INTEGER NOT NULL DEFAULT 0,
+    CriticalAlerts INTEGER NOT NULL DEFAULT 0,
+    RefreshedAt TEXT DEFAULT ({SQLITE_NOW})
+)"""
+
+
+@dataclass
+class SnapshotReport:
+    months: int
+    first: str
+    last: str
+    seconds: float
+
+
+def _month(value):
+    """First day of the month of a date, datetime or 'YYYY-MM-DD...' string."""
+    if isinstance(value, str):
+        value = datetime.date.fromisoformat(value[:10])
+    return datetime.date(value.year, value.month, 1)
+
+
+def _param(date, sqlite):
+    """Date as a query parameter (ISO text on SQLite, where dates are stored as text)."""
+    return date.isoformat() if sqlite else date
+
+
+def _table_exists(cursor, table, sqlite):
+    if sqlite:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+        return cursor.fetchone() is not None
+    cursor.execute("SELECT OBJECT_ID(?, 'U')", (table,))
+    return cursor.fetchone()[0] is not None
+
+
+def _month_sql(column, sqlite):
+    """Expression of the first day of column's month."""
+    if sqlite:
+        return f"strftime('%Y-%m-01', {column})"
+    return f"DATEFROMPARTS(YEAR({column}), MONTH({column}), 1)"
+
+
+# =============================================================================
+# REFRESH QUERIES
+# =============================================================================
+
+def first_stale_month(cursor, sqlite):
+    """Earliest month that needs a refresh (EARLIEST when the snapshot is empty), or None."""
+    cursor.execute(f"SELECT MAX(SnapshotMonth) FROM {TABLE}")
+    (latest,) = cursor.fetchone()
+    if latest is None:
+        return EARLIEST
+    cursor.execute(
+        f"SELECT MIN(s.Date) FROM {STATS_TABLE} s "
+        f"LEFT JOIN {TABLE} d ON d.SnapshotMonth = s.Date "
+        f"WHERE d.SnapshotMonth IS NULL OR s.UpdatedAt >= d.RefreshedAt")
+    (stale,) = cursor.fetchone()
+    latest = _month(latest)
+    return latest if stale is None else min(latest, _month(stale))
+
+
+def _latest_before(cursor, column, before, sqlite):
+    """Latest non-NULL value of a stats column before a month (the carry-forward seed)."""
+    where = f"WHERE Date < ? AND {column} IS NOT NULL ORDER BY Date DESC"
+    sql = (f"SELECT {column} FROM {STATS_TABLE} {where} LIMIT 1" if sqlite
+           else f"SELECT TOP 1 {column} FROM {STATS_TABLE} {where}")
+    cursor.execute(sql, (_param(before, sqlite),))
+    row = cursor.fetchone()
+    return None if row is None else row[0]
+
+
+def _monthly_totals(cursor, table, date_col, totals, since, sqlite):
+    """{month: (totals...)} of a table from since on; {} when the table does not exist."""
+    if not _table_exists(cursor, table, sqlite):
+        return {}
+    month = _month_sql(date_col, sqlite)
+    cursor.execute(f"SELECT {month}, {', '.join(totals)} FROM {table} WHERE {date_col} >= ? GROUP BY {month}",
+                   (_param(since, sqlite),))
+    return {_month(row[0]): tuple(row[1:]) for row in cursor.fetchall()}
+
+
+def _current_counts(cursor, sqlite):
+    """(operational, in maintenance, total buses, new alerts, new critical alerts) right now."""
+    fleet = {}
+    if _table_exists(cursor, 'BusFleet', sqlite):
+        cursor.execute("SELECT Status, COUNT(*) FROM BusFleet GROUP BY Status")
+        fleet = dict(cursor.fetchall())
+    new = critical = 0
+    if _table_exists(cursor, 'Alerts', sqlite):
+        cursor.execute("SELECT COUNT(*), SUM(CASE WHEN Severity = 'Critical' THEN 1 ELSE 0 END) "
+                       "FROM Alerts WHERE Status = 'New'")
+        new, critical = cursor.fetchone()
+    return (fleet.get('Operational', 0), fleet.get('Maintenance', 0), sum(fleet.values()),
+            new or 0, critical or 0)
+
+
+def snapshot_rows(cursor, since, sqlite):
+    """SNAPSHOT_COLUMNS tuples for every month from since on."""
+    cursor.execute(f"SELECT Date, BusRidership, DieselPrice FROM {STATS_TABLE} WHERE Date >= ? ORDER BY Date",
+                   (_param(since, sqlite),))
+    stats = {_month(date): (ridership, diesel) for date, ridership, diesel in cursor.fetchall()}
+    trips = _monthly_totals(cursor, 'DailyOperations', 'TripDate',
+                            ['COUNT(*)', 'SUM(PassengerCount)', 'SUM(FuelCost)'], since, sqlite)
+    maintenance = _monthly_totals(cursor, 'MaintenanceRecords', 'MaintenanceDate', ['SUM(TotalCost)'], since, sqlite)
+    operational, in_maintenance, total, new_alerts, critical_alerts = _current_counts(cursor, sqlite)
+
+    months = sorted(set(stats) | set(trips) | set(maintenance))
+    if not months:
+        return []
+    latest_ridership = _latest_before(cursor, 'BusRidership', months[0], sqlite)
+    latest_diesel = _latest_before(cursor, 'DieselPrice', months[0], sqlite)
+
+    rows = []
+    for month in months:
+        ridership, diesel = stats.get(month, (None, None))
+        latest_ridership = latest_ridership if ridership is None else ridership
+        latest_diesel = latest_diesel if diesel is None else diesel
+        trip_count, passengers, fuel_cost = trips.get(month, (0, None, None))
+        (maintenance_cost,) = maintenance.get(month, (None,))
+        rows.append((_param(month, sqlite), operational, in_maintenance, total,
+                     ridership, diesel, latest_ridership, latest_diesel,
+                     trip_count, passengers, fuel_cost, maintenance_cost,
+                     new_alerts, critical_alerts))
+    return rows
+
+
+def _upsert_sql(sqlite):
+    columns = ', '.join(SNAPSHOT_COLUMNS)
+    params = ', '.join('?' * len(SNAPSHOT_COLUMNS))
+    if sqlite:
+        updates = ', '.join(f'{col} = excluded.{col}' for col in SNAPSHOT_COLUMNS[1:])
+        return (f"INSERT INTO {TABLE} ({columns}) VALUES ({params}) "
+                f"ON CONFLICT(SnapshotMonth) DO UPDATE SET {updates}, RefreshedAt = {SQLITE_NOW}")
+    updates = ', '.join(f't.{col} = s.{col}' for col in SNAPSHOT_COLUMNS[1:])
+    return (f"MERGE {TABLE} WITH (HOLDLOCK) AS t USING (VALUES ({params})) AS s ({columns}) "
+            f"ON t.SnapshotMonth = s.SnapshotMonth "
+            f"WHEN MATCHED THEN UPDATE SET {updates}, t.RefreshedAt = GETDATE() "
+            f"WHEN NOT MATCHED THEN INSERT ({columns}) "
+            f"VALUES ({', '.join(f's.{col}' for col in SNAPSHOT_COLUMNS)});")
+
+
+# =============================================================================
+# PIPELINE STAGES
+# =============================================================================
+
+def refresh_snapshot(conn, full=False):
+    """
+    Stage: bring DashboardSnapshot up to date after a load, in one transaction.
+
+    Only the months from the first stale one on are recomputed (every month with full).
+    Returns a SnapshotReport.
+    """
+    sqlite = is_sqlite(conn)
+    start = time.perf_counter()
+    cursor = conn.cursor()
+    if not sqlite:
+        cursor.fast_executemany = True
+    try:
+        if sqlite:
+            cursor.execute(SQLITE_TABLE_SQL)
+        since = EARLIEST if full else first_stale_month(cursor, sqlite)
+        rows = snapshot_rows(cursor, since, sqlite) if since is not None else []
+        if rows:
+            cursor.executemany(_upsert_sql(sqlite), rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    first, last = (str(rows[0][0])[:10], str(rows[-1][0])[:10]) if rows else (None, None)
+    return SnapshotReport(len(rows), first, last, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=f'Refresh {TABLE}, the monthly KPI facts behind sp_GetDashboardKPIs')
+    parser.add_argument('--target', required=True,
+                        help='ODBC connection string (SQL Server) or SQLite database file')
+    parser.add_argument('--full', action='store_true', help='Recompute every month, not only the stale ones')
+    args = parser.parse_args()
+
+    conn = connect(args.target)
+    try:
+        report = refresh_snapshot(conn, full=args.full)
+    finally:
+        conn.close()
+    if report.months:
+        print(f"✓ Refreshed {report.months} month(s) of {TABLE} ({report.first} .. {report.last}) "
+              f"in {report.seconds:.3f}s")
+    else:
+        print(f"✓ {TABLE} is up to date")
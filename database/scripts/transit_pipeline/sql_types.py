@@ -0,0 +1,137 @@
+"""
+SQL Type Inference
+Purpose: Narrowest SQL Server type and nullability per column from a profile of the data
+Author: Fleet Management System
+Date: 2026-10-16
+
+Reads a ColumnProfiler built with decimals=True (profiling.py) - streamed over the whole
+CSV, or over a random sample of a wide extract - and maps every column to a type:
+
+    date column            DATE
+    boolean                BIT
+    whole numbers          TINYINT / SMALLINT / INT / BIGINT, the first holding the observed
+                           range times HEADROOM
+    fractions              DECIMAL(p, s): s = the decimal places that hold every value exactly,
+                           or SIGNIFICANT_DIGITS of the smallest value when none up to MAX_SCALE
+                           does; p = the digits of max |value| times HEADROOM, plus s
+    text                   NVARCHAR(n) with room for TEXT_HEADROOM times the longest value
+
+Columns named like a price, rate or cost stay DECIMAL with at least the scale in
+DECIMAL_HINTS even when every value is whole. A column is NOT NULL only when a full
+(unsampled) profile saw no NULLs. The result has the {column: (SQL type, nullable)} shape
+of compact.stats_sql_types(), and schema.stats_table_sql() turns it into DDL.
+
+Usage:
+    python -m transit_pipeline.sql_types                      # cleaned dataset, streamed
+    python -m transit_pipeline.sql_types wide.csv --sample 0.05
+"""
+
+import argparse
+import math
+
+from .config import CLEANED_CSV
+from .profiling import MAX_SCALE, profile_csv, profile_frame
+
+# Integer types, narrowest first: (name, min, max)
+INTEGER_TYPES = [
+    ('TINYINT', 0, 2**8 - 1),
+    ('SMALLINT', -2**15, 2**15 - 1),
+    ('INT', -2**31, 2**31 - 1),
+    ('BIGINT', -2**63, 2**63 - 1),
+]
+
+# Growth allowed beyond the observed magnitude before a column overflows its type
+HEADROOM = 10
+TEXT_HEADROOM = 2
+
+# Significant digits kept for values with no exact scale up to MAX_SCALE
+SIGNIFICANT_DIGITS = 4
+
+# SQL Server DECIMAL limit
+MAX_PRECISION = 38
+
+# Name fragment -> minimum scale; such columns stay DECIMAL even when every value is whole
+DECIMAL_HINTS = {'Price': 3, 'Rate': 3, 'Cost': 2}
+
+
+def _decimal_hint(col):
+    hints = [scale for fragment, scale in DECIMAL_HINTS.items() if fragment in col]
+    return max(hints) if hints else None
+
+
+def integer_type(lo, hi):
+    """Narrowest integer type holding lo..hi with HEADROOM."""
+    lo, hi = min(lo, 0) * HEADROOM, max(hi, 0) * HEADROOM
+    for name, low, high in INTEGER_TYPES:
+        if low <= lo and hi <= high:
+            return name
+    raise ValueError(f"values {lo:g}..{hi:g} do not fit BIGINT")
+
+
+def decimal_type(lo, hi, scale, inexact, min_abs, min_scale=0):
+    """DECIMAL(p, s) for lo..hi with at least scale decimal places."""
+    if inexact and min_abs > 0:
+        # Keep SIGNIFICANT_DIGITS of the smallest magnitude
+        scale = max(scale, SIGNIFICANT_DIGITS - 1 - math.floor(math.log10(min_abs)))
+    scale = min(max(scale, min_scale), MAX_SCALE)
+    magnitude = max(abs(lo), abs(hi)) * HEADROOM
+    integer_digits = max(len(str(int(magnitude))), 1)
+    precision = min(integer_digits + scale, MAX_PRECISION)
+    return f'DECIMAL({precision},{scale})'
+
+
+def text_type(max_length):
+    n = int(math.ceil(max(max_length, 1) * TEXT_HEADROOM / 10.0)) * 10
+    return 'NVARCHAR(MAX)' if n > 4000 else f'NVARCHAR({n})'
+
+
+def infer_sql_types(profiler, date_col='Date'):
+    """{column: (SQL type, nullable)} from a ColumnProfiler created with decimals=True."""
+    types = {}
+    for row in profiler.types_report().itertuples(index=False):
+        nullable = profiler.sampled or row.non_null < row.rows
+        if row.column == date_col:
+            sql_type = 'DATE'
+        elif row.boolean:
+            sql_type = 'BIT'
+        elif not row.numeric:
+            sql_type = text_type(row.max_length)
+        elif row.non_null == 0:
+            # No values to size from: the widest exact type
+            sql_type = f'DECIMAL({MAX_PRECISION},{MAX_SCALE})'
+        else:
+            hint = _decimal_hint(row.column)
+            if row.scale == 0 and not row.inexact and hint is None:
+                sql_type = integer_type(row.min, row.max)
+            else:
+                sql_type = decimal_type(row.min, row.max, row.scale, row.inexact, row.min_abs, hint or 0)
+        types[row.column] = (sql_type, nullable)
+    return types
+
+
+def frame_sql_types(df, date_col='Date'):
+    """infer_sql_types() of an in-memory frame (one profiling pass)."""
+    return infer_sql_types(profile_frame(df, date_col=date_col, decimals=True), date_col)
+
+
+def csv_sql_types(csv_path=CLEANED_CSV, sample=None, chunksize=50_000, seed=0, date_col='Date'):
+    """infer_sql_types() of a CSV, streamed chunk by chunk (or over a random sample fraction)."""
+    profiler = profile_csv(csv_path, chunksize=chunksize, date_col=date_col, decimals=True,
+                           sample=sample, seed=seed)
+    return infer_sql_types(profiler, date_col)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Infer SQL Server column types from a profile of a CSV')
+    parser.add_argument('csv', nargs='?', default=CLEANED_CSV, help='CSV to profile (default: cleaned dataset)')
+    parser.add_argument('--sample', type=float, help='Profile only this random fraction of the rows')
+    parser.add_argument('--chunksize', type=int, default=50_000, help='Rows per chunk (default: 50000)')
+    args = parser.parse_args()
+
+    types = csv_sql_types(args.csv, sample=args.sample, chunksize=args.chunksize)
+    print("=" * 80)
+    print("INFERRED SQL TYPES" + (f" ({args.sample:.0%} sample)" if args.sample else ""))
+    print("=" * 80)
+    for col, (sql_type, nullable) in types.items():
+        print(f"  {col:<40} {sql_type:<16} {'NULL' if nullable else 'NOT NULL'}")
+    print(f"✓ {len(types)} columns, {sum(not nullable for _, nullable in types.values())} NOT NULL")
@@ -0,0 +1,404 @@
+"""
+Synthetic Fleet Data
+Purpose: Generate realistic BusFleet / Routes / DailyOperations / FuelPurchases / MaintenanceRecords rows
+Author: Fleet Management System
+Date: 2026-10-16
+
+The DOT data only describes the national picture; the fleet tables in 04_create_database.sql
+have no data. This module simulates a fleet month by month with NumPy (no per-row Python
+loops), so tens of millions of trip rows can be produced for load-testing the schema:
+
+    - passengers per trip follow the real monthly BusRidership level relative to the
+      pre-COVID average (seasonality and the COVID collapse included)
+    - trip fuel cost and fuel purchase prices follow the real monthly DieselPrice
+    - odometers accumulate per bus; preventive maintenance is due every pm_interval_miles,
+      corrective and emergency repairs become likelier as buses age
+
+Column names match the SQL Server tables; identity columns are left to the database, and
+BusId / RouteId are the 1-based positions of the generated BusFleet / Routes rows.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .config import COVID_START, START_DATE, SYNTHETIC_DIR
+
+# (Manufacturer, Model, FuelType, Capacity, AverageMPG, share of the fleet)
+# CNG mileage is in diesel gallon equivalents
+BUS_MODELS = [
+    ('New Flyer', 'Xcelsior XD40', 'Diesel', 40, 4.1, 0.30),
+    ('Gillig', 'Low Floor 40', 'Diesel', 38, 4.3, 0.25),
+    ('Nova Bus', 'LFS 40', 'Diesel', 40, 4.0, 0.10),
+    ('Gillig', 'Low Floor Hybrid', 'Hybrid', 38, 5.2, 0.12),
+    ('Volvo', '7900 Hybrid', 'Hybrid', 42, 5.0, 0.08),
+    ('New Flyer', 'Xcelsior XN40', 'CNG', 40, 3.6, 0.15),
+]
+
+LOCATIONS = [
+    'Downtown Transit Center', 'Airport', 'University', 'Central Station', 'Medical Center',
+    'Northgate Mall', 'Riverside', 'Industrial Park', 'Harbor', 'Eastside Park & Ride',
+    'West End', 'Civic Center', 'Stadium', 'Southpoint', 'Lakeside', 'Tech Campus',
+]
+
+DEPOTS = ['North Depot', 'South Depot', 'East Depot', 'Central Depot']
+
+MAINTENANCE_DESCRIPTIONS = {
+    'Preventive': ['Scheduled PM inspection', 'Oil and filter change', 'Brake inspection',
+                   'Tire rotation and inspection', 'HVAC service'],
+    'Corrective': ['Brake pad replacement', 'Door actuator repair', 'Suspension repair',
+                   'Transmission service', 'Electrical fault repair', 'Coolant leak repair'],
+    'Emergency': ['Roadside breakdown tow', 'Engine failure', 'Collision damage repair',
+                  'Fire suppression system activation'],
+}
+
+# (mean labor, mean parts) in dollars
+MAINTENANCE_COSTS = {
+    'Preventive': (350.0, 250.0),
+    'Corrective': (900.0, 1400.0),
+    'Emergency': (2500.0, 4500.0),
+}
+
+# 'HH:MM:SS' for every second of the day, indexed by seconds since midnight
+TIME_STRINGS = pd.to_datetime(np.arange(86400), unit='s').strftime('%H:%M:%S').to_numpy()
+
+
+@dataclass
+class FleetConfig:
+    buses: int = 200
+    routes: int = 40
+    trips_per_day: int = 6           # trips per bus on a service day
+    start: str = START_DATE
+    end: str = None                  # last day simulated (default: end of the seasonality data)
+    seed: int = 42
+    pm_interval_miles: int = 6000    # preventive maintenance interval
+    weekday_service: float = 0.92    # share of buses in service on a weekday
+    weekend_service: float = 0.60
+    load_factor: float = 0.55        # pre-COVID average passengers / capacity
+    models: list = field(default_factory=lambda: list(BUS_MODELS))
+
+
+# =============================================================================
+# SEASONALITY
+# =============================================================================
+
+def monthly_seasonality(df):
+    """
+    Monthly drivers from the cleaned DOT data, indexed by month start.
+
+    DieselPrice is $/gallon; RidershipFactor is BusRidership over its pre-COVID average.
+    Gaps are carried forward (then backward).
+    """
+    df = df[['Date', 'DieselPrice', 'BusRidership']].copy()
+    df['Date'] = pd.to_datetime(df['Date']).dt.to_period('M').dt.to_timestamp()
+    monthly = df.groupby('Date').mean()
+    pre_covid = monthly.loc[monthly.index < pd.Timestamp(COVID_START), 'BusRidership'].mean()
+    return pd.DataFrame({
+        'DieselPrice': monthly['DieselPrice'].ffill().bfill(),
+        'RidershipFactor': (monthly['BusRidership'] / pre_covid).ffill().bfill(),
+    })
+
+
+# =============================================================================
+# STATIC TABLES
+# =============================================================================
+
+def _vins(rng, n):
+    alphabet = np.array(list('ABCDEFGHJKLMNPRSTUVWXYZ0123456789'))
+    chars = alphabet[rng.integers(len(alphabet), size=(n, 17))]
+    return np.ascontiguousarray(chars).view('<U17').ravel()
+
+
+def generate_fleet(config, rng):
+    """BusFleet rows as of config.start (odometer and maintenance columns filled in later)."""
+    n = config.buses
+    models = config.models
+    shares = np.array([m[5] for m in models])
+    model_idx = rng.choice(len(models), size=n, p=shares / shares.sum())
+
+    start = pd.Timestamp(config.start)
+    age_years = rng.integers(0, 12, size=n)
+    purchase = (start - pd.to_timedelta(age_years * 365 + rng.integers(0, 365, size=n), unit='D'))
+    width = max(3, len(str(n)))
+
+    return pd.DataFrame({
+        'BusNumber': [f'BUS-{i:0{width}d}' for i in range(1, n + 1)],
+        'VIN': _vins(rng, n),
+        'Manufacturer': np.array([m[0] for m in models])[model_idx],
+        'Model': np.array([m[1] for m in models])[model_idx],
+        'Year': purchase.year.to_numpy(),
+        'Capacity': np.array([m[3] for m in models])[model_idx],
+        'FuelType': np.array([m[2] for m in models])[model_idx],
+        'AverageMPG': np.round(np.array([m[4] for m in models])[model_idx] * rng.normal(1, 0.04, n), 2),
+        'Status': 'Operational',
+        'CurrentOdometer': (age_years * 38_000 + rng.integers(0, 20_000, size=n)).astype(np.int64),
+        'PurchaseDate': purchase.strftime('%Y-%m-%d'),
+        'LastMaintenanceDate': None,
+        'NextMaintenanceDate': None,
+    })
+
+
+def generate_routes(config, rng):
+    """Routes rows: distance 5-25 miles at 12 mph average, 70% daily service."""
+    n = config.routes
+    start_idx = rng.integers(len(LOCATIONS), size=n)
+    end_idx = (start_idx + rng.integers(1, len(LOCATIONS), size=n)) % len(LOCATIONS)
+    locations = np.array(LOCATIONS)
+    distance = np.round(rng.uniform(5, 25, n), 2)
+    return pd.DataFrame({
+        'RouteNumber': [f'Route {i}' for i in range(1, n + 1)],
+        'RouteName': np.char.add(np.char.add(locations[start_idx], ' - '), locations[end_idx]),
+        'StartLocation': locations[start_idx],
+        'EndLocation': locations[end_idx],
+        'TotalDistance': distance,
+        'EstimatedDuration': np.ceil(distance / 12 * 60).astype(int),
+        'IsActive': (rng.random(n) < 0.95).astype(int),
+        'ServiceDays': np.where(rng.random(n) < 0.7, 'Daily', 'Mon-Fri'),
+    })
+
+
+# =============================================================================
+# MONTHLY SIMULATION
+# =============================================================================
+
+class FleetSimulator:
+    """Running fleet state (odometers, maintenance dates) advanced one month at a time."""
+
+    def __init__(self, config, seasonality):
+        self.config = config
+        self.seasonality = seasonality
+        self.rng = np.random.default_rng(config.seed)
+        self.fleet = generate_fleet(config, self.rng)
+        self.routes = generate_routes(config, self.rng)
+
+        n = config.buses
+        self.home_route = self.rng.integers(config.routes, size=n)
+        self.depot = np.array(DEPOTS)[self.rng.integers(len(DEPOTS), size=n)]
+        self.offset = self.rng.integers(0, 60 * 60, size=n)   # first departure after 05:00
+        self.capacity = self.fleet['Capacity'].to_numpy()
+        self.mpg = self.fleet['AverageMPG'].to_numpy(dtype=float)
+        self.age = (pd.Timestamp(config.start).year - self.fleet['Year'].to_numpy()).astype(float)
+        self.odometer = self.fleet['CurrentOdometer'].to_numpy(dtype=float)
+        self.last_maintenance = np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+
+        self.route_distance = self.routes['TotalDistance'].to_numpy()
+        self.route_minutes = self.routes['EstimatedDuration'].to_numpy()
+        self.route_weekdays_only = (self.routes['ServiceDays'] == 'Mon-Fri').to_numpy()
+
+    def months(self):
+        """Month start timestamps to simulate."""
+        start = pd.Timestamp(self.config.start).to_period('M').to_timestamp()
+        end = pd.Timestamp(self.config.end) if self.config.end else self.seasonality.index.max()
+        return pd.date_range(start, end.to_period('M').to_timestamp(), freq='MS')
+
+    def _drivers(self, month):
+        known = self.seasonality.loc[:month]
+        row = known.iloc[-1] if len(known) else self.seasonality.iloc[0]
+        return float(row['DieselPrice']), float(row['RidershipFactor'])
+
+    def simulate_month(self, month):
+        """DailyOperations, FuelPurchases and MaintenanceRecords frames for one month."""
+        config, rng = self.config, self.rng
+        n_buses, trips = config.buses, config.trips_per_day
+        days = pd.date_range(month, month + pd.offsets.MonthEnd(0), freq='D')
+        if config.end:
+            days = days[days <= pd.Timestamp(config.end)]
+        diesel, ridership = self._drivers(month)
+        weekend = days.dayofweek.to_numpy() >= 5
+
+        # Which buses run on which day
+        service = np.where(weekend, config.weekend_service, config.weekday_service)
+        active = rng.random((len(days), n_buses)) < service[:, None]
+        day_idx, bus_idx = np.nonzero(active)
+
+        # One row per trip
+        trip_no = np.tile(np.arange(trips), len(day_idx))
+        day_idx = np.repeat(day_idx, trips)
+        bus_idx = np.repeat(bus_idx, trips)
+        n = len(bus_idx)
+
+        route_idx = self.home_route[bus_idx].copy()
+        swap = rng.random(n) < 0.10
+        route_idx[swap] = rng.integers(config.routes, size=swap.sum())
+
+        # Mon-Fri routes are not scheduled at the weekend
+        scheduled = ~(self.route_weekdays_only[route_idx] & weekend[day_idx])
+        day_idx, bus_idx, trip_no, route_idx = (a[scheduled] for a in (day_idx, bus_idx, trip_no, route_idx))
+        n = len(bus_idx)
+
+        status = np.full(n, 'Completed', dtype=object)
+        roll = rng.random(n)
+        cancelled = roll < 0.01
+        delayed = ~cancelled & (roll > 0.88)
+        status[delayed] = 'Delayed'
+        status[cancelled] = 'Cancelled'
+        delay = np.where(delayed, rng.geometric(0.12, n), 0)
+
+        headway = 18 * 3600 // max(trips, 1)
+        departure = (5 * 3600 + self.offset[bus_idx] + trip_no * headway + rng.integers(-300, 300, n)) % 86400
+        arrival = (departure + (self.route_minutes[route_idx] + delay) * 60) % 86400
+
+        distance = self.route_distance[route_idx] * rng.normal(1.0, 0.02, n)
+        mean_passengers = (self.capacity[bus_idx] * config.load_factor * ridership
+                           * np.where(weekend[day_idx], 0.7, 1.0))
+        passengers = np.minimum(rng.poisson(mean_passengers), self.capacity[bus_idx] * 2)
+        fuel = distance / self.mpg[bus_idx] * rng.normal(1.0, 0.05, n) * (1 + passengers / 400)
+        distance[cancelled] = 0.0
+        fuel[cancelled] = 0.0
+
+        trip_dates = days.strftime('%Y-%m-%d').to_numpy()
+        operations = pd.DataFrame({
+            'BusId': bus_idx + 1,
+            'RouteId': route_idx + 1,
+            'TripDate': trip_dates[day_idx],
+            'DepartureTime': TIME_STRINGS[departure],
+            'ArrivalTime': np.where(cancelled, None, TIME_STRINGS[arrival]),
+            'PassengerCount': pd.array(np.where(cancelled, np.nan, passengers), dtype='Int64'),
+            'ActualDistance': np.where(cancelled, np.nan, np.round(distance, 2)),
+            'FuelConsumed': np.where(cancelled, np.nan, np.round(fuel, 2)),
+            'FuelCost': np.where(cancelled, np.nan, np.round(fuel * diesel, 2)),
+            'TripStatus': status,
+            'DelayMinutes': pd.array(np.where(cancelled, np.nan, delay), dtype='Int64'),
+        })
+
+        # Per bus-day totals: buses refuel at their depot each night
+        cell = day_idx * n_buses + bus_idx
+        daily_miles = np.bincount(cell, weights=distance, minlength=len(days) * n_buses).reshape(len(days), n_buses)
+        daily_fuel = np.bincount(cell, weights=fuel, minlength=len(days) * n_buses).reshape(len(days), n_buses)
+        odometer_before = self.odometer + np.vstack([np.zeros(n_buses), np.cumsum(daily_miles, axis=0)[:-1]])
+        odometer_after = self.odometer + np.cumsum(daily_miles, axis=0)
+
+        fuel_day, fuel_bus = np.nonzero(daily_fuel > 0)
+        price = diesel * rng.normal(0.92, 0.02, len(fuel_day))   # fleet contract below retail
+        gallons = np.round(daily_fuel[fuel_day, fuel_bus], 2)
+        purchases = pd.DataFrame({
+            'BusId': fuel_bus + 1,
+            'PurchaseDate': trip_dates[fuel_day],
+            'Gallons': gallons,
+            'PricePerGallon': np.round(price, 3),
+            'TotalCost': np.round(gallons * np.round(price, 3), 2),
+            'FuelStation': self.depot[fuel_bus],
+            'OdometerAtPurchase': odometer_after[fuel_day, fuel_bus].astype(np.int64),
+        })
+
+        maintenance = self._maintenance(days, trip_dates, active, odometer_before, odometer_after)
+        self.odometer = odometer_after[-1]
+        return operations, purchases, maintenance
+
+    def _maintenance(self, days, trip_dates, active, odometer_before, odometer_after):
+        config, rng = self.config, self.rng
+        interval = config.pm_interval_miles
+
+        # Preventive: the day a bus crosses a multiple of the PM interval
+        due = (odometer_after // interval) > (odometer_before // interval)
+        # Corrective / emergency: daily hazard growing with age
+        hazard = 0.002 * (1 + self.age / 10)
+        roll = rng.random(due.shape)
+        corrective = active & (roll < hazard[None, :])
+        emergency = active & ~corrective & (roll > 1 - hazard[None, :] / 6)
+
+        frames = []
+        for kind, mask in (('Preventive', due), ('Corrective', corrective), ('Emergency', emergency)):
+            day, bus = np.nonzero(mask)
+            if not len(day):
+                continue
+            labor_mean, parts_mean = MAINTENANCE_COSTS[kind]
+            labor = np.round(rng.lognormal(np.log(labor_mean), 0.25, len(day)), 2)
+            parts = np.round(rng.lognormal(np.log(parts_mean), 0.45, len(day)), 2)
+            descriptions = np.array(MAINTENANCE_DESCRIPTIONS[kind])
+            completed = days[day] + pd.to_timedelta(rng.integers(2, 48 if kind == 'Preventive' else 120, len(day)), unit='h')
+            frames.append(pd.DataFrame({
+                'BusId': bus + 1,
+                'MaintenanceDate': trip_dates[day],
+                'MaintenanceType': kind,
+                'Description': descriptions[rng.integers(len(descriptions), size=len(day))],
+                'LaborCost': labor,
+                'PartsCost': parts,
+                'TotalCost': np.round(labor + parts, 2),
+                'OdometerAtMaintenance': odometer_after[day, bus].astype(np.int64),
+                'Status': 'Completed',
+                'CompletedAt': completed.strftime('%Y-%m-%d %H:%M:%S'),
+            }))
+            last = days.to_numpy().astype('datetime64[D]')[day]
+            np.fmax.at(self.last_maintenance, bus, last)   # fmax ignores NaT
+
+        if not frames:
+            return pd.DataFrame(columns=['BusId', 'MaintenanceDate', 'MaintenanceType', 'Description',
+                                         'LaborCost', 'PartsCost', 'TotalCost',
+                                         'OdometerAtMaintenance', 'Status', 'CompletedAt'])
+        return pd.concat(frames, ignore_index=True).sort_values(['MaintenanceDate', 'BusId'], kind='stable')
+
+    def final_fleet(self):
+        """BusFleet with odometers, maintenance dates and status as of the last simulated day."""
+        fleet = self.fleet.copy()
+        fleet['CurrentOdometer'] = self.odometer.astype(np.int64)
+        last = pd.to_datetime(self.last_maintenance)
+        fleet['LastMaintenanceDate'] = last.strftime('%Y-%m-%d').where(last.notna(), None)
+        next_due = last + pd.Timedelta(days=90)
+        fleet['NextMaintenanceDate'] = next_due.strftime('%Y-%m-%d').where(last.notna(), None)
+        roll = self.rng.random(len(fleet))
+        fleet['Status'] = np.where(roll < 0.05, 'Maintenance', np.where(roll > 0.98, 'Retired', 'Operational'))
+        return fleet
+
+
+def generate(config, seasonality):
+    """
+    Yield (table, frame) chunks: Routes, then DailyOperations / FuelPurchases /
+    MaintenanceRecords for each month, then BusFleet (whose odometers and maintenance
+    dates depend on the simulation). Load BusFleet and Routes first when inserting into a
+    database with the foreign keys in place.
+    """
+    simulator = FleetSimulator(config, seasonality)
+    yield 'Routes', simulator.routes
+    for month in simulator.months():
+        operations, purchases, maintenance = simulator.simulate_month(month)
+        yield 'DailyOperations', operations
+        yield 'FuelPurchases', purchases
+        yield 'MaintenanceRecords', maintenance
+    yield 'BusFleet', simulator.final_fleet()
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+class PartWriter:
+    """Writes each chunk as <output_dir>/<table>/part-NNNNN.<csv|parquet>."""
+
+    def __init__(self, output_dir, fmt='csv'):
+        if fmt not in ('csv', 'parquet'):
+            raise ValueError(f"Unknown format '{fmt}' (expected csv or parquet)")
+        self.output_dir = Path(output_dir)
+        self.fmt = fmt
+        self.parts = {}
+        self.rows = {}
+
+    def write(self, table, frame):
+        part = self.parts.get(table, 0)
+        table_dir = self.output_dir / table
+        if part == 0:
+            table_dir.mkdir(parents=True, exist_ok=True)
+            for old in table_dir.glob('part-*'):
+                old.unlink()
+        path = table_dir / f'part-{part:05d}.{self.fmt}'
+        if self.fmt == 'parquet':
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_csv(path, index=False)
+        self.parts[table] = part + 1
+        self.rows[table] = self.rows.get(table, 0) + len(frame)
+        return path
+
+
+# =============================================================================
+# PIPELINE STAGES
+# =============================================================================
+
+def write_synthetic(df, output_dir=SYNTHETIC_DIR, config=None, fmt='csv'):
+    """Stage: simulate a fleet driven by the cleaned data and write it; returns rows per table."""
+    writer = PartWriter(output_dir, fmt)
+    for table, frame in generate(config or FleetConfig(), monthly_seasonality(df)):
+        writer.write(table, frame)
+    return writer.rows